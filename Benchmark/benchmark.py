@@ -0,0 +1,364 @@
+# Benchmark of the overhead of generateDataSet.py, independent of the
+# render time thanks to the fake POV-Ray executable fakePovRay.py.
+# The results are saved in a JSON file which can be compared with the
+# one of another version using -compare.
+
+# Import necessary modules
+import os, sys, json, time, platform, tempfile, shutil, subprocess
+import contextlib, numpy
+
+# Base directory
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Import the modules to benchmark
+sys.path.insert(0, os.path.dirname(BASE_DIR))
+import generateDataSet
+from generateDataSet import DataSet, DataSetGenerator, PrintExc
+from dataSetReader import DataSetReader
+
+class Benchmark:
+  '''
+  Class running the benchmarks
+  '''
+  # Number of samples of the data sets generated end to end
+  _sizes = [1000, 10000, 100000]
+  # Dimensions of the images [width, height]
+  _dim = [32, 32]
+  # Number of masks per sample
+  _nbMask = 2
+  # Number of samples rendered in parallel
+  _nbJobs = os.cpu_count()
+  # Number of consecutive samples rendered by one call to POV-Ray
+  _nbBatch = 100
+  # Delay of each call to the fake POV-Ray, in seconds
+  _delay = 0.0
+  # Number of masks annotated by the bounding box benchmark
+  _nbBbox = 10000
+  # Path of the results file
+  _outFilePath = None
+
+  def __init__(self, args):
+    '''
+    Constructor
+    Inputs:
+      'args': the arguments passed to this script
+    '''
+    try:
+
+      # Process arguments
+      for iArg in range(len(args)):
+
+        # Help
+        if args[iArg] == "-help":
+          print("benchmark.py [-sizes <n,n,...>] [-dim <width>x<height>]" + \
+            " [-masks <nb>] [-jobs <nb>] [-batch <nb>] [-delay <s>]" + \
+            " [-bbox <nb>] [-out <file>] [-compare <file> <file>]" + \
+            " [-help]")
+          print("-sizes: number of samples of the data sets generated" + \
+            " end to end (default 1000,10000,100000)")
+          print("-dim: dimensions of the images (default 32x32)")
+          print("-masks: number of masks per sample (default 2)")
+          print("-jobs: number of samples rendered in parallel" + \
+            " (default number of cores)")
+          print("-batch: number of samples per call to POV-Ray" + \
+            " (default 100)")
+          print("-delay: delay of each call to the fake POV-Ray in" + \
+            " seconds (default 0)")
+          print("-bbox: number of masks annotated (default 10000)")
+          print("-out: file where the results are saved (default" + \
+            " Results/<date>.json)")
+          print("-compare: compare two results files")
+          quit()
+
+        # Sizes of the data sets
+        if args[iArg] == "-sizes":
+          self._sizes = [int(n) for n in args[iArg + 1].split(",")]
+
+        # Dimensions of the images
+        if args[iArg] == "-dim":
+          self._dim = [int(n) for n in args[iArg + 1].split("x")]
+
+        # Number of masks
+        if args[iArg] == "-masks":
+          self._nbMask = int(args[iArg + 1])
+
+        # Number of samples rendered in parallel
+        if args[iArg] == "-jobs":
+          self._nbJobs = int(args[iArg + 1])
+
+        # Number of samples per call to POV-Ray
+        if args[iArg] == "-batch":
+          self._nbBatch = int(args[iArg + 1])
+
+        # Delay of the fake POV-Ray
+        if args[iArg] == "-delay":
+          self._delay = float(args[iArg + 1])
+
+        # Number of masks annotated
+        if args[iArg] == "-bbox":
+          self._nbBbox = int(args[iArg + 1])
+
+        # Results file
+        if args[iArg] == "-out":
+          self._outFilePath = os.path.abspath(args[iArg + 1])
+
+        # Comparison of results files
+        if args[iArg] == "-compare":
+          self.Compare(args[iArg + 1], args[iArg + 2])
+          quit()
+
+    except Exception as exc:
+      PrintExc(exc)
+      quit()
+
+  def CreateDataSet(self, inFolder, nbSample):
+    '''
+    Create the pov file and template of a data set rendered by the fake
+    POV-Ray
+    Inputs:
+      'inFolder': the folder where the files are created
+      'nbSample': the number of samples of the data set
+    Output:
+      Return the full path to the template
+    '''
+    with open(os.path.join(inFolder, "dataset-001-001.pov"), "w") as fp:
+      fp.write("// Rendered by fakePovRay.py\n")
+    templateFilePath = os.path.join(inFolder, "dataset-001-001.json")
+    with open(templateFilePath, "w") as fp:
+      json.dump({"dataSetType":"1", "desc":"benchmark", \
+        "dim":{"_dim":"2", "_val":[str(d) for d in self._dim]}, \
+        "format":"png", "nbSample":str(nbSample), \
+        "nbMask":str(self._nbMask)}, fp)
+    return templateFilePath
+
+  def CreateFakePovRay(self, folder):
+    '''
+    Create the command running fakePovRay.py with this interpreter
+    Inputs:
+      'folder': the folder where the command is created
+    Output:
+      Return the full path to the command
+    '''
+    fakeFilePath = os.path.join(BASE_DIR, "fakePovRay.py")
+    if platform.system() == "Windows":
+      cmdFilePath = os.path.join(folder, "fakePovRay.cmd")
+      with open(cmdFilePath, "w") as fp:
+        fp.write('@"' + sys.executable + '" "' + fakeFilePath + '" %*\n')
+    else:
+      cmdFilePath = os.path.join(folder, "fakePovRay")
+      with open(cmdFilePath, "w") as fp:
+        fp.write('#!/bin/sh\nexec "' + sys.executable + '" "' + \
+          fakeFilePath + '" "$@"\n')
+      os.chmod(cmdFilePath, 0o755)
+    return cmdFilePath
+
+  def Time(self, name, nbItem, func):
+    '''
+    Time a benchmark and record its result
+    Inputs:
+      'name': the name of the benchmark
+      'nbItem': the number of items processed by the benchmark
+      'func': the function running the benchmark
+    '''
+    print(name + " ...", end = " ", flush = True)
+    startTime = time.perf_counter()
+    func()
+    duration = time.perf_counter() - startTime
+    self._results[name] = {"seconds":duration, "items":nbItem, \
+      "itemsPerSecond":nbItem / duration if duration > 0.0 else 0.0}
+    print("%.3f" % duration + "s (" + \
+      "%.1f" % self._results[name]["itemsPerSecond"] + " items/s)")
+
+  def RunGeneration(self, inFolder, outFolder, nbSample):
+    '''
+    Generate a data set end to end with DataSetGenerator.Run
+    Inputs:
+      'inFolder': the folder of the pov file and template
+      'outFolder': the folder where the data set is generated
+      'nbSample': the number of samples of the data set
+    '''
+    generator = DataSetGenerator(["benchmark.py", "-in", inFolder, \
+      "-out", outFolder, "-force", "-jobs", str(self._nbJobs), \
+      "-batch", str(self._nbBatch)])
+    with open(os.devnull, "w") as devnull:
+      with contextlib.redirect_stdout(devnull):
+        generator.Run()
+    descFilePath = os.path.join(outFolder, "001", "001", "dataset.json")
+    dataSet = DataSet(descFilePath)
+    if not dataSet.LoadDescFile(descFilePath) or \
+      len(dataSet._images) != nbSample:
+      raise ValueError("The generation of " + str(nbSample) + \
+        " samples has failed")
+
+  def RunBbox(self, dataSet, masks):
+    '''
+    Annotate masks
+    Inputs:
+      'dataSet': the DataSet of the masks
+      'masks': the list of masks as arrays of booleans
+    '''
+    for target in masks:
+      dataSet.AnnotateMask(target)
+
+  def RunManifest(self, dataSet, outFolder):
+    '''
+    Write the journal and the description file of a data set
+    Inputs:
+      'dataSet': the DataSet, with its samples
+      'outFolder': the folder where the files are written
+    '''
+    samples = dataSet._images
+    dataSet.OpenJournal(outFolder, "benchmark")
+    for sample in samples:
+      dataSet.AddSample(sample)
+    dataSet.CloseJournal()
+    with open(os.path.join(outFolder, "dataset.json"), "w") as fp:
+      fp.write(dataSet.GetDescFileContent())
+
+  def RunRead(self, dataSetFolder, batchSize):
+    '''
+    Read a data set as exampleUse.py does
+    Inputs:
+      'dataSetFolder': the folder of the data set
+      'batchSize': the size of the batches, None to read the samples
+        one by one
+    '''
+    reader = DataSetReader(dataSetFolder, batch_size = batchSize, \
+      shuffle = True, seed = 0)
+    for images, masks, bboxes in reader:
+      pass
+
+  def Run(self):
+    '''
+    Run the benchmarks and save their results
+    '''
+    try:
+      self._results = {}
+      folder = tempfile.mkdtemp(prefix = "sdsiaBenchmark")
+      try:
+
+        # Use the fake POV-Ray with the requested delay
+        generateDataSet.POVRAY_EXE = self.CreateFakePovRay(folder)
+        os.environ["FAKE_POVRAY_DELAY"] = str(self._delay)
+
+        # Generate data sets of each size end to end
+        readFolder = None
+        for nbSample in self._sizes:
+          inFolder = os.path.join(folder, "in" + str(nbSample))
+          outFolder = os.path.join(folder, "out" + str(nbSample))
+          os.makedirs(inFolder)
+          os.makedirs(outFolder)
+          self.CreateDataSet(inFolder, nbSample)
+          self.Time("run-" + str(nbSample), nbSample, \
+            lambda: self.RunGeneration(inFolder, outFolder, nbSample))
+          if readFolder is None:
+            readFolder = os.path.join(outFolder, "001", "001")
+
+        # Annotate random masks
+        dataSet = DataSet(self.CreateDataSet(folder, self._nbBbox))
+        rnd = numpy.random.RandomState(0)
+        masks = []
+        for iMask in range(self._nbBbox):
+          target = numpy.zeros((self._dim[1], self._dim[0]), dtype = bool)
+          x, y = rnd.randint(0, self._dim[0] // 2), \
+            rnd.randint(0, self._dim[1] // 2)
+          target[y:y + self._dim[1] // 3, x:x + self._dim[0] // 3] = True
+          masks.append(target)
+        self.Time("bbox", self._nbBbox, \
+          lambda: self.RunBbox(dataSet, masks))
+
+        # Write the manifest of the largest data set
+        nbSample = max(self._sizes)
+        sample = {"img":"img000.png", "mask":["mask000-000.png"] * \
+          self._nbMask, "bounding":[["0.5", "0.5", "0.1", "0.1"]] * \
+          self._nbMask, "area":["100"] * self._nbMask, \
+          "centroid":[["0.5", "0.5"]] * self._nbMask, \
+          "instances":[[["0.5", "0.5", "0.1", "0.1"]]] * self._nbMask}
+        dataSet._images = [dict(sample) for iSample in range(nbSample)]
+        manifestFolder = os.path.join(folder, "manifest")
+        os.makedirs(manifestFolder)
+        self.Time("manifest-" + str(nbSample), nbSample, \
+          lambda: self.RunManifest(dataSet, manifestFolder))
+
+        # Read the smallest data set
+        if readFolder is not None:
+          nbSample = min(self._sizes)
+          self.Time("read-" + str(nbSample), nbSample, \
+            lambda: self.RunRead(readFolder, None))
+          self.Time("readBatch-" + str(nbSample), nbSample, \
+            lambda: self.RunRead(readFolder, 32))
+
+      finally:
+        shutil.rmtree(folder, ignore_errors = True)
+
+      # Save the results
+      self.Save()
+
+    except Exception as exc:
+      PrintExc(exc)
+
+  def Save(self):
+    '''
+    Save the results with the settings and the version of the code
+    '''
+    if self._outFilePath is None:
+      resultsFolder = os.path.join(BASE_DIR, "Results")
+      if not os.path.exists(resultsFolder):
+        os.makedirs(resultsFolder)
+      self._outFilePath = os.path.join(resultsFolder, \
+        time.strftime("%Y%m%d-%H%M%S") + ".json")
+    try:
+      commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], \
+        stdout = subprocess.PIPE, stderr = subprocess.DEVNULL, \
+        cwd = BASE_DIR).stdout.decode("utf-8").strip()
+    except:
+      commit = ""
+    content = {"date":time.strftime("%Y-%m-%d %H:%M:%S"), \
+      "commit":commit, "python":platform.python_version(), \
+      "platform":platform.platform(), "cpuCount":os.cpu_count(), \
+      "settings":{"dim":self._dim, "nbMask":self._nbMask, \
+      "nbJobs":self._nbJobs, "nbBatch":self._nbBatch, \
+      "delay":self._delay}, "results":self._results}
+    with open(self._outFilePath, "w") as fp:
+      json.dump(content, fp, sort_keys = True, indent = 2)
+    print("Results saved in " + self._outFilePath)
+
+  def Compare(self, refFilePath, newFilePath):
+    '''
+    Display the comparison of two results files
+    Inputs:
+      'refFilePath': the path of the reference results
+      'newFilePath': the path of the new results
+    '''
+    with open(refFilePath, "r") as fp:
+      ref = json.load(fp)
+    with open(newFilePath, "r") as fp:
+      new = json.load(fp)
+    print("benchmark".ljust(20) + (ref["commit"] or "ref").rjust(12) + \
+      (new["commit"] or "new").rjust(12) + "ratio".rjust(10))
+    for name in sorted(set(ref["results"]) | set(new["results"])):
+      if name in ref["results"] and name in new["results"]:
+        refTime = ref["results"][name]["seconds"]
+        newTime = new["results"][name]["seconds"]
+        ratio = "%.2f" % (newTime / refTime) if refTime > 0.0 else "-"
+        print(name.ljust(20) + ("%.3f" % refTime).rjust(12) + \
+          ("%.3f" % newTime).rjust(12) + ratio.rjust(10))
+      else:
+        print(name.ljust(20) + "missing in one of the files".rjust(34))
+
+def Main():
+  '''
+  Main function
+  '''
+  try:
+
+    # Create the Benchmark and run it
+    benchmark = Benchmark(sys.argv)
+    benchmark.Run()
+
+  except Exception as exc:
+    PrintExc(exc)
+
+# Hook for the main function
+if __name__ == '__main__':
+  Main()
@@ -0,0 +1,146 @@
+# Fake POV-Ray executable used by the benchmark to measure the overhead
+# of generateDataSet.py without rendering anything. It accepts the
+# arguments used by generateDataSet.py, waits for the delay given (in
+# seconds) by the environment variable FAKE_POVRAY_DELAY, and writes
+# synthetic images, masks and label maps of the requested size and
+# format. Only the standard library is used to keep its start fast.
+
+# Import necessary modules
+import os, sys, re, time, random, struct, zlib
+
+# Number of targets drawn in the images
+NB_TARGET = 2
+
+# Function to get the box (x0, y0, x1, y1, excluded) of the i-th target
+# for a given clock
+def GetBox(clock, iTarget, width, height):
+  rnd = random.Random(int(clock) * 31 + iTarget)
+  w = max(1, width // 4)
+  h = max(1, height // 4)
+  x0 = rnd.randint(0, width - w)
+  y0 = rnd.randint(0, height - h)
+  return (x0, y0, x0 + w, y0 + h)
+
+# Function to create the pixels (rows of RGB bytes) of one frame
+def Render(clock, mask, width, height):
+  rnd = random.Random(int(clock))
+  background = bytes([rnd.randint(0, 255) for i in range(3)])
+  if mask == 0:
+    targets = range(NB_TARGET)
+  else:
+    background = b"\xff\xff\xff"
+    targets = range(7) if mask == -1 else [mask - 1]
+  rows = [bytearray(background * width) for y in range(height)]
+  for iTarget in targets:
+    x0, y0, x1, y1 = GetBox(clock, iTarget, width, height)
+    if mask == 0:
+      color = bytes([255 * (iTarget % 2), 0, 255 * (1 - iTarget % 2)])
+    elif mask == -1:
+      # Components at 0 for the bits set in the label, as dataset.pov
+      label = iTarget + 1
+      color = bytes([255 * (1 - ((label >> b) & 1)) for b in range(3)])
+    else:
+      color = b"\x00\x00\x00"
+    for y in range(y0, y1):
+      rows[y][3 * x0:3 * x1] = color * (x1 - x0)
+  return rows
+
+# Function to encode the pixels in png or tga format
+def Encode(rows, fileFormat, width, height):
+  if fileFormat == "png":
+    def Chunk(tag, data):
+      return struct.pack(">I", len(data)) + tag + data + \
+        struct.pack(">I", zlib.crc32(tag + data) & 0xffffffff)
+    raw = b"".join(b"\x00" + bytes(row) for row in rows)
+    return b"\x89PNG\r\n\x1a\n" + \
+      Chunk(b"IHDR", \
+        struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0)) + \
+      Chunk(b"IDAT", zlib.compress(raw, 1)) + Chunk(b"IEND", b"")
+  header = bytes([0, 0, 2, 0, 0, 0, 0, 0, 0, 0, 0, 0]) + \
+    struct.pack("<HH", width, height) + bytes([24, 0x20])
+  pixels = bytearray()
+  for row in rows:
+    bgr = bytearray(row)
+    bgr[0::3], bgr[2::3] = row[2::3], row[0::3]
+    pixels += bgr
+  return header + bytes(pixels)
+
+# Function to write an encoded frame to a file or the standard output
+def Write(filePath, data):
+  if filePath == "-":
+    sys.stdout.buffer.write(data)
+    sys.stdout.buffer.flush()
+  else:
+    with open(filePath, "wb") as fp:
+      fp.write(data)
+
+def Main():
+  '''
+  Main function
+  '''
+
+  # Process the arguments
+  outFilePath = None
+  width = 1
+  height = 1
+  clock = 0.0
+  mask = 0
+  fileFormat = "tga"
+  firstFrame = None
+  lastFrame = None
+  firstClock = 0.0
+  lastClock = 0.0
+  for arg in sys.argv[1:]:
+    if arg == "--version":
+      print("POV-Ray 3.7.0 (fakePovRay)")
+      return
+    elif arg.startswith("+O"):
+      outFilePath = arg[2:]
+    elif arg[0:2] in ["-W", "+W"]:
+      width = int(arg[2:])
+    elif arg[0:2] in ["-H", "+H"]:
+      height = int(arg[2:])
+    elif arg.startswith("+KFI"):
+      firstFrame = int(arg[4:])
+    elif arg.startswith("+KFF"):
+      lastFrame = int(arg[4:])
+    elif arg.startswith("+KI"):
+      firstClock = float(arg[3:])
+    elif arg.startswith("+KF"):
+      lastClock = float(arg[3:])
+    elif arg[0:2] in ["+k", "+K"]:
+      clock = float(arg[2:])
+    elif arg == "+FN":
+      fileFormat = "png"
+    elif arg == "+FC":
+      fileFormat = "tga"
+    elif arg.startswith("Declare=Mask="):
+      mask = int(arg[len("Declare=Mask="):])
+    elif arg.endswith(".ini") and os.path.exists(arg):
+      with open(arg, "r") as fp:
+        for line in fp:
+          match = re.match(r"Declare=Mask=(-?\d+)", line.strip())
+          if match:
+            mask = int(match.group(1))
+
+  # Simulate the render time
+  time.sleep(float(os.environ.get("FAKE_POVRAY_DELAY", "0")))
+
+  # Write the frames of an animation, numbered with as many digits as
+  # the last frame, or the single frame
+  if firstFrame is not None and lastFrame is not None and \
+    lastFrame > firstFrame:
+    base, ext = os.path.splitext(outFilePath)
+    for frame in range(firstFrame, lastFrame + 1):
+      frameClock = firstClock + (lastClock - firstClock) * \
+        (frame - firstFrame) / (lastFrame - firstFrame)
+      Write(base + str(frame).zfill(len(str(lastFrame))) + ext, \
+        Encode(Render(frameClock, mask, width, height), fileFormat, \
+        width, height))
+  else:
+    Write(outFilePath, Encode(Render(clock, mask, width, height), \
+      fileFormat, width, height))
+
+# Hook for the main function
+if __name__ == '__main__':
+  Main()
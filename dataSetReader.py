@@ -0,0 +1,415 @@
+# Import necessary modules
+import collections
+import concurrent.futures
+import json
+import os
+
+import cv2
+import numpy
+
+from generateDataSet import (DataSet, LazyDataSet, MASK_FORMATS, ReadImage,
+                             ReadManifest, ReadMask)
+
+
+class DataSetReader:
+    """
+    Reader of a data set generated by generateDataSet.py, yielding its
+    decoded samples one by one or by fixed size batches. The samples are
+    loaded and decoded ahead of their use by a pool of threads, and at
+    most 'prefetch' samples are held in memory, so data sets larger than
+    the RAM can be streamed.
+    Each sample is a tuple (image, masks, bboxes):
+      'image': the image as a H x W x 3 array of uint8, in RGB order
+      'masks': the masks as a nbMask x H x W array of uint8, the target
+        being the non white pixels
+      'bboxes': the bounding boxes of the masks in yolo format (relative
+        coordinates of the center, width, height) as a nbMask x 4 array
+        of float32, NaN if the mask has no target
+    Batches are the same tuple with an additional first dimension.
+    If the data set has been exported by 'generateDataSet.py -export',
+    the samples are read from the memory mapped arrays instead of being
+    decoded from the image files.
+    If the data set has been generated by 'generateDataSet.py -lazy',
+    the samples are rendered by a LazyDataSet the first time they are
+    read, the threads loading the samples ahead rendering them ahead.
+    close() stops its renderer, which is done at the end of a with
+    statement on the reader.
+    """
+
+    def __init__(self, data_set_folder_path, batch_size=None,
+                 shuffle=False, seed=None, nb_workers=4, prefetch=16,
+                 drop_last=False):
+        """
+        Constructor
+        Inputs:
+          'data_set_folder_path': full path to the folder containing the
+            data set
+          'batch_size': number of samples per batch, None to yield the
+            samples one by one
+          'shuffle': if True the samples are yielded in a random order,
+            different at each iteration
+          'seed': seed of the random order, for reproducible iterations
+          'nb_workers': number of threads loading the samples
+          'prefetch': maximum number of samples loaded ahead
+          'drop_last': if True the last batch is dropped when it's
+            smaller than 'batch_size'
+        """
+        self.folder = data_set_folder_path
+        self.batch_size = batch_size
+        self.shuffle = shuffle
+        self.nb_workers = max(1, nb_workers)
+        self.prefetch = max(1, prefetch)
+        self.drop_last = drop_last
+        self.random = numpy.random.RandomState(seed)
+
+        # Load and decode the content of the description file
+        desc_file_path = os.path.join(self.folder, "dataset.json")
+        with open(desc_file_path, "r") as fp:
+            self.desc = json.load(fp)
+        if "manifest" in self.desc:
+            self.samples = ReadManifest(
+                os.path.join(self.folder, self.desc["manifest"]))
+        else:
+            self.samples = self.desc["samples"]
+        self.nb_sample = len(self.samples)
+        self.nb_mask = int(self.desc["nbMask"])
+        self.width = int(self.desc["dim"]["_val"][0])
+        self.height = int(self.desc["dim"]["_val"][1])
+
+        # Open the lazy data set if the samples are rendered on access
+        self.lazy = None
+        if "lazy" in self.desc:
+            self.lazy = LazyDataSet(self.folder, self.nb_workers,
+                                    self.prefetch)
+            self.nb_sample = self.lazy.GetNbSample()
+
+        # Memory map the exported arrays if they exist
+        self.images = None
+        self.masks = None
+        images_file_path = os.path.join(self.folder, "images.npy")
+        masks_file_path = os.path.join(self.folder, "masks.npy")
+        if os.path.exists(images_file_path) and \
+                os.path.exists(masks_file_path):
+            self.images = numpy.load(images_file_path, mmap_mode="r")
+            self.masks = numpy.load(masks_file_path, mmap_mode="r")
+
+    def __len__(self):
+        """
+        Return the number of samples, or of batches if 'batch_size' is
+        not None
+        """
+        if self.batch_size is None:
+            return self.nb_sample
+        if self.drop_last:
+            return self.nb_sample // self.batch_size
+        return (self.nb_sample + self.batch_size - 1) // self.batch_size
+
+    def __getitem__(self, i_sample):
+        """
+        Return the sample of a given index, see load_sample()
+        """
+        return self.load_sample(i_sample)
+
+    def __iter__(self):
+        """
+        Iterate on the samples, or batches if 'batch_size' is not None
+        """
+        if self.batch_size is None:
+            return self.iter_samples()
+        return self.iter_batches()
+
+    def get_order(self):
+        """
+        Return the indices of the samples in the order of the iteration
+        """
+        if self.shuffle:
+            return self.random.permutation(self.nb_sample)
+        return numpy.arange(self.nb_sample)
+
+    def iter_samples(self):
+        """
+        Iterate on the samples, loading them ahead with the threads
+        """
+        order = self.get_order()
+        with concurrent.futures.ThreadPoolExecutor(
+                max_workers=self.nb_workers) as executor:
+            pending = collections.deque()
+            i_next = 0
+            while i_next < len(order) or len(pending) > 0:
+
+                # Keep up to 'prefetch' samples loading
+                while i_next < len(order) and len(pending) < self.prefetch:
+                    pending.append(executor.submit(
+                        self.load_sample, int(order[i_next])))
+                    i_next += 1
+
+                # Yield the oldest sample once loaded
+                yield pending.popleft().result()
+
+    def iter_batches(self):
+        """
+        Iterate on the batches of samples
+        """
+        batch = []
+        for sample in self.iter_samples():
+            batch.append(sample)
+            if len(batch) == self.batch_size:
+                yield self.make_batch(batch)
+                batch = []
+        if len(batch) > 0 and not self.drop_last:
+            yield self.make_batch(batch)
+
+    @staticmethod
+    def make_batch(samples):
+        """
+        Stack a list of samples into one batch
+        """
+        return tuple(numpy.stack(arrays) for arrays in zip(*samples))
+
+    def load_sample(self, i_sample):
+        """
+        Load and decode one sample
+        Inputs:
+          'i_sample': index of the sample in the description file
+        Output:
+          Return the tuple (image, masks, bboxes) of the sample
+        """
+        if self.lazy is not None:
+            sample = self.lazy.GetSample(i_sample)
+        else:
+            sample = self.samples[i_sample]
+
+        # Get the image and masks from the exported arrays, or decode
+        # them from their files
+        if self.images is not None:
+            image = numpy.array(self.images[i_sample])
+            masks = numpy.array(self.masks[i_sample])
+        else:
+            img_file_path = os.path.join(self.folder, sample["img"])
+            image = ReadImage(img_file_path)
+            if image is None:
+                raise IOError("Can't read the image {}"
+                              "".format(img_file_path))
+            image = numpy.ascontiguousarray(image[:, :, ::-1])
+            masks = numpy.empty((self.nb_mask, self.height, self.width),
+                                dtype=numpy.uint8)
+            for i_mask, mask_file_name in enumerate(sample["mask"]):
+                mask_file_path = os.path.join(self.folder, mask_file_name)
+                if os.path.splitext(mask_file_name)[1][1:] in MASK_FORMATS:
+                    target = ReadMask(mask_file_path)
+                    mask = None if target is None else \
+                        numpy.where(target, 0, 255).astype(numpy.uint8)
+                else:
+                    mask = ReadImage(mask_file_path, cv2.IMREAD_GRAYSCALE)
+                if mask is None:
+                    raise IOError("Can't read the mask {}"
+                                  "".format(mask_file_path))
+                masks[i_mask] = mask
+
+        # Get the bounding boxes
+        bboxes = numpy.full((self.nb_mask, 4), numpy.nan,
+                            dtype=numpy.float32)
+        for i_mask, bounding in enumerate(sample.get("bounding", [])):
+            if len(bounding) == 4:
+                bboxes[i_mask] = [float(v) for v in bounding]
+
+        return image, masks, bboxes
+
+    def prefetch_samples(self, indices):
+        """
+        Render ahead the samples of a lazy data set about to be read with
+        random accesses, at most 'prefetch' at a time (the iterations
+        already load their samples ahead)
+        Inputs:
+          'indices': the indices of the samples, in the order they will
+            be read
+        """
+        if self.lazy is not None:
+            self.lazy.Prefetch(indices)
+
+    def close(self):
+        """
+        Wait for the samples rendering ahead of a lazy data set and stop
+        its renderer
+        """
+        if self.lazy is not None:
+            self.lazy.Close()
+
+    def __enter__(self):
+        """
+        Return the reader, closed at the end of the with statement
+        """
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        """
+        Close the reader at the end of the with statement, see close()
+        """
+        self.close()
+
+
+class SampleIndex:
+    """
+    Typed columnar index of the annotations of a data set generated by
+    generateDataSet.py, to select samples by the size, position or area
+    of their targets without reading the images nor parsing the
+    description of each sample, for example for stratified or curriculum
+    sampling. The index is loaded from 'index.npz', saved by the
+    generation, or built from the description file if it doesn't exist.
+    The columns are numpy arrays with one row per sample:
+      'bounding': nb_sample x nb_mask x 4 float32, bounding boxes in yolo
+        format (relative coordinates of the center, width, height), NaN
+        if the mask has no target
+      'area': nb_sample x nb_mask int32, number of pixels of the targets
+      'coverage': nb_sample x nb_mask float32, fraction of the image
+        covered by the targets
+      'centroid': nb_sample x nb_mask x 2 float32, relative coordinates
+        of the centroids of the targets, NaN if the mask has no target
+      'nb_instance': nb_sample x nb_mask int32, number of connected
+        components of the targets
+      'nb_target': nb_sample int32, number of masks with a target
+      'offset': nb_sample int64, offset in bytes of the record of the
+        sample in the manifest, -1 if the samples are in the description
+        file
+    """
+
+    # Columns per mask which can be used to order or bin the samples
+    mask_columns = ["area", "coverage", "x", "y", "width", "height",
+                    "nb_instance"]
+
+    def __init__(self, data_set_folder_path):
+        """
+        Constructor
+        Inputs:
+          'data_set_folder_path': full path to the folder containing the
+            data set
+        """
+        self.folder = data_set_folder_path
+        desc_file_path = os.path.join(self.folder, "dataset.json")
+        index_file_path = os.path.join(self.folder, DataSet._indexFileName)
+        if os.path.exists(index_file_path):
+            with numpy.load(index_file_path) as npz:
+                index = {key: npz[key] for key in npz.files}
+        else:
+            data_set = DataSet(desc_file_path)
+            if not data_set.LoadDescFile(desc_file_path):
+                raise IOError("Can't load the description file {}"
+                              "".format(desc_file_path))
+            index = data_set.GetIndex(self.folder)
+        self.bounding = index["bounding"]
+        self.area = index["area"]
+        self.centroid = index["centroid"]
+        self.nb_instance = index["nbInstance"]
+        self.offset = index["offset"]
+        self.width, self.height = [int(v) for v in index["dim"]]
+        self.coverage = (self.area / float(self.width * self.height)) \
+            .astype(numpy.float32)
+        self.nb_target = numpy.count_nonzero(self.area, axis=1) \
+            .astype(numpy.int32)
+        self.manifest_file_path = os.path.join(self.folder,
+                                               DataSet._journalFileName)
+
+    def __len__(self):
+        """
+        Return the number of samples
+        """
+        return len(self.offset)
+
+    def get_column(self, name):
+        """
+        Get a column per mask of the index
+        Inputs:
+          'name': one of 'mask_columns', 'x' and 'y' being the relative
+            coordinates of the center of the bounding box, 'width' and
+            'height' its relative size
+        Output:
+          Return the column as a nb_sample x nb_mask array
+        """
+        boxes = {"x": 0, "y": 1, "width": 2, "height": 3}
+        if name in boxes:
+            return self.bounding[:, :, boxes[name]]
+        if name in ["area", "coverage", "nb_instance"]:
+            return getattr(self, name)
+        raise ValueError("Unknown column {}".format(name))
+
+    def select(self, mask=None, has_target=True, **ranges):
+        """
+        Select the samples whose annotations are in given ranges
+        Inputs:
+          'mask': index of the mask whose annotations are tested, None to
+            select the samples with at least one mask matching
+          'has_target': if True only the masks with a target match, if
+            False only the ones without target, if None both
+          'ranges': for each column of 'mask_columns', its range given as
+            a (min, max) tuple, a bound being included and None if there
+            is no bound, for example coverage=(None, 0.01) for the
+            targets covering less than 1% of the image
+        Output:
+          Return the sorted array of indices of the samples
+        """
+        match = numpy.ones(self.area.shape, dtype=bool)
+        if has_target is not None:
+            match &= (self.area > 0) == has_target
+        for name, (v_min, v_max) in ranges.items():
+            column = self.get_column(name)
+            if v_min is not None:
+                match &= column >= v_min
+            if v_max is not None:
+                match &= column <= v_max
+        if mask is None:
+            return numpy.flatnonzero(match.any(axis=1))
+        return numpy.flatnonzero(match[:, mask])
+
+    def order_by(self, name, mask=0, descending=False):
+        """
+        Order the samples by a column, for example from the largest to
+        the smallest target for a curriculum. The samples without target
+        are the last ones.
+        Inputs:
+          'name': one of 'mask_columns'
+          'mask': index of the mask
+          'descending': if True the samples are in descending order
+        Output:
+          Return the array of indices of the samples
+        """
+        column = self.get_column(name)[:, mask].astype(numpy.float64)
+        column = numpy.where(self.area[:, mask] > 0, column, numpy.nan)
+        if descending:
+            column = -column
+        return numpy.argsort(column, kind="stable")
+
+    def stratify(self, name, edges, mask=0):
+        """
+        Split the samples with a target into strata by a column, for
+        stratified sampling
+        Inputs:
+          'name': one of 'mask_columns'
+          'edges': the increasing edges of the strata, the i-th stratum
+            containing the values in [edges[i], edges[i + 1])
+          'mask': index of the mask
+        Output:
+          Return the list of arrays of indices of the samples per stratum
+        """
+        column = self.get_column(name)[:, mask]
+        has_target = self.area[:, mask] > 0
+        return [numpy.flatnonzero(has_target & (column >= edges[i]) &
+                                  (column < edges[i + 1]))
+                for i in range(len(edges) - 1)]
+
+    def read_record(self, i_sample):
+        """
+        Read the description of one sample from the manifest, without
+        parsing the other ones
+        Inputs:
+          'i_sample': the index of the sample
+        Output:
+          Return the description of the sample, as in the manifest
+        """
+        if self.offset[i_sample] < 0:
+            raise ValueError("The samples of {} are not in a manifest"
+                             "".format(self.folder))
+        with open(self.manifest_file_path, "rb") as fp:
+            fp.seek(int(self.offset[i_sample]))
+            record = json.loads(fp.readline().decode("utf-8"))
+        del record["index"]
+        return record
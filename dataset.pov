@@ -11,6 +11,17 @@
   pigment { color White }
 }
 
+// Texture used to create the label map (Mask = -1) for the target of 
+// the I-th mask (starting at 1)
+#macro _texMaskLabel(I)
+  texture {
+    pigment { 
+      color rgb <1 - mod(I, 2), 1 - mod(div(I, 2), 2), 
+        1 - mod(div(I, 4), 2)>
+    }
+  }
+#end
+
 // Random generator seed, based on the clock variable set by the 
 // SDSIA generator
 #declare RndSeed = seed(clock);
@@ -44,6 +55,9 @@ background { color rgb <1.0, 1.0, 1.0> }
 
   // Apply the real texture or the mask texture according to the 
   // Mask variable set by the SDSIA generator 
+  #if (Mask = -1)
+    _texMaskLabel(1)
+  #end
   #if (Mask = 0)
     pigment { color Red }
   #else 
@@ -67,6 +81,9 @@ background { color rgb <1.0, 1.0, 1.0> }
 
   // Apply the real texture or the mask texture according to the 
   // Mask variable set by the SDSIA generator 
+  #if (Mask = -1)
+    _texMaskLabel(2)
+  #end
   #if (Mask = 0)
     pigment { color Blue }
   #else 
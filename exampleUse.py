@@ -3,6 +3,8 @@ import json
 import os
 import sys
 
+from dataSetReader import DataSetReader
+
 # Base directory
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 
@@ -44,34 +46,17 @@ def main(data_set_folder_path):
         print("Dimension image (width, height): {}".format(data_set_desc["dim"]))
         print("Format image: {}".format(data_set_desc["format"]))
 
-        # Loop on the data set
-        for iSample in range(int(data_set_desc["nbSample"])):
-
-            # Get the path to the image and mask
-            img_file_name = data_set_desc["samples"][iSample]["img"]
-            mask_file_names = data_set_desc["samples"][iSample]["mask"]
-            img_file_path = os.path.join(data_set_folder_path, img_file_name)
-
-            # Check the full paths are valid
-            if not os.path.exists(img_file_path):
-                print("Description file corrupted. The image {} doesn't exists"
-                      "".format(img_file_path))
-                quit()
-
-            # Loop on masks
-            for maskFileName in mask_file_names:
-
-                # Check for the existence of the mask
-                mask_file_path = os.path.join(data_set_folder_path, maskFileName)
-                if not os.path.exists(mask_file_path):
-                    print("Description file corrupted. The mask {} doesn't exists"
-                          "".format(mask_file_path))
-                    quit()
-
-                # Train on the pair image-mask
-                # In the mask, the black pixels match the target and the white
-                # pixels match the non-target
-                print("Train on ({}, {})".format(img_file_path, mask_file_path))
+        # Loop on the data set, by batches of decoded samples loaded ahead
+        # by a pool of threads, in a random (but reproducible) order
+        with DataSetReader(data_set_folder_path, batch_size=2,
+                           shuffle=True, seed=0, nb_workers=4) as reader:
+            for images, masks, bboxes in reader:
+
+                # Train on the batch of images and masks
+                # In the masks, the non white pixels match the target and
+                # the white pixels match the non-target
+                print("Train on images {} and masks {}"
+                      "".format(images.shape, masks.shape))
 
     except Exception as exc:
         print_exc(exc)
@@ -1,17 +1,56 @@
 # Import necessary modules
-import os, sys, json, glob, subprocess, re, shutil, cv2, numpy, platform
+import os, sys, json, glob, subprocess, re, shutil, platform, importlib
+import concurrent.futures, threading, time, hashlib, queue, socket, uuid
+import contextlib
+try:
+  import resource
+except ImportError:
+  resource = None
+
+class LazyModule:
+  '''
+  Module imported on the first access to one of its attributes, to not
+  import cv2 and numpy when they are not needed (for example to list 
+  the data sets)
+  '''
+
+  def __init__(self, name):
+    '''
+    Constructor
+    Inputs:
+      'name': the name of the module
+    '''
+    self._name = name
+    self._module = None
+
+  def __getattr__(self, attr):
+    if self._module is None:
+      self._module = importlib.import_module(self._name)
+    return getattr(self._module, attr)
+
+cv2 = LazyModule("cv2")
+numpy = LazyModule("numpy")
+
+# Values of the flags of cv2.imread used as default arguments, which 
+# can't be taken from cv2 without importing it
+IMREAD_GRAYSCALE = 0
+IMREAD_COLOR = 1
 
 # Check the version of Python
 version = sys.version_info
-if str(version.major) + "." + str(version.minor) < "3.3":
+if (version.major, version.minor) < (3, 3):
   print("Sorry, require python version >= 3.3")
   quit()
   
 # Base directory
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 
-# Command line for the POV-Ray executable
-if platform.system() == "Linux":
+# Command line for the POV-Ray executable, which can be overridden by
+# the environment variable POVRAY_EXE (for example to use the fake 
+# renderer of the benchmark)
+if "POVRAY_EXE" in os.environ:
+  POVRAY_EXE = os.environ["POVRAY_EXE"]
+elif platform.system() == "Linux":
   POVRAY_EXE = "povray"
 elif platform.system() == "Windows":
   POVRAY_EXE = "pvengine.exe"
@@ -20,12 +59,52 @@ else:
     ")")
   quit()
 
-# Check that the POV-Ray executable is correctly found
-if not shutil.which(POVRAY_EXE):
-  print("Sorry, the command '" + POVRAY_EXE + \
-    "' couldn't be understood. Check your installation of POV-Ray " + \
-    "and/or update the value of POVRAY_EXE in " + __file__)
-  quit()
+# Function to check that the POV-Ray executable is correctly found,
+# called by PovRayRenderer.Check() when the data sets are rendered so
+# that the module can be imported (for example by dataSetReader.py) on
+# machines without POV-Ray
+def CheckPovRay():
+  if not shutil.which(POVRAY_EXE):
+    print("Sorry, the command '" + POVRAY_EXE + \
+      "' couldn't be understood. Check your installation of POV-Ray " + \
+      "and/or update the value of POVRAY_EXE in " + __file__)
+    quit()
+
+# Folders where POV-Ray looks for its standard include files
+POVRAY_INCLUDE_DIRS = glob.glob("/usr/share/povray*/include") + \
+  glob.glob("/usr/local/share/povray*/include") + \
+  glob.glob(os.path.join(os.path.expanduser("~"), "Documents", \
+  "POV-Ray", "v*", "include"))
+
+# Version of POV-Ray, obtained when first needed
+POVRAY_VERSION = None
+
+# Function to get the version of POV-Ray
+def GetPovRayVersion():
+  global POVRAY_VERSION
+  if POVRAY_VERSION is None:
+    POVRAY_VERSION = POVRAY_EXE
+    # pvengine.exe would open its window instead of printing its version
+    if platform.system() != "Windows":
+      try:
+        res = subprocess.run([POVRAY_EXE, "--version"], \
+          stdout = subprocess.PIPE, stderr = subprocess.STDOUT, \
+          stdin = subprocess.DEVNULL, timeout = 10)
+        lines = [l.strip() for l in \
+          res.stdout.decode("utf-8", "replace").splitlines() if l.strip()]
+        if len(lines) > 0:
+          POVRAY_VERSION = lines[0]
+      except:
+        pass
+  return POVRAY_VERSION
+
+# Function to get the CPU time used by the terminated child processes,
+# 0 if it's not available on this system
+def GetChildCpuTime():
+  if resource is None:
+    return 0.0
+  usage = resource.getrusage(resource.RUSAGE_CHILDREN)
+  return usage.ru_utime + usage.ru_stime
 
 # Function to print exceptions
 def PrintExc(exc):
@@ -33,6 +112,533 @@ def PrintExc(exc):
   fname = os.path.split(exc_tb.tb_frame.f_code.co_filename)[1]
   print(exc_type, fname, exc_tb.tb_lineno, str(exc))
 
+# Function to write an image (numpy array of shape height x width x 3, 
+# BGR order, or height x width for one channel) in the format given by 
+# the extension of its file, with the encoding parameters 'params' of 
+# cv2.imwrite. The tga format, not supported by cv2, is written as 
+# uncompressed true color (or grayscale), and the npy format as the raw
+# array
+def WriteImage(filePath, img, params = None):
+  if params is None:
+    params = []
+  if filePath.lower().endswith(".npy"):
+    numpy.save(filePath, numpy.ascontiguousarray(img, dtype = numpy.uint8))
+    return True
+  elif filePath.lower().endswith(".tga"):
+    gray = (img.ndim == 2)
+    header = bytes([0, 0, 3 if gray else 2, 0, 0, 0, 0, 0, 0, 0, 0, 0]) + \
+      int(img.shape[1]).to_bytes(2, "little") + \
+      int(img.shape[0]).to_bytes(2, "little") + \
+      bytes([8 if gray else 24, 0x20])
+    with open(filePath, "wb") as fp:
+      fp.write(header)
+      fp.write(numpy.ascontiguousarray(img, dtype = numpy.uint8).tobytes())
+    return True
+  else:
+    return cv2.imwrite(filePath, img, params)
+
+# Function to read an image in the format given by the extension of its
+# file. The tga format, not supported by cv2, is decoded here for true 
+# color and grayscale images, uncompressed or run-length encoded. Return
+# a numpy array of shape height x width x 3 (BGR order), or height x 
+# width if 'flag' is cv2.IMREAD_GRAYSCALE, or None if the image couldn't
+# be read. Images in npy format (raw arrays written by WriteImage) are 
+# converted to the requested number of channels.
+def ReadImage(filePath, flag = IMREAD_COLOR):
+  if filePath.lower().endswith(".npy"):
+    try:
+      img = numpy.load(filePath)
+    except:
+      return None
+    if flag == cv2.IMREAD_GRAYSCALE and img.ndim == 3:
+      img = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
+    elif flag != cv2.IMREAD_GRAYSCALE and img.ndim == 2:
+      img = cv2.cvtColor(img, cv2.COLOR_GRAY2BGR)
+    return img
+  if not filePath.lower().endswith(".tga"):
+    return cv2.imread(filePath, flag)
+  try:
+    with open(filePath, "rb") as fp:
+      data = fp.read()
+    imageType = data[2]
+    width = int.from_bytes(data[12:14], "little")
+    height = int.from_bytes(data[14:16], "little")
+    nbChannel = data[16] // 8
+    if data[1] != 0 or not imageType in [2, 3, 10, 11] or \
+      not nbChannel in [1, 3, 4]:
+      return None
+    pos = 18 + data[0]
+    nbByte = width * height * nbChannel
+    if imageType in [2, 3]:
+      pixels = data[pos:pos + nbByte]
+    else:
+      pixels = bytearray()
+      while len(pixels) < nbByte:
+        count = (data[pos] & 0x7f) + 1
+        if data[pos] & 0x80:
+          pixels += data[pos + 1:pos + 1 + nbChannel] * count
+          pos += 1 + nbChannel
+        else:
+          pixels += data[pos + 1:pos + 1 + count * nbChannel]
+          pos += 1 + count * nbChannel
+    img = numpy.frombuffer(bytes(pixels[:nbByte]), dtype = numpy.uint8)
+    img = img.reshape(height, width, nbChannel)
+    if not data[17] & 0x20:
+      img = img[::-1]
+    if data[17] & 0x10:
+      img = img[:, ::-1]
+    if nbChannel == 1:
+      img = numpy.repeat(img, 3, axis = 2)
+    img = img[:, :, 0:3].copy()
+    if flag == cv2.IMREAD_GRAYSCALE:
+      img = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
+    return img
+  except:
+    return None
+
+# Formats of the packed masks, and the magic number at the start of 
+# their files
+MASK_FORMATS = {"bits":b"SDSB", "rle":b"SDSR"}
+
+# Function to encode a mask (numpy array of booleans of shape height x
+# width, True for the target) in one of the packed formats: 'bits' 
+# stores one bit per pixel (numpy.packbits order), 'rle' stores the 
+# lengths of the alternating runs of non-target and target pixels in row
+# major order, starting with non-target, as uint32. Both start with a 
+# magic number and the width and height as uint32. Return the encoded 
+# mask as bytes
+def EncodeMask(target, maskFormat):
+  height, width = target.shape
+  header = MASK_FORMATS[maskFormat] + \
+    numpy.array([width, height], dtype = "<u4").tobytes()
+  flat = numpy.ascontiguousarray(target, dtype = bool).ravel()
+  if maskFormat == "bits":
+    return header + numpy.packbits(flat).tobytes()
+  bounds = numpy.flatnonzero(flat[1:] != flat[:-1]) + 1
+  runs = numpy.diff(numpy.concatenate(([0], bounds, [flat.size])))
+  if flat.size > 0 and flat[0]:
+    runs = numpy.concatenate(([0], runs))
+  return header + runs.astype("<u4").tobytes()
+
+# Function to decode a mask encoded by EncodeMask. Return a numpy array
+# of booleans of shape height x width, True for the target, or None if
+# the data isn't a packed mask
+def DecodeMask(data):
+  maskFormats = [f for f in MASK_FORMATS if MASK_FORMATS[f] == data[0:4]]
+  if len(maskFormats) == 0:
+    return None
+  width, height = [int(v) for v in numpy.frombuffer(data[4:12], "<u4")]
+  if maskFormats[0] == "bits":
+    flat = numpy.unpackbits(numpy.frombuffer(data[12:], numpy.uint8), \
+      count = width * height).astype(bool)
+  else:
+    runs = numpy.frombuffer(data[12:], "<u4")
+    values = numpy.arange(runs.size) % 2 == 1
+    flat = numpy.repeat(values, runs)
+  return flat.reshape(height, width)
+
+# Function to read a mask, packed or saved as an image. Return a numpy
+# array of booleans of shape height x width, True for the target (the
+# non white pixels of an image), or None if the mask couldn't be read
+def ReadMask(filePath):
+  ext = os.path.splitext(filePath)[1][1:]
+  if ext in MASK_FORMATS:
+    try:
+      with open(filePath, "rb") as fp:
+        return DecodeMask(fp.read())
+    except:
+      return None
+  imgMask = ReadImage(filePath, cv2.IMREAD_GRAYSCALE)
+  if imgMask is None:
+    return None
+  return imgMask != 255
+
+# Function to read the samples recorded in a manifest (the journal of a
+# completed generation), one JSON record per line after a header line.
+# Return the list of descriptions of the samples, in their order
+def ReadManifest(filePath):
+  samples = []
+  with open(filePath, "r") as fp:
+    fp.readline()
+    for line in fp:
+      record = json.loads(line)
+      if record.pop("index") != len(samples):
+        raise ValueError("Sample " + str(len(samples)).zfill(3) + \
+          " missing in " + filePath)
+      samples.append(record)
+  return samples
+
+class Renderer:
+  '''
+  Interface of the renderers creating the images, masks and label maps
+  of the data sets. A renderer can keep long-lived workers between its
+  Start() and Stop() instead of starting one process per file.
+  '''
+
+  def Check(self):
+    '''
+    Check that the renderer can be used, quit with a message else
+    '''
+    pass
+
+  def Start(self, nbJobs = 1):
+    '''
+    Start the workers of the renderer
+    Inputs:
+      'nbJobs': the number of files which will be rendered in parallel
+    '''
+    pass
+
+  def Stop(self):
+    '''
+    Stop the workers of the renderer
+    '''
+    pass
+
+  def GetVersion(self):
+    '''
+    Get the version of the renderer, part of the fingerprint of the
+    data sets
+    Output:
+      Return the version as a string
+    '''
+    return ""
+
+  def GetVersionStamp(self):
+    '''
+    Get a stamp which changes when the version of the renderer may have
+    changed, cheaper to get than the version itself
+    Output:
+      Return the stamp as a string
+    '''
+    return self.GetVersion()
+
+  def Render(self, scenePath, outFolder, iStart, iEnd, iMask, dim, \
+    options, fileFormat, outFileNames):
+    '''
+    Render the images or one of the masks of a range of consecutive
+    samples
+    Inputs:
+      'scenePath': the full path to the pov file of the scene
+      'outFolder': the full path of the folder where the files are output
+      'iStart': the index of the first sample, used as the seed of the
+        random generator of the scene through the clock variable
+      'iEnd': the index of the sample after the last one
+      'iMask': 0 for the images, i + 1 for the i-th mask, -1 for the
+        label maps, passed to the scene through the Mask variable
+      'dim': the dimensions of the files [width, height], as strings
+      'options': the quality options of POV-Ray for this kind of file
+      'fileFormat': the format of the files, "png" or "tga"
+      'outFileNames': the names of the files of the samples in the
+        output folder
+    Output:
+      Return a dictionary of the durations reported by the renderer
+      (possibly empty), or None if the rendering has failed
+    '''
+    pass
+
+  def Capture(self, scenePath, outFolder, iRender, iMask, dim, options, \
+    flag = IMREAD_COLOR):
+    '''
+    Render the image or one of the masks of one sample into memory. By
+    default the file is rendered in png in the output folder and read
+    back, the renderers which can do better override this method.
+    Inputs:
+      'scenePath': the full path to the pov file of the scene
+      'outFolder': the full path of the folder where the files are output
+      'iRender': the index of the sample
+      'iMask': 0 for the image, i + 1 for the i-th mask, -1 for the
+        label map
+      'dim': the dimensions of the file [width, height], as strings
+      'options': the quality options of POV-Ray for this kind of file
+      'flag': cv2.IMREAD_COLOR or cv2.IMREAD_GRAYSCALE, as for ReadImage
+    Output:
+      Return the tuple (image, durations), the image being decoded as by
+      ReadImage and the durations as returned by Render(), or 
+      (None, None) if the rendering has failed
+    '''
+    fileName = "capture" + str(iRender).zfill(3) + "-" + \
+      str(iMask).zfill(3) + ".png"
+    filePath = os.path.join(outFolder, fileName)
+    stats = self.Render(scenePath, outFolder, iRender, iRender + 1, \
+      iMask, dim, options, "png", [fileName])
+    img = ReadImage(filePath, flag) if stats is not None else None
+    if os.path.exists(filePath):
+      os.remove(filePath)
+    if img is None:
+      return (None, None)
+    return (img, stats)
+
+class PovRayRenderer(Renderer):
+  '''
+  Renderer calling the POV-Ray executable POVRAY_EXE. POV-Ray can't keep
+  a parsed scene between calls, so each call starts one process, which
+  renders several samples as the frames of an animation, the clock
+  variable of each frame being the index of its sample.
+  '''
+
+  def Check(self):
+    CheckPovRay()
+
+  def GetVersion(self):
+    return GetPovRayVersion()
+
+  def GetVersionStamp(self):
+    exePath = shutil.which(POVRAY_EXE)
+    try:
+      stat = os.stat(exePath)
+      return exePath + " " + str(stat.st_mtime_ns) + " " + \
+        str(stat.st_size)
+    except:
+      return POVRAY_EXE
+
+  def GetCommand(self, scenePath, outFileName, iStart, iEnd, dim, \
+    options, fileFormat, settings):
+    '''
+    Create the command calling POV-Ray
+    Inputs:
+      'scenePath': the full path to the pov file of the scene
+      'outFileName': the name of the output file, '-' for the standard
+        output
+      'iStart', 'iEnd', 'dim', 'options', 'fileFormat': as for Render()
+      'settings': the ini file or ini settings declaring the variables
+        of the scene
+    Output:
+      Return the command as a list of arguments
+    '''
+    cmd = []
+    cmd.append(POVRAY_EXE)
+    cmd.append("+O" + outFileName)
+    cmd.append("-W" + dim[0])
+    cmd.append("-H" + dim[1])
+    cmd.extend(options)
+    if iEnd - iStart == 1:
+      cmd.append("+k" + str(iStart))
+    else:
+      # Frames are numbered from iStart + 1 and the clock goes from
+      # iStart to iEnd - 1, so the clock of each frame is the index of
+      # its sample
+      cmd.append("+KFI" + str(iStart + 1))
+      cmd.append("+KFF" + str(iEnd))
+      cmd.append("+KI" + str(iStart))
+      cmd.append("+KF" + str(iEnd - 1))
+    if fileFormat == "png":
+      cmd.append("+FN")
+    else:
+      cmd.append("+FC")
+    cmd.append("+I" + scenePath)
+    cmd.append(settings)
+    # Avoid statying blocked on the terminal displaying info
+    # when running on windows
+    if platform.system() == "Windows":
+      cmd.append("/EXIT")
+    return cmd
+
+  def GetStats(self, text):
+    '''
+    Get the parse and trace times from the statistics printed by POV-Ray
+    Inputs:
+      'text': the messages printed by POV-Ray on the error output
+    Output:
+      Return a dictionary of the durations, possibly empty
+    '''
+    stats = {}
+    for phase in ["Parse", "Trace"]:
+      times = re.findall(phase + \
+        r" Time:.*?\(\s*([0-9.]+) seconds\)", text)
+      if len(times) > 0:
+        stats[phase.lower()] = sum(float(t) for t in times)
+    return stats
+
+  def Render(self, scenePath, outFolder, iStart, iEnd, iMask, dim, \
+    options, fileFormat, outFileNames):
+    try:
+
+      # Create the full path to the ini file used to render
+      # Each call has its own ini file to allow parallel rendering
+      iStartPadded = str(iStart).zfill(3)
+      iMaskPadded = str(iMask).zfill(3)
+      iniFilePath = os.path.join(outFolder, \
+        "pov" + iStartPadded + "-" + iMaskPadded + ".ini")
+
+      # Create the name of the output file, the frames of an animation
+      # get their frame number appended by POV-Ray
+      nbFrame = iEnd - iStart
+      if nbFrame == 1:
+        outFileName = outFileNames[0]
+      else:
+        outFileName = "frame" + iStartPadded + "-" + iMaskPadded + \
+          "-." + fileFormat
+
+      # Create the command to render the files
+      cmd = self.GetCommand(scenePath, outFileName, iStart, iEnd, dim, \
+        options, fileFormat, iniFilePath)
+
+      # Create the ini file used to render
+      with open(iniFilePath, "w") as fp:
+        fp.write("Declare=Mask=" + str(iMask))
+
+      # Render the files silently, keeping the statistics printed by
+      # POV-Ray to get its parse and trace times
+      res = subprocess.run(cmd, stdout = subprocess.DEVNULL, \
+        stderr = subprocess.PIPE, cwd = outFolder)
+      stats = self.GetStats(res.stderr.decode("utf-8", "replace"))
+
+      # Remove the ini file
+      os.remove(iniFilePath)
+
+      # If the files have been rendered as an animation, rename the
+      # frames according to their sample
+      if nbFrame > 1:
+        prefix = outFileName[0:-(len(fileFormat) + 1)]
+        for frameFilePath in glob.glob(os.path.join(outFolder, \
+          prefix + "*." + fileFormat)):
+          frameFileName = os.path.basename(frameFilePath)
+          frame = frameFileName[len(prefix):-(len(fileFormat) + 1)]
+          if frame.isdigit() and iStart < int(frame) <= iEnd:
+            os.replace(frameFilePath, os.path.join(outFolder, \
+              outFileNames[int(frame) - 1 - iStart]))
+
+      # Return the statistics
+      return stats
+
+    except Exception as exc:
+      PrintExc(exc)
+      return None
+
+  def Capture(self, scenePath, outFolder, iRender, iMask, dim, options, \
+    flag = IMREAD_COLOR):
+    try:
+
+      # Render the file in png on the standard output of POV-Ray, the
+      # Mask variable being declared on the command line instead of in
+      # an ini file, so nothing is written in the output folder
+      cmd = self.GetCommand(scenePath, "-", iRender, iRender + 1, dim, \
+        options, "png", "Declare=Mask=" + str(iMask))
+      res = subprocess.run(cmd, stdout = subprocess.PIPE, \
+        stderr = subprocess.PIPE, cwd = outFolder)
+      stats = self.GetStats(res.stderr.decode("utf-8", "replace"))
+
+      # Decode the file from the captured output
+      if len(res.stdout) == 0:
+        return (None, None)
+      img = cv2.imdecode(numpy.frombuffer(res.stdout, \
+        dtype = numpy.uint8), flag)
+      if img is None:
+        return (None, None)
+      return (img, stats)
+
+    except Exception as exc:
+      PrintExc(exc)
+      return (None, None)
+
+# Scenes loaded by the workers of NumPyRenderer, per path
+NUMPY_SCENES = {}
+
+# Function rendering one file for NumPyRenderer, in its worker process
+# or in the calling one, and writing it to 'outFilePath'
+def RenderNumPyFile(scenePath, outFilePath, clock, iMask, width, height):
+  try:
+    img = DrawNumPyFile(scenePath, clock, iMask, width, height)
+    return WriteImage(outFilePath, img)
+  except Exception as exc:
+    PrintExc(exc)
+    return False
+
+# Function drawing one file for NumPyRenderer, returned as a numpy array
+# of shape height x width x 3 (BGR order). The scene is the hash of the
+# content of the pov file, loaded once per worker, which seeds the 
+# random position of one box per possible mask, each box in its own 
+# horizontal band so that the masks split from a label map match the 
+# ones rendered separately
+def DrawNumPyFile(scenePath, clock, iMask, width, height):
+  if not scenePath in NUMPY_SCENES:
+    with open(scenePath, "rb") as fp:
+      NUMPY_SCENES[scenePath] = \
+        int(hashlib.sha256(fp.read()).hexdigest()[0:8], 16)
+  rnd = numpy.random.RandomState((NUMPY_SCENES[scenePath] + \
+    int(clock)) % (2 ** 32))
+  if iMask == 0:
+    img = numpy.empty((height, width, 3), dtype = numpy.uint8)
+    img[:, :] = rnd.randint(0, 256, 3)
+  else:
+    img = numpy.full((height, width, 3), 255, dtype = numpy.uint8)
+  nbTarget = DataSet._nbMaxLabel
+  for iTarget in range(nbTarget):
+    y0 = height * iTarget // nbTarget
+    y1 = height * (iTarget + 1) // nbTarget
+    x0 = rnd.randint(0, max(1, width // 2))
+    x1 = x0 + max(1, width // 3)
+    color = rnd.randint(0, 256, 3)
+    if iMask == 0:
+      img[y0:y1, x0:x1] = color
+    elif iMask == -1:
+      # Components at 0 for the bits set in the label, in BGR order
+      img[y0:y1, x0:x1] = [255 * (1 - (((iTarget + 1) >> b) & 1)) \
+        for b in [2, 1, 0]]
+    elif iMask == iTarget + 1:
+      img[y0:y1, x0:x1] = 0
+  return img
+
+class NumPyRenderer(Renderer):
+  '''
+  Renderer drawing synthetic images and masks with NumPy, without
+  POV-Ray, to test the generation. When several files are rendered in
+  parallel, they are rendered by a pool of long-lived worker processes
+  which keep the scenes they have loaded.
+  '''
+  # Version of the renderer
+  _version = "NumPyRenderer 1"
+
+  def __init__(self):
+    '''
+    Constructor
+    '''
+    self._executor = None
+
+  def Start(self, nbJobs = 1):
+    if nbJobs > 1:
+      self._executor = concurrent.futures.ProcessPoolExecutor( \
+        max_workers = nbJobs)
+
+  def Stop(self):
+    if self._executor is not None:
+      self._executor.shutdown()
+      self._executor = None
+
+  def GetVersion(self):
+    return self._version
+
+  def Render(self, scenePath, outFolder, iStart, iEnd, iMask, dim, \
+    options, fileFormat, outFileNames):
+    args = [(scenePath, os.path.join(outFolder, outFileNames[i]), \
+      iStart + i, iMask, int(dim[0]), int(dim[1])) \
+      for i in range(iEnd - iStart)]
+    if self._executor is not None:
+      futures = [self._executor.submit(RenderNumPyFile, *a) \
+        for a in args]
+      results = [f.result() for f in futures]
+    else:
+      results = [RenderNumPyFile(*a) for a in args]
+    if not all(results):
+      return None
+    return {}
+
+  def Capture(self, scenePath, outFolder, iRender, iMask, dim, options, \
+    flag = IMREAD_COLOR):
+    try:
+      args = (scenePath, iRender, iMask, int(dim[0]), int(dim[1]))
+      if self._executor is not None:
+        img = self._executor.submit(DrawNumPyFile, *args).result()
+      else:
+        img = DrawNumPyFile(*args)
+      if flag == cv2.IMREAD_GRAYSCALE:
+        img = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
+      return (img, {})
+    except Exception as exc:
+      PrintExc(exc)
+      return (None, None)
+
 class DataSet:
   '''
   Class containing the information about a dataSet
@@ -51,6 +657,53 @@ class DataSet:
   _format = "tga"
   # List of images and their masks
   _images = []
+  # Flag to memorize if the masks are split from one label map
+  _labelMap = "0"
+  # Maximum number of masks which can be encoded in one label map
+  _nbMaxLabel = 7
+  # Format of the masks, "image" to keep them in the format of the 
+  # images, or one of the packed formats of MASK_FORMATS
+  _maskFormat = "image"
+  # Information needed to render the samples of a data set generated
+  # with -lazy when they are accessed (folder of the pov file and 
+  # renderer), None if the samples are rendered by the generation
+  _lazy = None
+  # Statistics of the pixels of the data set, see DataSetStats.GetDesc()
+  _stats = None
+  # Options of POV-Ray used to render the images, the masks and the 
+  # label maps
+  _imageOptions = ["-D", "-P", "-Q9", "+A"]
+  _maskOptions = ["-D", "-P", "-Q0", "+A"]
+  _labelOptions = ["-D", "-P", "-Q0", "-A"]
+  # Name of the file where the render time of each file is recorded
+  _renderTimesFileName = "renderTimes.json"
+  # Name of the journal where the samples are recorded as soon as they 
+  # are rendered, which becomes the manifest of the samples referenced
+  # by the description file once they are all rendered
+  _journalFileName = "samples.jsonl"
+  # Flag to memorize if the samples are written in the description file
+  # instead of the manifest, as by the previous versions
+  _legacyDesc = False
+  # Flag to memorize if the files are captured into memory from the 
+  # renderer, annotated and then written, instead of being written by 
+  # the renderer and read back
+  _capture = False
+  # Format and encoding parameters of cv2.imwrite of the images and 
+  # masks written in capture mode, None to write them in the format of
+  # the data set
+  _encoding = None
+  # Lock to avoid mixing the messages of parallel renderings
+  _logLock = threading.Lock()
+  # Names of the files where the images and masks are exported as 
+  # arrays, and of their header
+  _imagesTensorFileName = "images.npy"
+  _masksTensorFileName = "masks.npy"
+  _tensorsHeaderFileName = "tensors.json"
+  # Name of the file where the typed columnar index of the annotations
+  # is saved
+  _indexFileName = "index.npz"
+  # Formats into which the images and masks can be transcoded
+  _transcodeFormats = ["png", "webp", "npy"]
 
   def __init__(self, templateFilePath):
     '''
@@ -59,6 +712,31 @@ class DataSet:
       'templateFilePath': full path to the template of the description
         file for this data set
     '''
+    
+    # Init the render time of each rendered file
+    self._renderTimes = {}
+
+    # Init the files captured into memory, per sample and iMask
+    self._captured = {}
+    self._capturedLock = threading.Lock()
+    
+    # Init the journal of rendered samples, and the number of samples
+    # added to the result list. The samples recorded in the journal are
+    # not kept in memory.
+    self._journal = None
+    self._nbSampleAdded = 0
+    
+    # Init the render cache
+    self._cache = None
+    self._fingerprint = ""
+    
+    # Init the profiler
+    self._profiler = None
+    self._profileKey = ""
+
+    # Init the renderer
+    self._renderer = PovRayRenderer()
+    
     try:
       
       # Load and decode the template file
@@ -76,16 +754,29 @@ class DataSet:
       self._dim = dataSetDesc["dim"]
       self._format = dataSetDesc["format"]
       self._nbMask = dataSetDesc["nbMask"]
+      if "labelMap" in dataSetDesc:
+        self._labelMap = dataSetDesc["labelMap"]
+      if "maskFormat" in dataSetDesc:
+        self._maskFormat = dataSetDesc["maskFormat"]
+        if self._maskFormat != "image" and \
+          not self._maskFormat in MASK_FORMATS:
+          raise ValueError("Unknown mask format " + self._maskFormat)
+      if "lazy" in dataSetDesc:
+        self._lazy = dataSetDesc["lazy"]
+      if "stats" in dataSetDesc:
+        self._stats = dataSetDesc["stats"]
       
     except Exception as exc:
       PrintExc(exc)
 
-  def GetDescFileContent(self):
+  def GetDescFileContent(self, extra = None):
     '''
     Create the content of the file describing a DataSet
     Input:
       'self': the dataSet for which we want to create the description 
         file
+      'extra': additional fields of the content, or None if there are
+        none
     Output:
       Return the content of the file describing the DataSet as a string
       in JSON format
@@ -105,8 +796,21 @@ class DataSet:
       content["nbSample"] = self._nbSample
       content["dim"] = self._dim
       content["format"] = self._format
-      content["samples"] = self._images
+      if self._legacyDesc or self._lazy is not None:
+        content["samples"] = self._images
+      else:
+        content["manifest"] = self._journalFileName
       content["nbMask"] = self._nbMask
+      if self._labelMap == "1":
+        content["labelMap"] = self._labelMap
+      if self._maskFormat != "image":
+        content["maskFormat"] = self._maskFormat
+      if self._lazy is not None:
+        content["lazy"] = self._lazy
+      if self._stats is not None:
+        content["stats"] = self._stats
+      if extra is not None:
+        content.update(extra)
 
       # Encode the content to JSON format and return it
       ret = json.dumps(content, \
@@ -117,135 +821,84 @@ class DataSet:
     finally:
       return ret
 
-  def Render(self, inFolder, outFolder):
+  def Render(self, inFolder, outFolder, nbJobs = 1, nbBatch = 1, \
+    iFirst = 0, queueSize = 0, iLast = None):
     '''
     Render (create images and masks) the DataSet
     Inputs:
       'inFolder': the full path to the folder where the pov file is
       'outFolder': the full path of the folder where images and masks
         are output
+      'nbJobs': the number of samples rendered in parallel
+      'nbBatch': the number of consecutive samples rendered by one call
+        to POV-Ray
+      'iFirst': the index of the first sample to render, the previous 
+        ones being already in the result list
+      'queueSize': if greater than 0, the samples are rendered by 
+        RenderPipeline() with queues of this size
+      'iLast': the index of the last sample to render plus one, None
+        to render up to the last sample of the data set
     '''
     try:
       
-      # Flush the result list
-      self._images = []
+      # Flush the result list of the samples to render
+      self._images = self._images[0:iFirst]
       
-      # Loop on the number of images to be rendered
-      for iRender in range(int(self._nbSample)):
-        
-        # Create the file name of the image
-        iRenderPadded = str(iRender).zfill(3)
-        imgFileName = "img" + iRenderPadded + "." + self._format
-
-        # Create the full path of the image
-        imgFilePath = os.path.join(outFolder, imgFileName)
-        
-        # Create the full path to the pov file
-        povFilePath = os.path.join(inFolder, self._name + ".pov")
-        
-        # Create the full path to the ini file used to render
-        iniFilePath = os.path.join(outFolder, "pov.ini")
-        
-        # Create the command to render the image
-        cmd = []
-        cmd.append(POVRAY_EXE)
-        cmd.append("+O" + imgFileName)
-        cmd.append("-W" + self._dim["_val"][0])
-        cmd.append("-H" + self._dim["_val"][1])
-        cmd.append("-D")
-        cmd.append("-P")
-        cmd.append("-Q9")
-        cmd.append("+A")
-        cmd.append("+k" + str(iRender))
-        if self._format == "png":
-          povFormat = "+FN"
-        elif self._format == "tga":
-          povFormat = "+FC"
-        else:
-          print("Unsupported format: " + self._format)
-          return False
-        cmd.append(povFormat)
-        cmd.append("+I" + povFilePath)
-        cmd.append(iniFilePath)
-        # Avoid statying blocked on the terminal displaying info
-        # when running on windows
-        if platform.system() == "Windows":
-          cmd.append("/EXIT")
-
-        # Create the ini file used to render
-        with open(iniFilePath, "w") as fp:
-          fp.write("Declare=Mask=0")
-
-        # Render the image silently
-        imgPath =  os.path.join(outFolder, \
-          "img" + iRenderPadded + "." + self._format)
-        print(iRenderPadded + "/" + self._nbSample.zfill(3) + \
-          " Rendering image " + imgPath + " ...")
-        FNULL = open(os.devnull, 'w')
-        subprocess.call(cmd, stderr = FNULL, cwd = outFolder)
+      # Split the samples into ranges of consecutive samples rendered
+      # together
+      nbRender = int(self._nbSample)
+      if iLast is not None:
+        nbRender = min(nbRender, iLast)
+      nbBatch = max(1, nbBatch)
+      ranges = [(iStart, min(iStart + nbBatch, nbRender)) \
+        for iStart in range(iFirst, nbRender, nbBatch)]
+      
+      # If the samples are rendered by a pipeline
+      if queueSize > 0:
+        return self.RenderPipeline(inFolder, outFolder, ranges, nbJobs, \
+          queueSize)
+      
+      # If the samples are rendered one after the other
+      elif nbJobs <= 1:
         
-        # Check if the image has been created
-        if not os.path.exists(imgPath):
-          return False
-
-        # Loop on masks
-        maskFileNames = []
-        maskBoundingBoxes = []
-        for iMask in range(int(self._nbMask)):
-          iMaskPadded = str(iMask).zfill(3)
-          maskFileName = "mask" + iRenderPadded + "-" + iMaskPadded + \
-            "." + self._format
-          maskFilePath = os.path.join(outFolder, maskFileName)
-
-          # Update the command and the ini file to render the mask
-          cmd[1] = "+O" + maskFileName
-          cmd[6] = "-Q0"
-
-          with open(iniFilePath, "w") as fp:
-            fp.write("Declare=Mask=" + str(iMask + 1))
+        # Loop on the ranges of images to be rendered
+        for (iStart, iEnd) in ranges:
           
-          # Render the mask silently
-          print("        Rendering mask " + maskFilePath + " ...");
-          subprocess.call(cmd, stderr = FNULL, cwd = outFolder)
-
-          # Check if the mask has been created
-          if not os.path.exists(maskFilePath):
+          # Render the samples and add them to the list
+          samples = self.RenderRange(inFolder, outFolder, iStart, iEnd)
+          if samples is None:
             return False
-          
-          # Load the mask
-          imgMask = cv2.imread(maskFilePath, cv2.IMREAD_GRAYSCALE)
+          for sample in samples:
+            self.AddSample(sample)
 
-          # If we could load the mask
-          if not imgMask is None:
+      # Else, the samples are spread over a pool of workers
+      else:
 
-            # Get the bounding coordinates of the mask
-            yMax, xMax = numpy.max(numpy.where(imgMask != 255), 1)
-            yMin, xMin = numpy.min(numpy.where(imgMask != 255), 1)
-            
-            # Convert the bounding coordinates into yolo format
-            xRelCenter = \
-              0.5 * (xMax + xMin) / float(self._dim["_val"][0])
-            yRelCenter = \
-              0.5 * (yMax + yMin) / float(self._dim["_val"][1])
-            widthRel = (xMax - xMin + 1) / float(self._dim["_val"][0])
-            heightRel = (yMax - yMin + 1) / float(self._dim["_val"][1])
-            maskBoundingBox = \
-              [str(xRelCenter), str(yRelCenter), \
-              str(widthRel), str(heightRel)]
-
-            # Add the bounding box
-            maskBoundingBoxes.append(maskBoundingBox)
-            
-          # Add the mask's name to the array of names
-          maskFileNames.append(maskFileName)
+        # Each worker calls POV-Ray in its own child process, so threads
+        # are enough to keep all the cores busy. The messages of each
+        # range are buffered and printed in the order of the samples to
+        # keep the output identical to the sequential rendering
+        logs = [[] for r in ranges]
+        with concurrent.futures.ThreadPoolExecutor( \
+          max_workers = nbJobs) as executor:
+          futures = [executor.submit(self.RenderRange, inFolder, \
+            outFolder, ranges[iRange][0], ranges[iRange][1], \
+            logs[iRange]) for iRange in range(len(ranges))]
           
-        # Remove the ini file
-        os.remove(iniFilePath)
-        
-        # Add the image and mask to the list
-        self._images.append( \
-          {"img":imgFileName, "mask":maskFileNames, \
-          "bounding":maskBoundingBoxes})
+          # Collect the samples in their order
+          for iRange in range(len(ranges)):
+            samples = futures[iRange].result()
+            for msg in logs[iRange]:
+              print(msg)
+            
+            # If the samples couldn't be rendered, cancel the pending
+            # samples and give up
+            if samples is None:
+              for future in futures:
+                future.cancel()
+              return False
+            for sample in samples:
+              self.AddSample(sample)
       
       # Return the success flag
       return True
@@ -254,362 +907,4755 @@ class DataSet:
       PrintExc(exc)
       return False
 
-class DataSetGenerator:
-  '''
-  Class to generate the data sets
-  '''
-  # Folder containing the POV files
-  # Only files matching dataSet-[0-9][0-9][0-9]-[0-9][0-9][0-9].pov are
-  # processed
-  _povFolder = os.path.join(BASE_DIR, "POV")
-  # Folder containing the data sets
-  _dataSetFolder = os.path.join(BASE_DIR, "DataSets")
-  # Flag to memorize if the data sets are generated even if their
-  # description file is younger than their pov file
-  _force = False
-  # Name of the description file
-  _descFileName = "dataset.json"
-  # Variables to memorize the successful generation
-  _successDataSets = []
-  # Variables to memorize the failed generation
-  _failedDataSets = []
-  # Variables to memorize the skipped generation
-  _skipDataSets = []
-  # Variable to memorize if we are in simulation mode
-  _simul = False
-  # Variable to memorize if we are in listing mode
-  _list = False
+  def RenderPipeline(self, inFolder, outFolder, ranges, nbJobs, \
+    queueSize):
+    '''
+    Render ranges of samples of the DataSet with a pipeline of three 
+    stages connected by bounded queues: the rendering of the files by 
+    'nbJobs' workers, the creation of the descriptions of the samples 
+    (packing and annotation of the masks) by one worker, and the 
+    recording of the samples in the result list and journal in their 
+    order. The number of ranges in the pipeline is also bounded, so a
+    stage slower than the others blocks the previous ones instead of
+    accumulating samples in memory. The busy time of each stage and the
+    depth of the queues are displayed at the end, to find which stage
+    is the bottleneck.
+    Inputs:
+      'inFolder': the full path to the folder where the pov file is
+      'outFolder': the full path of the folder where images and masks
+        are output
+      'ranges': the list of (iStart, iEnd) ranges of samples
+      'nbJobs': the number of ranges rendered in parallel
+      'queueSize': the maximum number of ranges in each queue
+    Output:
+      Return True if all the samples have been rendered, False else
+    '''
+    
+    # Init the queues between the stages, the indices of the ranges
+    # to render and the slots of ranges in the pipeline
+    nbJobs = max(1, nbJobs)
+    annotateQueue = queue.Queue(maxsize = queueSize)
+    writeQueue = queue.Queue(maxsize = queueSize)
+    renderQueue = queue.Queue()
+    for iRange in range(len(ranges)):
+      renderQueue.put(iRange)
+    slots = threading.Semaphore(nbJobs + 2 * queueSize)
+    logs = [[] for r in ranges]
+    stop = threading.Event()
+    failed = threading.Event()
+    
+    # Init the statistics of the stages and queues
+    statsLock = threading.Lock()
+    busy = {"render":0.0, "annotate":0.0, "write":0.0}
+    depths = {"annotate":[], "write":[]}
 
-  def __init__(self, args):
+    # Function to put an item in a queue, waiting for a free place 
+    # unless the pipeline is stopped, and recording the depth of the
+    # queue
+    def Put(name, q, item):
+      with statsLock:
+        depths[name].append(q.qsize())
+      while not stop.is_set():
+        try:
+          q.put(item, timeout = 0.1)
+          return True
+        except queue.Full:
+          pass
+      return False
+
+    # Function to get an item from a queue, unless the pipeline is 
+    # stopped
+    def Get(q):
+      while not stop.is_set():
+        try:
+          return q.get(timeout = 0.1)
+        except queue.Empty:
+          pass
+      return None
+    
+    # Function of the render stage
+    def RenderStage():
+      try:
+        while not stop.is_set():
+          
+          # Wait for a slot in the pipeline and get the next range
+          if not slots.acquire(timeout = 0.1):
+            continue
+          try:
+            iRange = renderQueue.get_nowait()
+          except queue.Empty:
+            slots.release()
+            return
+          
+          # Render the files of the range
+          startTime = time.time()
+          iStart, iEnd = ranges[iRange]
+          for iMask in self.GetMaskPasses():
+            if not self.RenderFiles(inFolder, outFolder, iStart, iEnd, \
+              iMask, logs[iRange]):
+              failed.set()
+              return
+          with statsLock:
+            busy["render"] += time.time() - startTime
+          
+          # Pass the range to the annotation stage
+          Put("annotate", annotateQueue, iRange)
+      except Exception as exc:
+        PrintExc(exc)
+        failed.set()
+    
+    # Function of the annotation stage
+    def AnnotateStage():
+      try:
+        while not stop.is_set():
+          iRange = Get(annotateQueue)
+          if iRange is None:
+            return
+          startTime = time.time()
+          samples = [self.MakeSample(outFolder, iRender) \
+            for iRender in range(ranges[iRange][0], ranges[iRange][1])]
+          with statsLock:
+            busy["annotate"] += time.time() - startTime
+          Put("write", writeQueue, (iRange, samples))
+      except Exception as exc:
+        PrintExc(exc)
+        failed.set()
+    
+    # Start the workers of the render and annotation stages
+    threads = [threading.Thread(target = RenderStage) \
+      for iJob in range(nbJobs)]
+    threads.append(threading.Thread(target = AnnotateStage))
+    for thread in threads:
+      thread.start()
+    
+    # Write stage: record the samples in their order
+    try:
+      pending = {}
+      iNext = 0
+      while iNext < len(ranges) and not failed.is_set():
+        try:
+          iRange, samples = writeQueue.get(timeout = 0.1)
+        except queue.Empty:
+          continue
+        startTime = time.time()
+        pending[iRange] = samples
+        while iNext in pending:
+          for msg in logs[iNext]:
+            print(msg)
+          for sample in pending.pop(iNext):
+            self.AddSample(sample)
+          slots.release()
+          iNext += 1
+        busy["write"] += time.time() - startTime
+    finally:
+      
+      # Stop and wait for the workers
+      stop.set()
+      for thread in threads:
+        thread.join()
+    
+    # If the rendering has failed, display the messages of the ranges 
+    # not recorded and give up
+    if failed.is_set():
+      for iRange in range(iNext, len(ranges)):
+        for msg in logs[iRange]:
+          print(msg)
+      return False
+    
+    # Display the statistics of the pipeline
+    msg = "Pipeline: busy time render " + "%.2f" % busy["render"] + \
+      "s (" + str(nbJobs) + " workers), annotate " + \
+      "%.2f" % busy["annotate"] + "s, write " + \
+      "%.2f" % busy["write"] + "s"
+    for name in ["annotate", "write"]:
+      depth = depths[name]
+      meanDepth = sum(depth) / len(depth) if len(depth) > 0 else 0.0
+      msg += "\n          " + name + " queue depth mean " + \
+        "%.1f" % meanDepth + ", max " + str(max(depth + [0])) + "/" + \
+        str(queueSize)
+    print(msg)
+    
+    # Return the success flag
+    return True
+
+  def RenderRange(self, inFolder, outFolder, iStart, iEnd, log = None):
     '''
-    Constructor
+    Render (create the images and masks) a range of consecutive samples
+    of the DataSet, with one call to POV-Ray for all the images and one
+    per mask
     Inputs:
-      'args': the arguments passed to this script
+      'inFolder': the full path to the folder where the pov file is
+      'outFolder': the full path of the folder where images and masks
+        are output
+      'iStart': the index of the first sample
+      'iEnd': the index of the sample after the last one
+      'log': if None the messages are printed immediately, else they are
+        appended to this list
+    Output:
+      Return the list of descriptions of the samples, or None if the 
+      rendering has failed
     '''
     try:
+      
+      # If there is only one sample, render it on its own
+      if iEnd - iStart == 1:
+        sample = self.RenderSample(inFolder, outFolder, iStart, log)
+        if sample is None:
+          return None
+        return [sample]
+      
+      # Loop on the images (iMask equals 0) and the masks
+      for iMask in self.GetMaskPasses():
+        
+        # Render the files, give up if they couldn't be created
+        if not self.RenderFiles(inFolder, outFolder, iStart, iEnd, \
+          iMask, log):
+          return None
+      
+      # Return the descriptions of the images and their masks
+      return [self.MakeSample(outFolder, iRender) \
+        for iRender in range(iStart, iEnd)]
 
-      # Init a flag to memorize if the user requested unit tests
-      flagUnitTest = False
+    except Exception as exc:
+      PrintExc(exc)
+      return None
 
-      # Process arguments
-      for iArg in range (len(args)):
-        
-        # Help
-        if args[iArg] == "-help":
-          print("generateDataSet.py" + \
-            " [-in <povFolder|povFile>] [-out <dataSetFolder>]" + \
-            " [-force] [-simul] [-list] [-unitTest] [-help]")
-          print("-in: folder containing the pov files, or one pov file")
-          print("-out: folder where the data sets will be generated")
-          print("-force: don't check time stamp and always generate" + \
-            " all the data sets")
-          print("-simul: don't actually generate the data sets")
-          print("-list: display a list of the data sets")
-          print("-unitTest: run the unit tests")
-          quit()
-        
-        # POV files folder
-        if args[iArg] == "-in":
-          folder = args[iArg + 1]
-          if os.path.exists(folder):
-            self._povFolder = os.path.abspath(folder)
-          else:
-            print("The folder/file " + str(folder) + " doesn't exists.")
-            quit()
+  def RenderSample(self, inFolder, outFolder, iRender, log = None):
+    '''
+    Render (create the image and masks) one sample of the DataSet
+    Inputs:
+      'inFolder': the full path to the folder where the pov file is
+      'outFolder': the full path of the folder where images and masks
+        are output
+      'iRender': the index of the sample, also used as the seed of the
+        random generator in the pov file through the clock variable
+      'log': if None the messages are printed immediately, else they are
+        appended to this list
+    Output:
+      Return the description of the sample, or None if the rendering 
+      has failed
+    '''
+    try:
+      
+      # Loop on the image (iMask equals 0) and the masks
+      for iMask in self.GetMaskPasses():
         
-        # DataSets folder
-        if args[iArg] == "-out":
-          folder = args[iArg + 1]
-          if os.path.exists(folder):
-            self._dataSetFolder = os.path.abspath(folder)
-          else:
+        # Render the file, give up if it couldn't be created
+        if not self.RenderFile(inFolder, outFolder, iRender, iMask, log):
+          return None
+      
+      # Return the description of the image and its masks
+      return self.MakeSample(outFolder, iRender)
+
+    except Exception as exc:
+      PrintExc(exc)
+      return None
+
+  def GetMaskPasses(self):
+    '''
+    Get the values of the Mask variable for which the pov file is 
+    rendered to create one sample
+    Output:
+      Return the list of values: 0 for the image, then i + 1 for the 
+      i-th mask, or -1 for the label map of all the masks
+    '''
+    if self.IsLabelMap():
+      return [0, -1]
+    else:
+      return list(range(int(self._nbMask) + 1))
+
+  def IsLabelMap(self):
+    '''
+    Check if the masks are split from one label map
+    Output:
+      Return True if the template requests a label map and the masks
+      can be encoded in one, False else
+    '''
+    return self._labelMap == "1" and \
+      int(self._nbMask) <= self._nbMaxLabel
+
+  def GetFileName(self, iRender, iMask):
+    '''
+    Get the name of one file of the DataSet
+    Inputs:
+      'iRender': the index of the sample
+      'iMask': 0 for the image, i + 1 for the i-th mask, -1 for the 
+        label map
+    Output:
+      Return the name of the file
+    '''
+    iRenderPadded = str(iRender).zfill(3)
+    fileFormat = self._format
+    if self._encoding is not None:
+      fileFormat = self._encoding[0]
+    if iMask == -1:
+      return "label" + iRenderPadded + ".png"
+    elif iMask == 0:
+      return "img" + iRenderPadded + "." + fileFormat
+    else:
+      return "mask" + iRenderPadded + "-" + str(iMask - 1).zfill(3) + \
+        "." + fileFormat
+
+  def RenderFile(self, inFolder, outFolder, iRender, iMask, log = None):
+    '''
+    Render one image or one mask of the DataSet
+    Inputs:
+      'inFolder': the full path to the folder where the pov file is
+      'outFolder': the full path of the folder where images and masks
+        are output
+      'iRender': the index of the sample
+      'iMask': 0 for the image, i + 1 for the i-th mask, passed to the
+        pov file through the Mask variable
+      'log': if None the messages are printed immediately, else they are
+        appended to this list
+    Output:
+      Return True if the file has been created, False else
+    '''
+    return self.RenderFiles(inFolder, outFolder, iRender, iRender + 1, \
+      iMask, log)
+
+  def RenderFiles(self, inFolder, outFolder, iStart, iEnd, iMask, \
+    log = None):
+    '''
+    Create the images or one of the masks of a range of consecutive 
+    samples of the DataSet, from the render cache if available or by 
+    rendering them, and split the label maps into their masks
+    Inputs:
+      'inFolder': the full path to the folder where the pov file is
+      'outFolder': the full path of the folder where images and masks
+        are output
+      'iStart': the index of the first sample
+      'iEnd': the index of the sample after the last one
+      'iMask': 0 for the images, i + 1 for the i-th mask, -1 for the
+        label maps, passed to the pov file through the Mask variable
+      'log': if None the messages are printed immediately, else they are
+        appended to this list
+    Output:
+      Return True if all the files have been created, False else
+    '''
+    try:
+      
+      # Get the files available in the render cache
+      missing = []
+      for iRender in range(iStart, iEnd):
+        filePath = os.path.join(outFolder, \
+          self.GetFileName(iRender, iMask))
+        if self._cache is not None and self._cache.Fetch( \
+          self.GetCacheKey(iRender, iMask), filePath):
+          self.LogFile(log, outFolder, iRender, iMask, "Cached")
+        else:
+          missing.append(iRender)
+      
+      # Render the other files, by ranges of consecutive samples
+      iRun = 0
+      while iRun < len(missing):
+        iRunEnd = iRun + 1
+        while iRunEnd < len(missing) and \
+          missing[iRunEnd] == missing[iRunEnd - 1] + 1:
+          iRunEnd += 1
+        if not self.RenderFrames(inFolder, outFolder, missing[iRun], \
+          missing[iRunEnd - 1] + 1, iMask, log):
+          return False
+        iRun = iRunEnd
+      
+      # Add the rendered files to the render cache, the ones captured
+      # into memory being added once written by MakeSample()
+      if self._cache is not None and (not self._capture or iMask == -1):
+        for iRender in missing:
+          self._cache.Store(self.GetCacheKey(iRender, iMask), \
+            os.path.join(outFolder, self.GetFileName(iRender, iMask)))
+      
+      # Split the label maps into the masks
+      if iMask == -1:
+        for iRender in range(iStart, iEnd):
+          profile = self.StartProfile()
+          if not self.SplitLabelMap(outFolder, iRender):
+            return False
+          self.StopProfile(profile, "splitLabelMap", iRender)
+      
+      # Return the success flag
+      return True
+
+    except Exception as exc:
+      PrintExc(exc)
+      return False
+
+  def LogFile(self, log, outFolder, iRender, iMask, action):
+    '''
+    Display a message about one image or mask of the DataSet
+    Inputs:
+      'log': if None the message is printed, else it is appended to 
+        this list
+      'outFolder': the full path of the folder where images and masks
+        are output
+      'iRender': the index of the sample
+      'iMask': 0 for the image, i + 1 for the i-th mask, -1 for the 
+        label map
+      'action': the action on the file
+    '''
+    filePath = os.path.join(outFolder, self.GetFileName(iRender, iMask))
+    if iMask == 0:
+      self.Log(log, str(iRender).zfill(3) + "/" + \
+        self._nbSample.zfill(3) + " " + action + " image " + filePath + \
+        " ...")
+    elif iMask == -1:
+      self.Log(log, "        " + action + " label map " + filePath + \
+        " ...")
+    else:
+      self.Log(log, "        " + action + " mask " + filePath + " ...")
+
+  def SetCache(self, cache, fingerprint):
+    '''
+    Set the render cache used by the DataSet
+    Inputs:
+      'cache': the RenderCache, or None to render all the files
+      'fingerprint': the fingerprint of the pov file and template of the
+        DataSet
+    '''
+    self._cache = cache
+    self._fingerprint = fingerprint
+
+  def SetRenderer(self, renderer):
+    '''
+    Set the renderer used to create the images and masks of the DataSet
+    Inputs:
+      'renderer': the Renderer
+    '''
+    self._renderer = renderer
+
+  def SetCapture(self, capture, encoding = None):
+    '''
+    Set if the files of the DataSet are captured into memory from the
+    renderer instead of being written by the renderer and read back
+    Inputs:
+      'capture': True to capture the files, False else
+      'encoding': the format and compression level (format, level) in
+        which the captured images and masks are written, None to write
+        them in the format of the DataSet
+    '''
+    self._capture = capture
+    self._encoding = None
+    if capture and encoding is not None:
+      self._encoding = (encoding[0], \
+        self.GetEncodingParams(encoding[0], encoding[1]))
+
+  def SetProfiler(self, profiler, key):
+    '''
+    Set the profiler recording the time spent in each phase of the 
+    generation of the DataSet
+    Inputs:
+      'profiler': the Profiler, or None to not profile the generation
+      'key': the key of the DataSet in the profiler
+    '''
+    self._profiler = profiler
+    self._profileKey = key
+
+  def StartProfile(self):
+    '''
+    Start to measure a phase of the generation if it is profiled
+    Output:
+      Return the start of the measure, or None if the generation is 
+      not profiled
+    '''
+    if self._profiler is None:
+      return None
+    return self._profiler.Start()
+
+  def StopProfile(self, start, phase, iStart = -1, iEnd = None):
+    '''
+    Record a phase of the generation if it is profiled
+    Inputs:
+      'start': the value returned by StartProfile()
+      'phase': the name of the phase
+      'iStart': the index of the first sample concerned by the phase, -1
+        if it concerns the whole DataSet
+      'iEnd': the index of the sample after the last one, None if the 
+        phase concerns only the sample 'iStart'
+    '''
+    if start is not None:
+      self._profiler.Stop(start, self._profileKey, phase, iStart, iEnd)
+
+  def GetCacheKey(self, iRender, iMask):
+    '''
+    Get the key of one image or mask of the DataSet in the render cache
+    Inputs:
+      'iRender': the index of the sample
+      'iMask': 0 for the image, i + 1 for the i-th mask, -1 for the 
+        label map
+    Output:
+      Return the key as a string
+    '''
+    if iMask == 0:
+      options = self._imageOptions
+    elif iMask == -1:
+      options = self._labelOptions
+    else:
+      options = self._maskOptions
+    key = [self._fingerprint, iRender, self._dim["_val"], options, \
+      iMask, self.GetFileName(iRender, iMask).split(".")[-1]]
+    return hashlib.sha256(json.dumps(key).encode("utf-8")).hexdigest()
+
+  def RenderFrames(self, inFolder, outFolder, iStart, iEnd, iMask, \
+    log = None):
+    '''
+    Render the images or one of the masks of a range of consecutive
+    samples of the DataSet with one call to the renderer
+    Inputs:
+      'inFolder': the full path to the folder where the pov file is
+      'outFolder': the full path of the folder where images and masks
+        are output
+      'iStart': the index of the first sample
+      'iEnd': the index of the sample after the last one
+      'iMask': 0 for the images, i + 1 for the i-th mask, -1 for the
+        label maps, passed to the pov file through the Mask variable
+      'log': if None the messages are printed immediately, else they are
+        appended to this list
+    Output:
+      Return True if all the files have been created, False else
+    '''
+    try:
+      
+      # Create the full path to the pov file
+      povFilePath = os.path.join(inFolder, self._name + ".pov")
+
+      # Get the format and options of the files
+      # The masks are rendered at the lowest quality, and the label maps
+      # without antialiasing to keep the colors of the labels exact, and
+      # always in png
+      nbFrame = iEnd - iStart
+      if iMask == 0:
+        options = self._imageOptions
+      elif iMask == -1:
+        options = self._labelOptions
+      else:
+        options = self._maskOptions
+      if iMask == -1:
+        fileFormat = "png"
+      else:
+        fileFormat = self._format
+      if not fileFormat in ["png", "tga"]:
+        self.Log(log, "Unsupported format: " + fileFormat)
+        return False
+
+      # Inform the user, and remove the files to render if they exist
+      # as they may be hard links to the render cache
+      outFileNames = []
+      for iRender in range(iStart, iEnd):
+        self.LogFile(log, outFolder, iRender, iMask, "Rendering")
+        outFileNames.append(self.GetFileName(iRender, iMask))
+        filePath = os.path.join(outFolder, outFileNames[-1])
+        if os.path.exists(filePath):
+          os.remove(filePath)
+
+      # In capture mode, render the files one by one into memory, except
+      # the label maps which are kept in the render cache. The masks are
+      # decoded in gray as ReadImage() would read them from their files
+      if self._capture and (iMask != -1 or self._cache is None):
+        flag = cv2.IMREAD_COLOR
+        if iMask > 0 and fileFormat == "png":
+          flag = cv2.IMREAD_GRAYSCALE
+        for iRender in range(iStart, iEnd):
+          profile = self.StartProfile()
+          timeStart = time.time()
+          img, stats = self._renderer.Capture(povFilePath, outFolder, \
+            iRender, iMask, self._dim["_val"], options, flag)
+          if img is None:
+            return False
+          if iMask > 0 and img.ndim == 3:
+            img = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
+          self._renderTimes[self.GetFileName(iRender, iMask)] = \
+            time.time() - timeStart
+          self.KeepCaptured(iRender, iMask, img)
+          if profile is not None:
+            self.StopProfile(profile, "render", iRender)
+            for phase in stats:
+              self._profiler.Record(self._profileKey, "render." + phase, \
+                iRender, None, stats[phase])
+        return True
+
+      # Render the files and memorize the time it took
+      profile = self.StartProfile()
+      timeStart = time.time()
+      stats = self._renderer.Render(povFilePath, outFolder, iStart, \
+        iEnd, iMask, self._dim["_val"], options, fileFormat, outFileNames)
+      renderTime = (time.time() - timeStart) / nbFrame
+      if stats is None:
+        return False
+      if profile is not None:
+        self.StopProfile(profile, "render", iStart, iEnd)
+        for phase in stats:
+          self._profiler.Record(self._profileKey, "render." + phase, \
+            iStart, iEnd, stats[phase])
+
+      # Check that all the files have been created and memorize their
+      # render time
+      for iRender in range(iStart, iEnd):
+        fileName = self.GetFileName(iRender, iMask)
+        if not os.path.exists(os.path.join(outFolder, fileName)):
+          return False
+        self._renderTimes[fileName] = renderTime
+      
+      # Return the success flag
+      return True
+
+    except Exception as exc:
+      PrintExc(exc)
+      return False
+
+  def SplitLabelMap(self, outFolder, iRender):
+    '''
+    Split the label map of one sample into its black and white masks,
+    and delete the label map. In capture mode the label map is taken 
+    from memory if it has been captured, and the masks are kept in 
+    memory in gray. In the label map the pixels of the target
+    of the i-th mask have the color whose red, green and blue components
+    are 0 for the bits set respectively at position 0, 1 and 2 of i + 1,
+    and 1 else. The pixels of non-targets are white.
+    Inputs:
+      'outFolder': the full path of the folder where images and masks
+        are output
+      'iRender': the index of the sample
+    Output:
+      Return True if the masks have been created, False else
+    '''
+    try:
+      
+      # Load the label map
+      labelFilePath = os.path.join(outFolder, self.GetFileName(iRender, -1))
+      imgLabel = self.PopCaptured(iRender, -1)
+      if imgLabel is None:
+        imgLabel = cv2.imread(labelFilePath, cv2.IMREAD_COLOR)
+      if imgLabel is None:
+        return False
+      
+      # Decode the label of each pixel from the bits of its color
+      # (cv2 loads the channels in BGR order)
+      bits = (imgLabel < 128).astype(numpy.uint8)
+      labels = bits[:, :, 2] + 2 * bits[:, :, 1] + 4 * bits[:, :, 0]
+      
+      # Loop on the masks
+      for iMask in range(int(self._nbMask)):
+        
+        # Create the mask, black for the target, white for the non-target
+        imgMask = numpy.where(labels == iMask + 1, 0, 255).astype( \
+          numpy.uint8)
+        if self._capture:
+          self.KeepCaptured(iRender, iMask + 1, imgMask)
+          continue
+        imgMask = numpy.repeat(imgMask[:, :, numpy.newaxis], 3, axis = 2)
+        
+        # Save the mask
+        maskFilePath = os.path.join(outFolder, \
+          self.GetFileName(iRender, iMask + 1))
+        if not WriteImage(maskFilePath, imgMask):
+          return False
+      
+      # Delete the label map
+      if os.path.exists(labelFilePath):
+        os.remove(labelFilePath)
+      
+      # Return the success flag
+      return True
+
+    except Exception as exc:
+      PrintExc(exc)
+      return False
+
+  def MakeSample(self, outFolder, iRender):
+    '''
+    Create the description of one rendered sample of the DataSet
+    Inputs:
+      'outFolder': the full path of the folder where images and masks
+        are output
+      'iRender': the index of the sample
+    Output:
+      Return the description of the sample
+    '''
+    
+    # Write the files of the sample captured into memory, and get the
+    # targets of its masks
+    captured = {}
+    if self._capture:
+      profile = self.StartProfile()
+      captured = self.WriteCaptured(outFolder, iRender)
+      self.StopProfile(profile, "writeCaptured", iRender)
+    targets = [captured[iMask + 1] != 255 if iMask + 1 in captured \
+      else None for iMask in range(int(self._nbMask))]
+
+    # Create the description with the name of the image and masks
+    sample = {"img":self.GetFileName(iRender, 0), "mask":[]}
+    for iMask in range(int(self._nbMask)):
+      sample["mask"].append(self.GetFileName(iRender, iMask + 1))
+
+    # Pack the masks if requested
+    if self._maskFormat != "image":
+      profile = self.StartProfile()
+      sample["mask"] = [self.PackMask(outFolder, sample["mask"][iMask], \
+        targets[iMask]) for iMask in range(int(self._nbMask))]
+      self.StopProfile(profile, "packMask", iRender)
+
+    # Add the annotations of the masks
+    self.AnnotateSample(outFolder, sample, iRender, captured.get(0), \
+      targets)
+    
+    # Return the description of the image and its masks
+    return sample
+
+  def PackMask(self, outFolder, maskFileName, target = None):
+    '''
+    Replace a rendered mask with its packed version
+    Inputs:
+      'outFolder': the full path of the folder where images and masks
+        are output
+      'maskFileName': the name of the rendered mask
+      'target': the mask as an array of booleans if it has been 
+        captured into memory, None to read it
+    Output:
+      Return the name of the packed mask, or of the rendered mask if it
+      couldn't be read
+    '''
+    maskFilePath = os.path.join(outFolder, maskFileName)
+    if target is None:
+      target = ReadMask(maskFilePath)
+    if target is None:
+      return maskFileName
+    packedFileName = os.path.splitext(maskFileName)[0] + "." + \
+      self._maskFormat
+    with open(os.path.join(outFolder, packedFileName), "wb") as fp:
+      fp.write(EncodeMask(target, self._maskFormat))
+    if os.path.exists(maskFilePath):
+      os.remove(maskFilePath)
+    return packedFileName
+
+  def KeepCaptured(self, iRender, iMask, img):
+    '''
+    Keep in memory one file captured from the renderer until its sample
+    is created by MakeSample()
+    Inputs:
+      'iRender': the index of the sample
+      'iMask': 0 for the image, i + 1 for the i-th mask, -1 for the 
+        label map
+      'img': the file decoded as a numpy array
+    '''
+    with self._capturedLock:
+      if not iRender in self._captured:
+        self._captured[iRender] = {}
+      self._captured[iRender][iMask] = img
+
+  def PopCaptured(self, iRender, iMask):
+    '''
+    Get and forget one file captured into memory
+    Inputs:
+      'iRender': the index of the sample
+      'iMask': 0 for the image, i + 1 for the i-th mask, -1 for the 
+        label map
+    Output:
+      Return the file as a numpy array, or None if it hasn't been 
+      captured
+    '''
+    with self._capturedLock:
+      captured = self._captured.get(iRender, {})
+      img = captured.pop(iMask, None)
+      if len(captured) == 0 and iRender in self._captured:
+        del self._captured[iRender]
+    return img
+
+  def WriteCaptured(self, outFolder, iRender):
+    '''
+    Encode and write the files of one sample captured into memory, and
+    add them to the render cache. The masks to pack are written only
+    if they are added to the render cache.
+    Inputs:
+      'outFolder': the full path of the folder where images and masks
+        are output
+      'iRender': the index of the sample
+    Output:
+      Return the dictionary of the captured files per iMask, which are
+      forgotten
+    '''
+    with self._capturedLock:
+      captured = self._captured.pop(iRender, {})
+    params = self._encoding[1] if self._encoding is not None else []
+    for iMask in captured:
+      flagCache = self._cache is not None and \
+        (iMask == 0 or not self.IsLabelMap())
+      if iMask > 0 and self._maskFormat != "image" and not flagCache:
+        continue
+      filePath = os.path.join(outFolder, self.GetFileName(iRender, iMask))
+      if not WriteImage(filePath, captured[iMask], params):
+        raise IOError("Can't write " + filePath)
+      if flagCache:
+        self._cache.Store(self.GetCacheKey(iRender, iMask), filePath)
+    return captured
+
+  def AnnotateSample(self, outFolder, sample, iRender = -1, img = None, \
+    targets = None):
+    '''
+    Add to the description of one sample the annotations of its masks:
+    'bounding' (bounding box in yolo format), 'area' (number of pixels
+    of the target), 'centroid' (relative coordinates of the center of 
+    mass of the target) and 'instances' (bounding box in yolo format of 
+    each connected component of the target). Each one is a list with one
+    element per mask, an empty list for the bounding box and centroid
+    if the mask has no target or couldn't be loaded. The statistics of
+    the pixels of the image are also added, see StatSample().
+    Inputs:
+      'outFolder': the full path of the folder where images and masks
+        are output
+      'sample': the description of the sample, updated in place
+      'iRender': the index of the sample, for the profiler
+      'img': the image if it has been captured into memory, None to 
+        read it
+      'targets': the list of the masks as arrays of booleans, the ones
+        which haven't been captured into memory being None, or None to
+        read all the masks
+    '''
+    sample["bounding"] = []
+    sample["area"] = []
+    sample["centroid"] = []
+    sample["instances"] = []
+
+    # Get the statistics of the image
+    profile = self.StartProfile()
+    self.StatSample(outFolder, sample, img)
+    self.StopProfile(profile, "imageStats", iRender)
+
+    # Loop on masks
+    for iMask in range(len(sample["mask"])):
+      
+      # Load the mask if it hasn't been captured
+      target = targets[iMask] if targets is not None else None
+      if target is None:
+        profile = self.StartProfile()
+        maskFilePath = os.path.join(outFolder, sample["mask"][iMask])
+        target = ReadMask(maskFilePath)
+        self.StopProfile(profile, "readMask", iRender)
+
+      # Annotate the mask
+      profile = self.StartProfile()
+      bounding, area, centroid, instances = self.AnnotateMask(target)
+      self.StopProfile(profile, "annotate", iRender)
+      sample["bounding"].append(bounding)
+      sample["area"].append(area)
+      sample["centroid"].append(centroid)
+      sample["instances"].append(instances)
+
+  def StatSample(self, outFolder, sample, img = None):
+    '''
+    Add to the description of one sample the statistics of the pixels of
+    its image: 'pixelMean' and 'pixelM2', the mean and the sum of 
+    squared deviations of each channel, in RGB order. They are not added
+    if the image couldn't be loaded.
+    Inputs:
+      'outFolder': the full path of the folder where images and masks
+        are output
+      'sample': the description of the sample, updated in place
+      'img': the image if it has been captured into memory, None to 
+        read it
+    '''
+    sample.pop("pixelMean", None)
+    sample.pop("pixelM2", None)
+    if img is None:
+      img = ReadImage(os.path.join(outFolder, sample["img"]))
+    if img is not None:
+      mean, m2 = DataSetStats.GetImageStats(img)
+      sample["pixelMean"] = [str(v) for v in mean]
+      sample["pixelM2"] = [str(v) for v in m2]
+
+  def AnnotateMask(self, target):
+    '''
+    Calculate the annotations of one mask, from the projections of its
+    target on the rows and columns
+    Inputs:
+      'target': the mask as an array of booleans, True for the target, 
+        or None
+    Output:
+      Return the bounding box in yolo format, the area, the centroid and
+      the bounding box of each connected component, as strings
+    '''
+    
+    # If the mask couldn't be loaded, there are no annotations
+    if target is None:
+      return [], "0", [], []
+
+    # Get the number of target pixels per row and per column
+    width = float(self._dim["_val"][0])
+    height = float(self._dim["_val"][1])
+    rows = numpy.count_nonzero(target, axis = 1)
+    cols = numpy.count_nonzero(target, axis = 0)
+    area = int(rows.sum())
+    
+    # If the mask has no target, there is no bounding box nor centroid
+    if area == 0:
+      return [], "0", [], []
+    
+    # Get the bounding coordinates of the target
+    yNonZero = numpy.flatnonzero(rows)
+    xNonZero = numpy.flatnonzero(cols)
+    yMin, yMax = int(yNonZero[0]), int(yNonZero[-1])
+    xMin, xMax = int(xNonZero[0]), int(xNonZero[-1])
+    
+    # Convert the bounding coordinates into yolo format
+    bounding = self.GetYoloBox(xMin, yMin, xMax, yMax)
+    
+    # Get the centroid from the projections
+    xCentroid = float(numpy.dot(cols, numpy.arange(cols.size))) / area
+    yCentroid = float(numpy.dot(rows, numpy.arange(rows.size))) / area
+    centroid = [str(xCentroid / width), str(yCentroid / height)]
+    
+    # Get the bounding box of each connected component of the target
+    instances = []
+    nbComp, labels, stats, centroids = cv2.connectedComponentsWithStats( \
+      target.astype(numpy.uint8), connectivity = 8)
+    for iComp in range(1, nbComp):
+      x, y, w, h = [int(v) for v in stats[iComp][0:4]]
+      instances.append(self.GetYoloBox(x, y, x + w - 1, y + h - 1))
+
+    # Return the annotations
+    return bounding, str(area), centroid, instances
+
+  def GetYoloBox(self, xMin, yMin, xMax, yMax):
+    '''
+    Convert bounding coordinates in pixels into yolo format
+    Inputs:
+      'xMin', 'yMin', 'xMax', 'yMax': the bounding coordinates, included
+    Output:
+      Return the relative coordinates of the center, width and height
+      of the box, as strings
+    '''
+    width = float(self._dim["_val"][0])
+    height = float(self._dim["_val"][1])
+    xRelCenter = 0.5 * (xMax + xMin) / width
+    yRelCenter = 0.5 * (yMax + yMin) / height
+    widthRel = (xMax - xMin + 1) / width
+    heightRel = (yMax - yMin + 1) / height
+    return [str(xRelCenter), str(yRelCenter), str(widthRel), \
+      str(heightRel)]
+
+  def LoadDescFile(self, descFilePath):
+    '''
+    Load the name and samples of the DataSet from its description file,
+    and its manifest if the samples are not in the description file
+    Inputs:
+      'descFilePath': the full path to the description file
+    Output:
+      Return True if the description file could be loaded, False else
+    '''
+    try:
+      with open(descFilePath, "r") as fp:
+        dataSetDesc = json.load(fp)
+      self._name = dataSetDesc["dataSet"]
+      if "manifest" in dataSetDesc:
+        self._legacyDesc = False
+        self._images = ReadManifest(os.path.join( \
+          os.path.dirname(descFilePath), dataSetDesc["manifest"]))
+      else:
+        self._legacyDesc = True
+        self._images = dataSetDesc["samples"]
+      return True
+    except Exception as exc:
+      PrintExc(exc)
+      return False
+
+  def Annotate(self, outFolder, nbJobs = 1):
+    '''
+    Calculate again the annotations of all the samples of the DataSet
+    from the masks already rendered
+    Inputs:
+      'outFolder': the full path of the folder where images and masks
+        are
+      'nbJobs': the number of samples annotated in parallel
+    '''
+    with concurrent.futures.ThreadPoolExecutor( \
+      max_workers = max(1, nbJobs)) as executor:
+      list(executor.map(lambda sample: \
+        self.AnnotateSample(outFolder, sample), self._images))
+
+  def Transcode(self, outFolder, fileFormat, level = 3, nbJobs = 1):
+    '''
+    Re-encode the images and masks of the DataSet (except the packed
+    masks) into another format, and update the file names in the 
+    descriptions of the samples. The masks are stored with one channel.
+    The format of the DataSet is left unchanged as it is the one used
+    by POV-Ray for the renderings.
+    Each file is encoded under a temporary name, decoded again to check
+    that its pixels are unchanged, and then replaces the original file,
+    which is kept if the check fails.
+    Inputs:
+      'outFolder': the full path of the folder where images and masks
+        are
+      'fileFormat': one of 'png', 'webp' (lossless) or 'npy'
+      'level': the compression level of the png format, from 0 to 9
+      'nbJobs': the number of samples transcoded in parallel
+    Output:
+      Return True if all the files have been transcoded, False else
+    '''
+    params = self.GetEncodingParams(fileFormat, level)
+    flagSuccess = [True]
+
+    # Transcode one file, returning its new name, or its name if it 
+    # couldn't be transcoded
+    def TranscodeFile(fileName, flag):
+      base, ext = os.path.splitext(fileName)
+      if ext[1:].lower() in MASK_FORMATS or \
+        (ext[1:].lower() == fileFormat and fileFormat != "png"):
+        return fileName
+      filePath = os.path.join(outFolder, fileName)
+      newFileName = base + "." + fileFormat
+      tmpFilePath = os.path.join(outFolder, base + ".tmp." + fileFormat)
+      try:
+        img = ReadImage(filePath, flag)
+        if img is None:
+          raise IOError("Can't read " + filePath)
+        if not WriteImage(tmpFilePath, img, params):
+          raise IOError("Can't write " + tmpFilePath)
+        check = ReadImage(tmpFilePath, flag)
+        if check is None or check.shape != img.shape or \
+          numpy.any(check != img):
+          raise ValueError("The pixels of " + filePath + \
+            " are changed by the transcoding")
+        os.replace(tmpFilePath, os.path.join(outFolder, newFileName))
+        if newFileName != fileName:
+          os.remove(filePath)
+        return newFileName
+      except Exception as exc:
+        self.Log(None, "The transcoding of " + filePath + " has " + \
+          "failed: " + str(exc))
+        flagSuccess[0] = False
+        if os.path.exists(tmpFilePath):
+          os.remove(tmpFilePath)
+        return fileName
+
+    # Transcode the image and masks of one sample
+    def TranscodeSample(sample):
+      sample["img"] = TranscodeFile(sample["img"], cv2.IMREAD_COLOR)
+      sample["mask"] = [TranscodeFile(maskFileName, \
+        cv2.IMREAD_GRAYSCALE) for maskFileName in sample["mask"]]
+
+    with concurrent.futures.ThreadPoolExecutor( \
+      max_workers = max(1, nbJobs)) as executor:
+      list(executor.map(TranscodeSample, self._images))
+    return flagSuccess[0]
+
+  @staticmethod
+  def GetEncodingParams(fileFormat, level = 3):
+    '''
+    Get the encoding parameters of cv2.imwrite for one of the formats
+    into which the images and masks can be transcoded
+    Inputs:
+      'fileFormat': one of 'png', 'webp' (lossless) or 'npy'
+      'level': the compression level of the png format, from 0 to 9
+    Output:
+      Return the list of parameters
+    '''
+    return {"png":[cv2.IMWRITE_PNG_COMPRESSION, level], \
+      "webp":[cv2.IMWRITE_WEBP_QUALITY, 101], "npy":[]}[fileFormat]
+
+  def Export(self, outFolder, nbJobs = 1):
+    '''
+    Pack the images and masks of the DataSet into arrays in npy format,
+    which can be memory mapped with numpy.load(mmap_mode = "r") or 
+    numpy.memmap. The images are stored as a N x H x W x 3 array of 
+    uint8 in RGB order, and the masks as a N x nbMask x H x W array of
+    uint8 (the target being the non white pixels). The layout of the 
+    arrays and the bounding boxes of the samples are saved in a header
+    in JSON format.
+    Inputs:
+      'outFolder': the full path of the folder where images and masks
+        are, and where the arrays are saved
+      'nbJobs': the number of samples packed in parallel
+    Output:
+      Return True if the arrays have been exported, False else
+    '''
+    try:
+      
+      # Create the arrays under temporary names
+      width = int(self._dim["_val"][0])
+      height = int(self._dim["_val"][1])
+      nbSample = len(self._images)
+      nbMask = int(self._nbMask)
+      arrays = {}
+      for fileName, shape in [ \
+        (self._imagesTensorFileName, (nbSample, height, width, 3)), \
+        (self._masksTensorFileName, (nbSample, nbMask, height, width))]:
+        arrays[fileName] = numpy.lib.format.open_memmap( \
+          os.path.join(outFolder, fileName + ".tmp"), mode = "w+", \
+          dtype = numpy.uint8, shape = shape)
+      images = arrays[self._imagesTensorFileName]
+      masks = arrays[self._masksTensorFileName]
+      
+      # Copy the image and masks of one sample into the arrays
+      def PackSample(iSample):
+        sample = self._images[iSample]
+        img = ReadImage(os.path.join(outFolder, sample["img"]))
+        if img is None or img.shape[0:2] != (height, width):
+          raise ValueError("Can't pack the image " + sample["img"])
+        images[iSample] = img[:, :, ::-1]
+        for iMask, maskFileName in enumerate(sample["mask"]):
+          if os.path.splitext(maskFileName)[1][1:] in MASK_FORMATS:
+            target = ReadMask(os.path.join(outFolder, maskFileName))
+            imgMask = None if target is None else \
+              numpy.where(target, 0, 255).astype(numpy.uint8)
+          else:
+            imgMask = ReadImage(os.path.join(outFolder, maskFileName), \
+              cv2.IMREAD_GRAYSCALE)
+          if imgMask is None or imgMask.shape != (height, width):
+            raise ValueError("Can't pack the mask " + maskFileName)
+          masks[iSample, iMask] = imgMask
+      
+      # Pack the samples
+      with concurrent.futures.ThreadPoolExecutor( \
+        max_workers = max(1, nbJobs)) as executor:
+        list(executor.map(PackSample, range(nbSample)))
+      
+      # Create the header
+      header = {"dataSet":self._name, "nbSample":str(nbSample), \
+        "nbMask":self._nbMask, "dim":self._dim, "channels":"RGB", \
+        "bounding":[sample["bounding"] for sample in self._images]}
+      for key, fileName in [("images", self._imagesTensorFileName), \
+        ("masks", self._masksTensorFileName)]:
+        header[key] = {"file":fileName, "dtype":"uint8", \
+          "shape":[str(dim) for dim in arrays[fileName].shape], \
+          "offset":str(arrays[fileName].offset)}
+      
+      # Flush the arrays, give them their final names and save the
+      # header
+      for fileName in list(arrays.keys()):
+        arrays[fileName].flush()
+        del arrays[fileName]
+        os.replace(os.path.join(outFolder, fileName + ".tmp"), \
+          os.path.join(outFolder, fileName))
+      del images, masks
+      with open(os.path.join(outFolder, self._tensorsHeaderFileName), \
+        "w") as fp:
+        json.dump(header, fp, sort_keys = True, indent = 2)
+      return True
+
+    except Exception as exc:
+      PrintExc(exc)
+      return False
+
+  def AddSample(self, sample):
+    '''
+    Add a rendered sample to the result list, or record it in the 
+    journal if it is open. The samples must be added in their order.
+    Inputs:
+      'sample': the description of the sample
+    '''
+    iSample = self._nbSampleAdded
+    self._nbSampleAdded += 1
+    if self._journal is not None:
+      profile = self.StartProfile()
+      self.WriteJournal(iSample, sample)
+      self.StopProfile(profile, "journal", iSample)
+    else:
+      self._images.append(sample)
+
+  def GetNbSampleAdded(self):
+    '''
+    Get the number of samples added to the result list or the journal
+    Output:
+      Return the number of samples
+    '''
+    return self._nbSampleAdded
+
+  def WriteJournal(self, iSample, sample):
+    '''
+    Record one sample in the journal
+    Inputs:
+      'iSample': the index of the sample
+      'sample': the description of the sample
+    '''
+    record = dict(sample)
+    record["index"] = iSample
+    self._journal.write(json.dumps(record, sort_keys = True) + "\n")
+    self._journal.flush()
+
+  def OpenJournal(self, outFolder, key, samples = None):
+    '''
+    Open the journal where the samples are recorded as soon as they are
+    rendered, to resume the generation if it is interrupted
+    Inputs:
+      'outFolder': the full path of the folder where images and masks
+        are output
+      'key': the key identifying the version of the pov file and 
+        template used to render the samples
+      'samples': the samples already rendered, loaded by LoadJournal(),
+        which become the first ones of the result list, or None if
+        there are none
+    '''
+    if samples is None:
+      samples = []
+    self._journal = open(os.path.join(outFolder, self._journalFileName), \
+      "w")
+    self._journal.write(json.dumps({"dataSet":self._name, "key":key}) + \
+      "\n")
+    self._images = []
+    self._nbSampleAdded = 0
+    for sample in samples:
+      self.AddSample(sample)
+
+  def CloseJournal(self):
+    '''
+    Close the journal where the samples are recorded
+    '''
+    if self._journal is not None:
+      self._journal.close()
+      self._journal = None
+
+  def GetIndex(self, outFolder):
+    '''
+    Get the typed columnar index of the annotations of the samples, read
+    from the manifest, or the result list if the samples are written in
+    the description file
+    Inputs:
+      'outFolder': the full path of the folder where images and masks
+        are output
+    Output:
+      Return a dictionary of numpy arrays with one row per sample:
+        'bounding': nbSample x nbMask x 4 float32, the bounding box in 
+          yolo format, NaN if the mask has no target
+        'area': nbSample x nbMask int32, the number of pixels of the 
+          target
+        'centroid': nbSample x nbMask x 2 float32, the relative 
+          coordinates of the centroid, NaN if the mask has no target
+        'nbInstance': nbSample x nbMask int32, the number of connected
+          components of the target
+        'offset': nbSample int64, the offset in bytes of the record of
+          the sample in the manifest, -1 if it's not in the manifest
+        'dim': the width and height of the images, as int32
+    '''
+    nbSample = int(self._nbSample)
+    nbMask = int(self._nbMask)
+    index = {}
+    index["bounding"] = numpy.full((nbSample, nbMask, 4), numpy.nan, \
+      dtype = numpy.float32)
+    index["area"] = numpy.zeros((nbSample, nbMask), dtype = numpy.int32)
+    index["centroid"] = numpy.full((nbSample, nbMask, 2), numpy.nan, \
+      dtype = numpy.float32)
+    index["nbInstance"] = numpy.zeros((nbSample, nbMask), \
+      dtype = numpy.int32)
+    index["offset"] = numpy.full(nbSample, -1, dtype = numpy.int64)
+    index["dim"] = numpy.array([int(v) for v in self._dim["_val"]], \
+      dtype = numpy.int32)
+
+    # Fill the columns sample by sample
+    for (iSample, offset, sample) in self.IterSamples(outFolder):
+      index["offset"][iSample] = offset
+      for iMask in range(min(nbMask, len(sample.get("bounding", [])))):
+        if len(sample["bounding"][iMask]) == 4:
+          index["bounding"][iSample, iMask] = \
+            [float(v) for v in sample["bounding"][iMask]]
+        if len(sample["centroid"][iMask]) == 2:
+          index["centroid"][iSample, iMask] = \
+            [float(v) for v in sample["centroid"][iMask]]
+        index["area"][iSample, iMask] = int(sample["area"][iMask])
+        index["nbInstance"][iSample, iMask] = \
+          len(sample["instances"][iMask])
+    return index
+
+  def IterSamples(self, outFolder):
+    '''
+    Iterate on the samples, streaming the manifest to keep only one 
+    record in memory at a time, or on the result list if the samples 
+    are written in the description file
+    Inputs:
+      'outFolder': the full path of the folder where images and masks
+        are output
+    Output:
+      Yield the index of each sample, the offset in bytes of its record
+      in the manifest (-1 if it's not in the manifest) and its 
+      description
+    '''
+    nbSample = int(self._nbSample)
+    if self._legacyDesc:
+      for iSample in range(len(self._images)):
+        yield (iSample, -1, self._images[iSample])
+      return
+    with open(os.path.join(outFolder, self._journalFileName), "rb") as fp:
+      fp.readline()
+      offset = fp.tell()
+      for line in iter(fp.readline, b""):
+        record = json.loads(line.decode("utf-8"))
+        iSample = record.pop("index")
+        if iSample >= nbSample:
+          raise ValueError("Too many samples in " + outFolder)
+        yield (iSample, offset, record)
+        offset += len(line)
+
+  def GetStats(self, outFolder):
+    '''
+    Get the statistics of the pixels of the data set from the ones of
+    its samples
+    Inputs:
+      'outFolder': the full path of the folder where images and masks
+        are output
+    Output:
+      Return the statistics as a dictionary, see DataSetStats.GetDesc()
+    '''
+    stats = DataSetStats(int(self._nbMask))
+    nbPixel = int(self._dim["_val"][0]) * int(self._dim["_val"][1])
+    for (iSample, offset, sample) in self.IterSamples(outFolder):
+      stats.AddSample(sample, nbPixel)
+    return stats.GetDesc()
+
+  def ComputeStats(self, outFolder, nbJobs = 1):
+    '''
+    Add the statistics of the pixels to the samples of the DataSet 
+    generated by a version without them, annotating them too if needed,
+    and update the statistics of the data set
+    Inputs:
+      'outFolder': the full path of the folder where images and masks
+        are
+      'nbJobs': the number of samples processed in parallel
+    '''
+    def StatSample(sample):
+      if not "area" in sample:
+        self.AnnotateSample(outFolder, sample)
+      elif not "pixelMean" in sample:
+        self.StatSample(outFolder, sample)
+    with concurrent.futures.ThreadPoolExecutor( \
+      max_workers = max(1, nbJobs)) as executor:
+      list(executor.map(StatSample, self._images))
+    if not self._legacyDesc:
+      self.SaveManifest(outFolder)
+    self._stats = self.GetStats(outFolder)
+
+  def SaveIndex(self, outFolder):
+    '''
+    Save the typed columnar index of the annotations of the samples 
+    (see GetIndex()) in the output folder, in npz format
+    Inputs:
+      'outFolder': the full path of the folder where images and masks
+        are output
+    '''
+    index = self.GetIndex(outFolder)
+    indexFilePath = os.path.join(outFolder, self._indexFileName)
+    tmpFilePath = indexFilePath + "." + str(os.getpid()) + ".tmp"
+    with open(tmpFilePath, "wb") as fp:
+      numpy.savez(fp, **index)
+    os.replace(tmpFilePath, indexFilePath)
+
+  def LoadManifest(self, outFolder):
+    '''
+    Load in the result list the samples recorded in the journal, once
+    they are all rendered
+    Inputs:
+      'outFolder': the full path of the folder where images and masks
+        are output
+    '''
+    self._images = ReadManifest(os.path.join(outFolder, \
+      self._journalFileName))
+    if len(self._images) != int(self._nbSample):
+      raise ValueError("Samples missing in the manifest of " + outFolder)
+
+  def SaveManifest(self, outFolder, key = None):
+    '''
+    Write the samples of the result list in the manifest, replacing the
+    previous one
+    Inputs:
+      'outFolder': the full path of the folder where images and masks
+        are output
+      'key': the key identifying the version of the pov file and 
+        template used to render the samples, None to keep the one of
+        the previous manifest
+    '''
+    manifestFilePath = os.path.join(outFolder, self._journalFileName)
+    if key is None:
+      with open(manifestFilePath, "r") as fp:
+        key = json.loads(fp.readline())["key"]
+    tmpFilePath = manifestFilePath + "." + str(os.getpid()) + ".tmp"
+    with open(tmpFilePath, "w") as fp:
+      fp.write(json.dumps({"dataSet":self._name, "key":key}) + "\n")
+      for iSample in range(len(self._images)):
+        record = dict(self._images[iSample])
+        record["index"] = iSample
+        fp.write(json.dumps(record, sort_keys = True) + "\n")
+    os.replace(tmpFilePath, manifestFilePath)
+
+  def LoadJournal(self, outFolder, key):
+    '''
+    Load the samples recorded in the journal by a previous generation
+    Inputs:
+      'outFolder': the full path of the folder where images and masks
+        are output
+      'key': the key identifying the version of the pov file and 
+        template used to render the samples
+    Output:
+      Return the list of descriptions of the consecutive samples, from
+      the first one, whose record is valid and files exist. The list is
+      empty if there is no journal or it has been created with another
+      key.
+    '''
+    samples = []
+    try:
+      with open(os.path.join(outFolder, self._journalFileName), "r") as fp:
+        header = json.loads(fp.readline())
+        if header["key"] != key:
+          return []
+        for line in fp:
+          record = json.loads(line)
+          if record["index"] != len(samples) or \
+            len(samples) >= int(self._nbSample):
+            break
+          del record["index"]
+          fileNames = [record["img"]] + record["mask"]
+          if not all(os.path.exists(os.path.join(outFolder, f)) and \
+            os.path.getsize(os.path.join(outFolder, f)) > 0 \
+            for f in fileNames):
+            break
+          samples.append(record)
+    except:
+      pass
+    return samples
+
+  def LoadRenderTimes(self, outFolder):
+    '''
+    Load the render times recorded by a previous generation
+    Inputs:
+      'outFolder': the full path of the folder where images and masks
+        are output
+    Output:
+      Return a dictionary of render time in seconds per file name, empty
+      if there is no record
+    '''
+    try:
+      with open(os.path.join(outFolder, self._renderTimesFileName), \
+        "r") as fp:
+        return json.load(fp)
+    except:
+      return {}
+
+  def SaveRenderTimes(self, outFolder):
+    '''
+    Save the render times of the files rendered by this DataSet, to be
+    used as estimation of the render cost by the next generations
+    Inputs:
+      'outFolder': the full path of the folder where images and masks
+        are output
+    '''
+    try:
+      renderTimes = self.LoadRenderTimes(outFolder)
+      renderTimes.update(self._renderTimes)
+      with open(os.path.join(outFolder, self._renderTimesFileName), \
+        "w") as fp:
+        json.dump(renderTimes, fp, sort_keys = True)
+    except Exception as exc:
+      PrintExc(exc)
+
+  @staticmethod
+  def Log(log, msg):
+    '''
+    Display a message about the rendering
+    Inputs:
+      'log': if None the message is printed, else it is appended to 
+        this list
+      'msg': the message
+    '''
+    if log is None:
+      with DataSet._logLock:
+        print(msg)
+    else:
+      log.append(msg)
+
+class DataSetStats:
+  '''
+  Class accumulating the statistics of the pixels of a data set: mean
+  and standard deviation per channel of the images (in RGB order, on 
+  the 0-255 scale), and ratio of target pixels per mask. The mean and
+  sum of squared deviations of each image are merged with the parallel
+  form of Welford's algorithm (Chan et al.), so statistics accumulated
+  separately, for example by parallel workers, can be merged exactly.
+  '''
+
+  def __init__(self, nbMask):
+    '''
+    Constructor
+    Inputs:
+      'nbMask': the number of masks per sample
+    '''
+    self._nbPixel = 0
+    self._mean = numpy.zeros(3)
+    self._m2 = numpy.zeros(3)
+    self._nbMaskPixel = 0
+    self._nbTargetPixel = numpy.zeros(nbMask, dtype = numpy.int64)
+
+  @staticmethod
+  def GetImageStats(img):
+    '''
+    Get the statistics of the pixels of one image
+    Inputs:
+      'img': the image as an array H x W x 3 in BGR order
+    Output:
+      Return the mean and the sum of squared deviations per channel, in
+      RGB order, as arrays of float
+    '''
+    mean, std = cv2.meanStdDev(img)
+    nbPixel = img.shape[0] * img.shape[1]
+    return mean[::-1, 0], (std[::-1, 0] ** 2) * nbPixel
+
+  def Merge(self, nbPixel, mean, m2):
+    '''
+    Merge the statistics of a set of pixels in the statistics
+    Inputs:
+      'nbPixel': the number of pixels
+      'mean': the mean per channel of the pixels
+      'm2': the sum of squared deviations per channel of the pixels
+    '''
+    if nbPixel == 0:
+      return
+    total = self._nbPixel + nbPixel
+    delta = numpy.asarray(mean) - self._mean
+    self._mean = self._mean + delta * (nbPixel / total)
+    self._m2 = self._m2 + numpy.asarray(m2) + \
+      delta ** 2 * (self._nbPixel * nbPixel / total)
+    self._nbPixel = total
+
+  def AddSample(self, sample, nbPixel):
+    '''
+    Add the statistics of one sample, from its description
+    Inputs:
+      'sample': the description of the sample, with its annotations
+      'nbPixel': the number of pixels of its image
+    '''
+    if "pixelMean" in sample:
+      self.Merge(nbPixel, [float(v) for v in sample["pixelMean"]], \
+        [float(v) for v in sample["pixelM2"]])
+    self._nbMaskPixel += nbPixel
+    for iMask in range(min(len(self._nbTargetPixel), \
+      len(sample.get("area", [])))):
+      self._nbTargetPixel[iMask] += int(sample["area"][iMask])
+
+  def GetDesc(self):
+    '''
+    Get the statistics for the description file
+    Output:
+      Return a dictionary of 'mean' and 'std' (per channel), 
+      'targetRatio' (per mask) and 'nbPixel' (number of pixels of the 
+      images), as strings
+    '''
+    std = numpy.sqrt(self._m2 / self._nbPixel) if self._nbPixel > 0 \
+      else self._m2
+    ratio = self._nbTargetPixel / float(max(1, self._nbMaskPixel))
+    return {"nbPixel":str(self._nbPixel), \
+      "mean":[str(v) for v in self._mean], \
+      "std":[str(v) for v in std], \
+      "targetRatio":[str(v) for v in ratio]}
+
+class Profiler:
+  '''
+  Class recording the wall time and CPU time of the child processes 
+  (POV-Ray) spent in each phase of the generation of the data sets. 
+  The CPU time of the child processes is measured with getrusage, 
+  which covers all the child processes terminated during the phase: if
+  the samples are rendered in parallel it includes the ones of the 
+  other workers. The total of a data set is measured from the loading 
+  of its template to its completion: it is exact if the data sets are
+  generated one after the other, but the totals of data sets rendered
+  together overlap, and in cooperation they include the wait for the 
+  other generators.
+  '''
+  # Name of the file where the profile of a data set is saved
+  _profileFileName = "profile.json"
+  # Percentiles displayed in the summary
+  _percentiles = [50, 90, 99]
+
+  def __init__(self):
+    '''
+    Constructor
+    '''
+    self._lock = threading.Lock()
+    self._records = []
+
+  def Start(self):
+    '''
+    Start to measure a phase
+    Output:
+      Return the start of the measure
+    '''
+    return (time.time(), GetChildCpuTime())
+
+  def Stop(self, start, key, phase, iStart = -1, iEnd = None):
+    '''
+    Record a phase measured since 'start'
+    Inputs:
+      'start': the value returned by Start()
+      'key': the key of the data set
+      'phase': the name of the phase
+      'iStart': the index of the first sample concerned by the phase, -1
+        if it concerns the whole data set
+      'iEnd': the index of the sample after the last one, None if the 
+        phase concerns only the sample 'iStart'
+    '''
+    self.Record(key, phase, iStart, iEnd, time.time() - start[0], \
+      GetChildCpuTime() - start[1])
+
+  def Record(self, key, phase, iStart, iEnd, wallTime, childCpuTime = 0.0):
+    '''
+    Record a phase
+    Inputs:
+      'key': the key of the data set
+      'phase': the name of the phase
+      'iStart': the index of the first sample concerned by the phase, -1
+        if it concerns the whole data set
+      'iEnd': the index of the sample after the last one, None if the 
+        phase concerns only the sample 'iStart'
+      'wallTime': the wall time of the phase in seconds
+      'childCpuTime': the CPU time of the child processes in seconds
+    '''
+    if iEnd is None:
+      iEnd = iStart + 1 if iStart >= 0 else -1
+    record = {"dataSet":key, "phase":phase, "iStart":iStart, \
+      "iEnd":iEnd, "wall":wallTime, "childCpu":childCpuTime}
+    with self._lock:
+      self._records.append(record)
+
+  def GetRecords(self, key = None):
+    '''
+    Get the recorded phases
+    Inputs:
+      'key': the key of the data set, None for all the data sets
+    Output:
+      Return the list of records
+    '''
+    with self._lock:
+      return [r for r in self._records if key is None or \
+        r["dataSet"] == key]
+
+  def Summarize(self, records):
+    '''
+    Summarize records per phase
+    Inputs:
+      'records': the list of records
+    Output:
+      Return a dictionary with, per phase, the number of records and 
+      the total, percentiles and maximum of their wall time, and the 
+      total of their child CPU time
+    '''
+    summary = {}
+    for phase in sorted(set(r["phase"] for r in records)):
+      walls = numpy.array([r["wall"] for r in records \
+        if r["phase"] == phase])
+      summary[phase] = {"count":int(walls.size), \
+        "wall":float(walls.sum()), "max":float(walls.max()), \
+        "childCpu":float(sum(r["childCpu"] for r in records \
+        if r["phase"] == phase))}
+      for percentile in self._percentiles:
+        summary[phase]["p" + str(percentile)] = \
+          float(numpy.percentile(walls, percentile))
+    return summary
+
+  def Save(self, key, outFolder):
+    '''
+    Save the profile of a data set in its output folder
+    Inputs:
+      'key': the key of the data set
+      'outFolder': the output folder of the data set
+    '''
+    try:
+      records = self.GetRecords(key)
+      profile = {"dataSet":key, "phases":self.Summarize(records), \
+        "records":records}
+      with open(os.path.join(outFolder, self._profileFileName), \
+        "w") as fp:
+        json.dump(profile, fp, sort_keys = True, indent = 2)
+    except Exception as exc:
+      PrintExc(exc)
+
+  def PrintSummary(self, remark = ""):
+    '''
+    Display the summary of the phases of all the data sets, and the 
+    total time per data set
+    Inputs:
+      'remark': the remark displayed about the totals per data set, ""
+        if they are exact
+    '''
+    records = self.GetRecords()
+    if len(records) == 0:
+      return
+    summary = self.Summarize(records)
+    columns = ["count", "wall"] + \
+      ["p" + str(p) for p in self._percentiles] + ["max", "childCpu"]
+    print("Profile (times in seconds, percentiles per record):")
+    print("  " + "phase".ljust(16) + \
+      "".join(c.rjust(10) for c in columns))
+    for phase in summary:
+      line = "  " + phase.ljust(16) + \
+        str(summary[phase]["count"]).rjust(10)
+      for c in columns[1:]:
+        line += ("%.4f" % summary[phase][c]).rjust(10)
+      print(line)
+    if remark == "":
+      print("  Total per data set:")
+    else:
+      print("  Total per data set (" + remark + "):")
+    for key in sorted(set(r["dataSet"] for r in records)):
+      dataSetRecords = [r for r in records if r["dataSet"] == key]
+      print("    " + key + ": wall " + \
+        "%.4f" % sum(r["wall"] for r in dataSetRecords \
+        if r["phase"] == "dataSet") + ", child CPU " + \
+        "%.4f" % sum(r["childCpu"] for r in dataSetRecords \
+        if r["phase"] == "dataSet"))
+    print("")
+
+class RenderCache:
+  '''
+  Class managing a content-addressed cache of rendered files, which can
+  be shared by data sets generated in several output folders. The files
+  are hard linked (or copied if it's not possible) from and to the 
+  cache, and the least recently used ones are evicted when the cache 
+  exceeds its maximum size.
+  '''
+  # Name of the file where the statistics of the cache are saved
+  _statsFileName = "stats.json"
+
+  def __init__(self, folder, maxSize):
+    '''
+    Constructor
+    Inputs:
+      'folder': the full path to the folder of the cache
+      'maxSize': the maximum size of the cache in bytes
+    '''
+    self._folder = folder
+    self._maxSize = maxSize
+    self._lock = threading.Lock()
+    self._hits = 0
+    self._misses = 0
+    self._evictions = 0
+    os.makedirs(folder, exist_ok = True)
+    self._size = sum(size for (mtime, size, path) in self.GetEntries())
+
+  def GetEntries(self):
+    '''
+    Get the entries of the cache
+    Output:
+      Return the list of (last use time, size, path) of the entries
+    '''
+    entries = []
+    for entryPath in glob.glob(os.path.join(self._folder, "??", "*")):
+      try:
+        stat = os.stat(entryPath)
+        entries.append((stat.st_mtime, stat.st_size, entryPath))
+      except:
+        pass
+    return entries
+
+  def GetEntryPath(self, key, filePath):
+    '''
+    Get the path of an entry of the cache
+    Inputs:
+      'key': the key of the entry
+      'filePath': the path of the file cached in this entry
+    Output:
+      Return the full path of the entry
+    '''
+    return os.path.join(self._folder, key[0:2], \
+      key + os.path.splitext(filePath)[1])
+
+  def Fetch(self, key, filePath):
+    '''
+    Get a file from the cache
+    Inputs:
+      'key': the key of the file
+      'filePath': the full path where the file is created
+    Output:
+      Return True if the file was in the cache, False else
+    '''
+    entryPath = self.GetEntryPath(key, filePath)
+    try:
+      if os.path.exists(filePath):
+        os.remove(filePath)
+      try:
+        os.link(entryPath, filePath)
+      except FileNotFoundError:
+        raise
+      except OSError:
+        shutil.copyfile(entryPath, filePath)
+      os.utime(entryPath)
+      with self._lock:
+        self._hits += 1
+      return True
+    except:
+      with self._lock:
+        self._misses += 1
+      return False
+
+  def Store(self, key, filePath):
+    '''
+    Add a file to the cache
+    Inputs:
+      'key': the key of the file
+      'filePath': the full path of the file
+    '''
+    try:
+      entryPath = self.GetEntryPath(key, filePath)
+      if os.path.exists(entryPath):
+        return
+      if not os.path.exists(os.path.dirname(entryPath)):
+        os.makedirs(os.path.dirname(entryPath), exist_ok = True)
+      
+      # Create the entry under a temporary name and rename it, to avoid
+      # partial entries if several generators share the cache
+      tmpPath = entryPath + "." + str(os.getpid()) + "-" + \
+        str(threading.get_ident()) + ".tmp"
+      try:
+        os.link(filePath, tmpPath)
+      except OSError:
+        shutil.copyfile(filePath, tmpPath)
+      os.replace(tmpPath, entryPath)
+      
+      # Evict the least recently used entries if the cache is too big
+      with self._lock:
+        self._size += os.path.getsize(entryPath)
+        if self._size > self._maxSize:
+          self.Evict()
+    except Exception as exc:
+      PrintExc(exc)
+
+  def Evict(self):
+    '''
+    Remove the least recently used entries until the cache is below 90%
+    of its maximum size
+    '''
+    entries = self.GetEntries()
+    entries.sort()
+    self._size = sum(size for (mtime, size, path) in entries)
+    for (mtime, size, entryPath) in entries:
+      if self._size <= 0.9 * self._maxSize:
+        break
+      try:
+        os.remove(entryPath)
+        self._size -= size
+        self._evictions += 1
+      except:
+        pass
+
+  def SaveStats(self):
+    '''
+    Add the statistics of this use of the cache to the ones saved in the
+    cache, and display them
+    '''
+    try:
+      statsFilePath = os.path.join(self._folder, self._statsFileName)
+      try:
+        with open(statsFilePath, "r") as fp:
+          stats = json.load(fp)
+      except:
+        stats = {"hits":0, "misses":0, "evictions":0}
+      stats["hits"] += self._hits
+      stats["misses"] += self._misses
+      stats["evictions"] += self._evictions
+      with open(statsFilePath, "w") as fp:
+        json.dump(stats, fp, sort_keys = True, indent = 2)
+      nbLookup = self._hits + self._misses
+      hitRate = 100.0 * self._hits / nbLookup if nbLookup > 0 else 0.0
+      print("Render cache: " + str(self._hits) + " hits, " + \
+        str(self._misses) + " misses (" + "%.1f" % hitRate + \
+        "% hit rate), " + str(self._evictions) + " evictions, " + \
+        "%.1f" % (self._size / 1048576.0) + " MB used\n")
+    except Exception as exc:
+      PrintExc(exc)
+
+class Catalog:
+  '''
+  Class managing the catalog of the data sets of an output folder, 
+  saved in this folder. It records for each data set its name, 
+  description, number of samples, size on disk, the fingerprint of its
+  last generation and if it must be generated again, with the time 
+  stamps of the files it has been deduced from. An entry is used as 
+  long as these files and the renderer are unchanged, so the listing
+  and the simulation don't load the templates nor hash the pov files 
+  of the data sets already checked.
+  '''
+  # Name of the file of the catalog in the output folder
+  _fileName = "catalog.json"
+  # Version of the format of the catalog, the catalogs of other versions
+  # being ignored
+  _version = "1"
+
+  def __init__(self, folder):
+    '''
+    Constructor
+    Inputs:
+      'folder': the full path to the output folder
+    '''
+    self._filePath = os.path.join(folder, self._fileName)
+    self._entries = {}
+    self._modified = False
+    try:
+      with open(self._filePath, "r") as fp:
+        content = json.load(fp)
+      if content["version"] == self._version:
+        self._entries = content["dataSets"]
+    except:
+      pass
+
+  @staticmethod
+  def GetStamp(filePath):
+    '''
+    Get the time stamp of a file
+    Inputs:
+      'filePath': the full path of the file
+    Output:
+      Return the modification time and size of the file as strings, or
+      "missing" if the file doesn't exist
+    '''
+    try:
+      stat = os.stat(filePath)
+      return str(stat.st_mtime_ns) + " " + str(stat.st_size)
+    except:
+      return "missing"
+
+  @staticmethod
+  def GetFolderSize(folder):
+    '''
+    Get the size on disk of the files of a folder
+    Inputs:
+      'folder': the full path of the folder
+    Output:
+      Return the size in bytes, 0 if the folder doesn't exist
+    '''
+    try:
+      return sum(entry.stat().st_size for entry in os.scandir(folder) \
+        if entry.is_file())
+    except:
+      return 0
+
+  def Get(self, key, environment, filePaths):
+    '''
+    Get the entry of a data set if it's still valid
+    Inputs:
+      'key': the key of the data set, "group/subgroup"
+      'environment': the stamp of the renderer and its options when the
+        entry is requested
+      'filePaths': the full paths of the pov file and template of the
+        data set, the entry being valid only if it has been deduced
+        from these files
+    Output:
+      Return the entry, or None if the data set isn't in the catalog, 
+      has been deduced from other files, or its files, the renderer or
+      its options have changed
+    '''
+    entry = self._entries.get(key)
+    if entry is None or entry["environment"] != environment:
+      return None
+    for filePath in filePaths:
+      if not filePath in entry["stamps"]:
+        return None
+    for filePath in entry["stamps"]:
+      if self.GetStamp(filePath) != entry["stamps"][filePath]:
+        return None
+    return entry
+
+  def Set(self, key, entry):
+    '''
+    Add or replace the entry of a data set
+    Inputs:
+      'key': the key of the data set, "group/subgroup"
+      'entry': the entry of the data set, see 
+        DataSetGenerator.CheckDataSet()
+    '''
+    self._entries[key] = entry
+    self._modified = True
+
+  def Save(self):
+    '''
+    Save the catalog if it has been modified, replacing the previous 
+    one. Generators sharing the output folder may overwrite the entries
+    of each other, which are then only checked again.
+    '''
+    if not self._modified:
+      return
+    try:
+      tmpFilePath = self._filePath + "." + str(os.getpid()) + ".tmp"
+      with open(tmpFilePath, "w") as fp:
+        json.dump({"version":self._version, "dataSets":self._entries}, \
+          fp, sort_keys = True, indent = 2)
+      os.replace(tmpFilePath, self._filePath)
+      self._modified = False
+    except Exception as exc:
+      PrintExc(exc)
+
+class Coordinator:
+  '''
+  Class coordinating several generators (on one host or several hosts
+  sharing the output folder, for example over NFS) rendering the same
+  data set. The samples are split into chunks claimed by the generators
+  with lease files, renewed while the chunk is rendered. A lease which
+  has not been renewed before its expiry (the generator has crashed or
+  lost the shared folder) is reclaimed by creating the next generation
+  of the lease, the highest generation being the valid one. The files
+  are created exclusively (O_EXCL), which is atomic on local file 
+  systems and NFSv3+. The clocks of the hosts are assumed to be
+  synchronized to well below the lease time.
+  '''
+  # Name of the lock file created by the generator assembling the data 
+  # set
+  _assembleFileName = "assemble.lock"
+
+  def __init__(self, outFolder, key, nbSample, claimSize, leaseTime):
+    '''
+    Constructor
+    Inputs:
+      'outFolder': the full path of the folder where the data set is
+        generated
+      'key': the key identifying the version of the pov file and 
+        template used to render the samples
+      'nbSample': the number of samples of the data set
+      'claimSize': the number of samples per chunk
+      'leaseTime': the time in seconds after which a lease which has
+        not been renewed expires
+    '''
+    self._folder = os.path.join(outFolder, "coop-" + key[0:16])
+    self._chunks = [(iStart, min(iStart + claimSize, nbSample)) \
+      for iStart in range(0, nbSample, claimSize)]
+    self._nbSample = nbSample
+    self._leaseTime = leaseTime
+    self._owner = socket.gethostname() + ":" + str(os.getpid()) + ":" + \
+      uuid.uuid4().hex[0:8]
+    self._lease = None
+    self._stopRenew = threading.Event()
+    self._renewThread = None
+    os.makedirs(self._folder, exist_ok = True)
+
+  def GetLeasePath(self, iStart, generation):
+    '''
+    Get the path of a lease file
+    Inputs:
+      'iStart': the index of the first sample of the chunk
+      'generation': the generation of the lease
+    Output:
+      Return the full path of the lease file
+    '''
+    return os.path.join(self._folder, "lease-" + str(iStart).zfill(6) + \
+      "-" + str(generation).zfill(3) + ".json")
+
+  def GetDonePath(self, iStart):
+    '''
+    Get the path of the file recording the samples of a rendered chunk
+    Inputs:
+      'iStart': the index of the first sample of the chunk
+    Output:
+      Return the full path of the file
+    '''
+    return os.path.join(self._folder, "done-" + str(iStart).zfill(6) + \
+      ".jsonl")
+
+  def GetGeneration(self, iStart):
+    '''
+    Get the highest generation of the leases of a chunk
+    Inputs:
+      'iStart': the index of the first sample of the chunk
+    Output:
+      Return the generation, -1 if the chunk has never been claimed
+    '''
+    generations = [int(os.path.basename(f)[13:16]) for f in \
+      glob.glob(os.path.join(self._folder, "lease-" + \
+      str(iStart).zfill(6) + "-[0-9][0-9][0-9].json"))]
+    return max(generations, default = -1)
+
+  def IsExpired(self, leasePath):
+    '''
+    Check if a lease has expired
+    Inputs:
+      'leasePath': the full path of the lease file
+    Output:
+      Return True if the lease has expired, False else. A lease which
+      can't be read (being created) expires 'leaseTime' after its last
+      modification.
+    '''
+    try:
+      with open(leasePath, "r") as fp:
+        expires = float(json.load(fp)["expires"])
+    except:
+      try:
+        expires = os.path.getmtime(leasePath) + self._leaseTime
+      except:
+        return False
+    return time.time() > expires
+
+  def WriteLease(self, leasePath):
+    '''
+    Write the owner and expiry of a lease, atomically
+    Inputs:
+      'leasePath': the full path of the lease file
+    '''
+    tmpPath = leasePath + "." + uuid.uuid4().hex[0:8] + ".tmp"
+    with open(tmpPath, "w") as fp:
+      json.dump({"owner":self._owner, \
+        "expires":time.time() + self._leaseTime}, fp)
+    os.replace(tmpPath, leasePath)
+
+  def CreateLease(self, iStart, generation):
+    '''
+    Try to create a lease on a chunk
+    Inputs:
+      'iStart': the index of the first sample of the chunk
+      'generation': the generation of the lease
+    Output:
+      Return the full path of the lease file, None if another generator
+      has created it first
+    '''
+    leasePath = self.GetLeasePath(iStart, generation)
+    try:
+      os.close(os.open(leasePath, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+    except FileExistsError:
+      return None
+    self.WriteLease(leasePath)
+    return leasePath
+
+  def Claim(self):
+    '''
+    Claim the first chunk which is neither rendered nor leased by a 
+    live generator, and renew its lease until it is completed or 
+    released
+    Output:
+      Return the (first, last + 1) indices of the samples of the chunk,
+      None if there is no chunk to claim
+    '''
+    for (iStart, iEnd) in self._chunks:
+      if os.path.exists(self.GetDonePath(iStart)):
+        continue
+      generation = self.GetGeneration(iStart)
+      if generation >= 0 and \
+        not self.IsExpired(self.GetLeasePath(iStart, generation)):
+        continue
+      leasePath = self.CreateLease(iStart, generation + 1)
+      if leasePath is None:
+        continue
+      
+      # The chunk may have been completed by the previous owner between
+      # the checks and the creation of the lease
+      if os.path.exists(self.GetDonePath(iStart)):
+        continue
+      
+      # Renew the lease in the background
+      self._lease = (iStart, generation + 1, leasePath)
+      self._stopRenew.clear()
+      self._renewThread = threading.Thread(target = self.Renew, \
+        daemon = True)
+      self._renewThread.start()
+      return (iStart, iEnd)
+    return None
+
+  def Renew(self):
+    '''
+    Renew the lease of the claimed chunk every third of the lease time,
+    until the chunk is completed or released, or the lease is lost
+    '''
+    (iStart, generation, leasePath) = self._lease
+    while not self._stopRenew.wait(self._leaseTime / 3.0):
+      try:
+        if self.GetGeneration(iStart) != generation:
+          break
+        self.WriteLease(leasePath)
+      except Exception as exc:
+        PrintExc(exc)
+
+  def StopRenew(self):
+    '''
+    Stop the renewal of the lease of the claimed chunk
+    '''
+    self._stopRenew.set()
+    if self._renewThread is not None:
+      self._renewThread.join()
+      self._renewThread = None
+
+  def Complete(self, samples):
+    '''
+    Record the samples of the claimed chunk and stop its lease
+    Inputs:
+      'samples': the descriptions of the samples of the chunk
+    Output:
+      Return True if the samples have been recorded, False if the lease
+      has expired and been reclaimed by another generator
+    '''
+    self.StopRenew()
+    (iStart, generation, leasePath) = self._lease
+    self._lease = None
+    if self.GetGeneration(iStart) != generation:
+      return False
+    donePath = self.GetDonePath(iStart)
+    tmpPath = donePath + "." + uuid.uuid4().hex[0:8] + ".tmp"
+    with open(tmpPath, "w") as fp:
+      for iSample in range(len(samples)):
+        record = dict(samples[iSample])
+        record["index"] = iStart + iSample
+        fp.write(json.dumps(record, sort_keys = True) + "\n")
+    os.replace(tmpPath, donePath)
+    return True
+
+  def Release(self):
+    '''
+    Give up the claimed chunk, so it can be claimed immediately by
+    another generator
+    '''
+    self.StopRenew()
+    if self._lease is not None:
+      try:
+        os.remove(self._lease[2])
+      except:
+        pass
+      self._lease = None
+
+  def IsComplete(self):
+    '''
+    Check if all the chunks have been rendered
+    Output:
+      Return True if all the chunks have been rendered, False else
+    '''
+    return all(os.path.exists(self.GetDonePath(iStart)) \
+      for (iStart, iEnd) in self._chunks)
+
+  def IsAssembled(self):
+    '''
+    Check if the data set has been assembled by another generator
+    Output:
+      Return True if the data set has been assembled, False else
+    '''
+    return not os.path.exists(self._folder)
+
+  def LoadSamples(self):
+    '''
+    Load the samples recorded by all the generators
+    Output:
+      Return the list of descriptions of the samples in their order
+    '''
+    samples = []
+    for (iStart, iEnd) in self._chunks:
+      with open(self.GetDonePath(iStart), "r") as fp:
+        for line in fp:
+          record = json.loads(line)
+          if record["index"] != len(samples):
+            raise ValueError("Missing sample " + str(len(samples)).zfill(3))
+          del record["index"]
+          samples.append(record)
+    if len(samples) != self._nbSample:
+      raise ValueError("Missing sample " + str(len(samples)).zfill(3))
+    return samples
+
+  def LockAssembly(self):
+    '''
+    Try to become the generator assembling the data set
+    Output:
+      Return True if this generator must assemble the data set, False
+      if another one is doing it
+    '''
+    try:
+      os.close(os.open(os.path.join(self._folder, \
+        self._assembleFileName), os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+      return True
+    except (FileExistsError, FileNotFoundError):
+      return False
+
+  def Remove(self):
+    '''
+    Remove the leases and records once the data set is assembled
+    '''
+    shutil.rmtree(self._folder, ignore_errors = True)
+
+class LazyDataSet:
+  '''
+  Class giving access to the samples of a data set generated with 
+  -lazy, whose description file contains only the metadata. A sample is
+  rendered the first time it is accessed, with its index as the clock
+  like in a complete generation, and its files and description are kept
+  in the output folder to be served from there afterwards. The samples
+  about to be accessed can be rendered ahead by a pool of threads with
+  Prefetch(). The data set can't be opened if its pov file or template
+  have changed since its generation.
+  '''
+  # Name of the file where the samples are recorded once rendered
+  _recordFileName = "lazy.jsonl"
+
+  def __init__(self, outFolder, nbJobs = 4, prefetch = 16):
+    '''
+    Constructor
+    Inputs:
+      'outFolder': the full path of the folder of the data set
+      'nbJobs': the number of samples rendered in parallel
+      'prefetch': the maximum number of samples rendered ahead
+    '''
+    self._folder = outFolder
+    self._prefetch = max(1, prefetch)
+    descFilePath = os.path.join(outFolder, DataSetGenerator._descFileName)
+    self._dataSet = DataSet(descFilePath)
+    if not self._dataSet.LoadDescFile(descFilePath) or \
+      self._dataSet._lazy is None:
+      raise ValueError(outFolder + " is not a lazy data set")
+    self._nbSample = int(self._dataSet._nbSample)
+
+    # Create the renderer used by the generation
+    self._renderer = \
+      DataSetGenerator._renderers[self._dataSet._lazy["renderer"]]()
+    self._renderer.Check()
+
+    # Refuse to open the data set if its pov file, template, included
+    # files or renderer have changed since its generation, the samples
+    # rendered from them being else inconsistent with its metadata and
+    # the samples already rendered
+    generator = DataSetGenerator([])
+    generator._renderer = self._renderer
+    generator._lazy = True
+    povFilePath = os.path.join(self._dataSet._lazy["povFolder"], \
+      self._dataSet._name + ".pov")
+    fingerprint = generator.GetFingerprint(povFilePath, \
+      povFilePath[0:-4] + ".json")[0]
+    if fingerprint != generator.LoadFingerprint(outFolder)[0]:
+      raise ValueError(povFilePath + ", its template, included files " + \
+        "or renderer have changed since the generation of " + outFolder + \
+        ", generate it again")
+
+    # Start the renderer
+    self._renderer.Start(nbJobs)
+    self._dataSet.SetRenderer(self._renderer)
+
+    # Load the samples already rendered, whose files still exist, and
+    # init the renderings in progress, stopping the renderer if it fails
+    try:
+      self._samples = {}
+      try:
+        with open(os.path.join(outFolder, self._recordFileName), \
+          "r") as fp:
+          for line in fp:
+            try:
+              record = json.loads(line)
+            except:
+              continue
+            iSample = record.pop("index")
+            if all(os.path.exists(os.path.join(outFolder, f)) for f in \
+              [record["img"]] + record["mask"]):
+              self._samples[iSample] = record
+      except FileNotFoundError:
+        pass
+      self._lock = threading.Lock()
+      self._pending = {}
+      self._executor = concurrent.futures.ThreadPoolExecutor( \
+        max_workers = max(1, nbJobs))
+    except:
+      self._renderer.Stop()
+      raise
+
+  def GetNbSample(self):
+    '''
+    Get the number of samples of the data set
+    Output:
+      Return the number of samples
+    '''
+    return self._nbSample
+
+  def GetSample(self, iSample):
+    '''
+    Get the description of a sample, rendering it if it's the first 
+    time it is accessed
+    Inputs:
+      'iSample': the index of the sample
+    Output:
+      Return the description of the sample, as in the description file
+    '''
+    if iSample < 0 or iSample >= self._nbSample:
+      raise IndexError("Sample index out of range: " + str(iSample))
+    with self._lock:
+      if iSample in self._samples:
+        return self._samples[iSample]
+      future = self.Submit(iSample)
+    sample = future.result()
+    if sample is None:
+      raise IOError("Can't render the sample " + str(iSample).zfill(3) + \
+        " of " + self._folder)
+    return sample
+
+  def Prefetch(self, indices):
+    '''
+    Render ahead the samples about to be accessed, keeping at most
+    'prefetch' samples rendering
+    Inputs:
+      'indices': the indices of the samples, in the order they will be
+        accessed
+    '''
+    with self._lock:
+      for iSample in indices:
+        if len(self._pending) >= self._prefetch:
+          break
+        if 0 <= iSample < self._nbSample and \
+          not iSample in self._samples:
+          self.Submit(iSample)
+
+  def Submit(self, iSample):
+    '''
+    Start the rendering of a sample if it's not already in progress,
+    called with the lock held
+    Inputs:
+      'iSample': the index of the sample
+    Output:
+      Return the future of the description of the sample
+    '''
+    if not iSample in self._pending:
+      self._pending[iSample] = \
+        self._executor.submit(self.RenderSample, iSample)
+    return self._pending[iSample]
+
+  def RenderSample(self, iSample):
+    '''
+    Render a sample and record it
+    Inputs:
+      'iSample': the index of the sample
+    Output:
+      Return the description of the sample, None if the rendering has
+      failed
+    '''
+    log = []
+    sample = self._dataSet.RenderSample(self._dataSet._lazy["povFolder"], \
+      self._folder, iSample, log)
+    with self._lock:
+      del self._pending[iSample]
+      if sample is None:
+        for msg in log:
+          print(msg)
+        return None
+      self._samples[iSample] = sample
+      record = dict(sample)
+      record["index"] = iSample
+      with open(os.path.join(self._folder, self._recordFileName), \
+        "a") as fp:
+        fp.write(json.dumps(record, sort_keys = True) + "\n")
+    return sample
+
+  def Close(self):
+    '''
+    Wait for the renderings in progress and stop the renderer
+    '''
+    try:
+      self._executor.shutdown(wait = True)
+    finally:
+      self._renderer.Stop()
+
+class DataSetGenerator:
+  '''
+  Class to generate the data sets
+  '''
+  # Folder containing the POV files
+  # Only files matching dataSet-[0-9][0-9][0-9]-[0-9][0-9][0-9].pov are
+  # processed
+  _povFolder = os.path.join(BASE_DIR, "POV")
+  # Folder containing the data sets
+  _dataSetFolder = os.path.join(BASE_DIR, "DataSets")
+  # Flag to memorize if the data sets are generated even if their
+  # description file is younger than their pov file
+  _force = False
+  # Name of the description file
+  _descFileName = "dataset.json"
+  # Variables to memorize the successful generation
+  _successDataSets = []
+  # Variables to memorize the failed generation
+  _failedDataSets = []
+  # Variables to memorize the skipped generation
+  _skipDataSets = []
+  # Variable to memorize if we are in simulation mode
+  _simul = False
+  # Variable to memorize if we are in listing mode
+  _list = False
+  # Number of samples rendered in parallel
+  _nbJobs = 1
+  # Number of consecutive samples rendered by one call to POV-Ray
+  _nbBatch = 1
+  # Variable to memorize if we are in annotation mode
+  _annotate = False
+  # Name of the file where the fingerprint of a data set is saved
+  _fingerprintFileName = "fingerprint.json"
+  # Cache of the hash of files, per path, modification time and size
+  _hashCache = {}
+  # Folder of the render cache, None if there is no cache
+  _cacheFolder = None
+  # Maximum size of the render cache in MB
+  _cacheSize = 10240
+  # Render cache
+  _cache = None
+  # Variable to memorize if we are in export mode
+  _export = False
+  # Variable to memorize if the data sets are exported once generated
+  _autoExport = False
+  # Size of the queues of the render pipeline, 0 if the pipeline is 
+  # not used
+  _queueSize = 0
+  # Variable to memorize if the generation is profiled
+  _profile = False
+  # Profiler of the generation
+  _profiler = None
+  # Renderers which can be used, and the one used to render the data
+  # sets
+  _renderers = {"povray":PovRayRenderer, "numpy":NumPyRenderer}
+  _renderer = None
+  # Variable to memorize if the data sets are rendered in cooperation
+  # with other generators sharing the output folder
+  _cooperate = False
+  # Time in seconds after which the lease of a chunk of samples expires
+  # if it's not renewed
+  _leaseTime = 600.0
+  # Number of samples per chunk claimed by a cooperating generator
+  _claimSize = 10
+  # Shard (index, number of shards) of the samples rendered, None to
+  # render all the samples
+  _shard = None
+  # Range (first, last + 1) of the samples rendered, None to render all
+  # the samples, the last one being None for the end of the data set
+  _range = None
+  # Variable to memorize if we are in merge mode
+  _merge = False
+  # Variable to memorize if the samples are rendered when they are 
+  # accessed instead of by the generation
+  _lazy = False
+  # Variable to memorize if the samples are written in the description
+  # files instead of their manifest
+  _legacyDesc = False
+  # Variable to memorize if we are in statistics mode
+  _stats = False
+  # Format and compression level (format, level) of the images and 
+  # masks in transcoding mode, None if we are not in this mode
+  _transcode = None
+  # Format and compression level (format, level) into which the images
+  # and masks are transcoded once generated, None to keep the ones of 
+  # POV-Ray
+  _autoTranscode = None
+  # Variable to memorize if the files are captured into memory from the
+  # renderer instead of being written by the renderer and read back
+  _capture = False
+  # Number of samples of each data set rendered in draft mode, None if
+  # we are not in this mode
+  _draft = None
+  # Scale of the dimensions of the images rendered in draft mode
+  _draftScale = 0.25
+  # Folder where the drafts are rendered
+  _draftFolder = os.path.join(BASE_DIR, "Drafts")
+  # Options of POV-Ray used to render the images in draft mode
+  _draftOptions = ["-D", "-P", "-Q4", "-A"]
+  # Name of the contact sheet of a draft, size [width, height] of the 
+  # index of the samples on it, and colors (BGR) of the bounding boxes
+  # of the masks
+  _contactSheetFileName = "contactSheet.png"
+  _contactSheetLabel = [24, 12]
+  _contactSheetColors = [(0, 0, 255), (0, 192, 0), (255, 0, 0), \
+    (0, 192, 255), (255, 0, 255), (255, 192, 0), (0, 0, 128)]
+  # Catalog of the data sets of the output folder, and stamp of the 
+  # renderer and its options for its entries
+  _catalog = None
+  _catalogEnvironment = None
+  # Labels of the components of the fingerprint
+  _fingerprintLabels = {"pov":"pov file", "template":"template", \
+    "includes":"included files", "flags":"render options", \
+    "povray":"renderer version"}
+
+  def __init__(self, args):
+    '''
+    Constructor
+    Inputs:
+      'args': the arguments passed to this script
+    '''
+    try:
+
+      # Init a flag to memorize if the user requested unit tests
+      flagUnitTest = False
+
+      # Init the renderer
+      self._renderer = PovRayRenderer()
+
+      # Process arguments
+      for iArg in range (len(args)):
+        
+        # Help
+        if args[iArg] == "-help":
+          print("generateDataSet.py" + \
+            " [-in <povFolder|povFile>] [-out <dataSetFolder>]" + \
+            " [-force] [-simul] [-list] [-jobs <nb>] [-batch <nb>]" + \
+            " [-annotate] [-cache <cacheFolder>] [-cacheSize <MB>]" + \
+            " [-export] [-autoExport] [-pipeline <queueSize>]" + \
+            " [-profile] [-renderer <povray|numpy>]" + \
+            " [-cooperate] [-leaseTime <s>] [-claimSize <nb>]" + \
+            " [-shard <i/n>] [-range <start:end>] [-merge]" + \
+            " [-lazy] [-legacyDesc] [-stats]" + \
+            " [-transcode <format[:level]>]" + \
+            " [-autoTranscode <format[:level]>] [-capture]" + \
+            " [-draft <nb>] [-draftScale <scale>]" + \
+            " [-draftOut <draftFolder>] [-unitTest] [-help]")
+          print("-in: folder containing the pov files, or one pov file")
+          print("-out: folder where the data sets will be generated")
+          print("-force: don't check time stamp and always generate" + \
+            " all the data sets")
+          print("-simul: don't actually generate the data sets")
+          print("-list: display a list of the data sets")
+          print("-jobs: number of samples rendered in parallel, 0 to" + \
+            " use all the cores (default 1)")
+          print("-batch: number of consecutive samples rendered by" + \
+            " one call to POV-Ray, as the frames of an animation" + \
+            " (default 1)")
+          print("-annotate: calculate again the annotations of the" + \
+            " data sets in the output folder from their masks," + \
+            " without rendering")
+          print("-cache: folder of a render cache shared between" + \
+            " output folders")
+          print("-cacheSize: maximum size of the render cache in MB" + \
+            " (default 10240)")
+          print("-export: pack the images and masks of the data sets" + \
+            " in the output folder into memory mappable arrays," + \
+            " without rendering")
+          print("-autoExport: pack the images and masks of each data" + \
+            " set into memory mappable arrays once it is generated")
+          print("-pipeline: render, annotate and record the samples" + \
+            " of each data set with a pipeline whose stages are" + \
+            " connected by queues of the given size")
+          print("-profile: record the time spent in each phase of" + \
+            " the generation, saved in profile.json next to" + \
+            " dataset.json, and display a summary")
+          print("-renderer: renderer creating the images and masks," + \
+            " POV-Ray or synthetic ones drawn with NumPy for tests" + \
+            " (default povray)")
+          print("-cooperate: render the data sets together with the" + \
+            " other generators started with -cooperate on the same" + \
+            " output folder, on this host or others sharing it," + \
+            " each one claiming chunks of samples")
+          print("-leaseTime: time in seconds after which the chunk" + \
+            " claimed by a generator which has crashed is claimed" + \
+            " again (default 600)")
+          print("-claimSize: number of samples per chunk claimed by" + \
+            " a cooperating generator (default 10)")
+          print("-shard: render only the i-th (from 0) of n shards of" + \
+            " consecutive samples of each data set, and record them" + \
+            " in a partial description file")
+          print("-range: render only the samples from start to end" + \
+            " (excluded) of each data set, and record them in a" + \
+            " partial description file")
+          print("-merge: combine the partial description files of" + \
+            " the data sets in the output folder into their" + \
+            " description file, without rendering")
+          print("-lazy: create only the metadata of the data sets," + \
+            " their samples being rendered when they are first" + \
+            " accessed with LazyDataSet or DataSetReader")
+          print("-legacyDesc: write the samples in the description" + \
+            " file, as the previous versions, instead of the" + \
+            " manifest samples.jsonl it refers to")
+          print("-stats: calculate the statistics of the pixels of" + \
+            " the data sets in the output folder generated without" + \
+            " them, without rendering")
+          print("-transcode: encode again the images and masks of" + \
+            " the data sets in the output folder in png (with a" + \
+            " compression level from 0 to 9, default 3), lossless" + \
+            " webp or npy, without rendering")
+          print("-autoTranscode: encode the images and masks of each" + \
+            " data set in the given format once it is generated")
+          print("-capture: get the images and masks from the output" + \
+            " of the renderer, annotate them in memory and write" + \
+            " them once in their final format, instead of reading" + \
+            " back the files written by the renderer (the samples" + \
+            " are then rendered one by one)")
+          print("-draft: render a preview of each data set, made of" + \
+            " the given number of samples chosen at random, at" + \
+            " reduced resolution and quality, and tiled into" + \
+            " contactSheet.png in the draft folder, without using" + \
+            " the output folder")
+          print("-draftScale: scale of the dimensions of the images" + \
+            " of the drafts (default 0.25)")
+          print("-draftOut: folder where the drafts are rendered" + \
+            " (default Drafts)")
+          print("-unitTest: run the unit tests")
+          quit()
+        
+        # POV files folder
+        if args[iArg] == "-in":
+          folder = args[iArg + 1]
+          if os.path.exists(folder):
+            self._povFolder = os.path.abspath(folder)
+          else:
+            print("The folder/file " + str(folder) + " doesn't exists.")
+            quit()
+        
+        # DataSets folder
+        if args[iArg] == "-out":
+          folder = args[iArg + 1]
+          if os.path.exists(folder):
+            self._dataSetFolder = os.path.abspath(folder)
+          else:
             print("The folder " + str(folder) + " doesn't exists.")
             quit()
         
-        # Simulation mode, the sets are not actually rendered
-        if args[iArg] == "-simul":
-          self._simul = True
+        # Simulation mode, the sets are not actually rendered
+        if args[iArg] == "-simul":
+          self._simul = True
+        
+        # Force generation of all data sets even if their
+        # description file is younger than their pov file
+        if args[iArg] == "-force":
+          self._force = True
+        
+        # Listing mode
+        if args[iArg] == "-list":
+          self._list = True
+
+        # Annotation mode
+        if args[iArg] == "-annotate":
+          self._annotate = True
+
+        # Export mode
+        if args[iArg] == "-export":
+          self._export = True
+
+        # Export of the data sets once generated
+        if args[iArg] == "-autoExport":
+          self._autoExport = True
+
+        # Render cache
+        if args[iArg] == "-cache":
+          if iArg + 1 < len(args):
+            self._cacheFolder = os.path.abspath(args[iArg + 1])
+          else:
+            print("The folder of the render cache is missing.")
+            quit()
+
+        # Maximum size of the render cache
+        if args[iArg] == "-cacheSize":
+          try:
+            cacheSize = float(args[iArg + 1])
+          except:
+            cacheSize = 0
+          if cacheSize <= 0:
+            print("The size of the render cache must be a strictly " + \
+              "positive number.")
+            quit()
+          self._cacheSize = cacheSize
+
+        # Number of samples rendered in parallel
+        if args[iArg] == "-jobs":
+          try:
+            nbJobs = int(args[iArg + 1])
+          except:
+            nbJobs = -1
+          if nbJobs < 0:
+            print("The number of jobs must be a positive integer.")
+            quit()
+          if nbJobs == 0:
+            nbJobs = os.cpu_count()
+          self._nbJobs = nbJobs
+
+        # Number of consecutive samples rendered by one call to POV-Ray
+        if args[iArg] == "-batch":
+          try:
+            nbBatch = int(args[iArg + 1])
+          except:
+            nbBatch = 0
+          if nbBatch < 1:
+            print("The number of samples per batch must be a " + \
+              "strictly positive integer.")
+            quit()
+          self._nbBatch = nbBatch
+
+        # Render pipeline
+        if args[iArg] == "-pipeline":
+          try:
+            queueSize = int(args[iArg + 1])
+          except:
+            queueSize = 0
+          if queueSize < 1:
+            print("The size of the queues of the pipeline must be a " + \
+              "strictly positive integer.")
+            quit()
+          self._queueSize = queueSize
+
+        # Profiling
+        if args[iArg] == "-profile":
+          self._profile = True
+
+        # Renderer
+        if args[iArg] == "-renderer":
+          if iArg + 1 < len(args) and args[iArg + 1] in self._renderers:
+            self._renderer = self._renderers[args[iArg + 1]]()
+          else:
+            print("The renderer must be one of " + \
+              ", ".join(self._renderers) + ".")
+            quit()
+
+        # Cooperative rendering
+        if args[iArg] == "-cooperate":
+          self._cooperate = True
+
+        # Lease time of the chunks claimed by cooperating generators
+        if args[iArg] == "-leaseTime":
+          try:
+            leaseTime = float(args[iArg + 1])
+          except:
+            leaseTime = 0
+          if leaseTime <= 0:
+            print("The lease time must be a strictly positive number.")
+            quit()
+          self._leaseTime = leaseTime
+
+        # Number of samples per chunk claimed by cooperating generators
+        if args[iArg] == "-claimSize":
+          try:
+            claimSize = int(args[iArg + 1])
+          except:
+            claimSize = 0
+          if claimSize < 1:
+            print("The number of samples per chunk must be a " + \
+              "strictly positive integer.")
+            quit()
+          self._claimSize = claimSize
+
+        # Shard of the samples rendered
+        if args[iArg] == "-shard":
+          try:
+            (iShard, nbShard) = [int(v) for v in \
+              args[iArg + 1].split("/")]
+          except:
+            (iShard, nbShard) = (-1, 0)
+          if iShard < 0 or iShard >= nbShard:
+            print("The shard must be given as i/n, with 0 <= i < n.")
+            quit()
+          self._shard = (iShard, nbShard)
+
+        # Range of the samples rendered
+        if args[iArg] == "-range":
+          try:
+            (first, last) = args[iArg + 1].split(":")
+            first = int(first) if first != "" else 0
+            last = int(last) if last != "" else None
+          except:
+            (first, last) = (-1, None)
+          if first < 0 or (last is not None and last <= first):
+            print("The range must be given as start:end, with " + \
+              "0 <= start < end.")
+            quit()
+          self._range = (first, last)
+
+        # Merge mode
+        if args[iArg] == "-merge":
+          self._merge = True
+
+        # Lazy mode
+        if args[iArg] == "-lazy":
+          self._lazy = True
+
+        # Samples written in the description files
+        if args[iArg] == "-legacyDesc":
+          self._legacyDesc = True
+
+        # Statistics mode
+        if args[iArg] == "-stats":
+          self._stats = True
+
+        # Capture of the files into memory
+        if args[iArg] == "-capture":
+          self._capture = True
+
+        # Draft mode
+        if args[iArg] == "-draft":
+          try:
+            nbDraft = int(args[iArg + 1])
+          except:
+            nbDraft = 0
+          if nbDraft < 1:
+            print("The number of samples of the drafts must be a " + \
+              "strictly positive integer.")
+            quit()
+          self._draft = nbDraft
+
+        # Scale of the drafts
+        if args[iArg] == "-draftScale":
+          try:
+            scale = float(args[iArg + 1])
+          except:
+            scale = 0.0
+          if scale <= 0.0 or scale > 1.0:
+            print("The scale of the drafts must be in ]0, 1].")
+            quit()
+          self._draftScale = scale
+
+        # Drafts folder
+        if args[iArg] == "-draftOut":
+          self._draftFolder = os.path.abspath(args[iArg + 1])
+
+        # Transcoding mode, and transcoding of the data sets once 
+        # generated
+        if args[iArg] in ["-transcode", "-autoTranscode"]:
+          try:
+            (fileFormat, level) = (args[iArg + 1] + ":3").split(":")[0:2]
+            level = int(level)
+          except:
+            (fileFormat, level) = (None, -1)
+          if not fileFormat in DataSet._transcodeFormats or \
+            level < 0 or level > 9:
+            print("The format must be given as format[:level], with " + \
+              "format in " + ", ".join(DataSet._transcodeFormats) + \
+              " and 0 <= level <= 9.")
+            quit()
+          if args[iArg] == "-transcode":
+            self._transcode = (fileFormat, level)
+          else:
+            self._autoTranscode = (fileFormat, level)
+
+        # Unit tests
+        if args[iArg] == "-unitTest":
+          flagUnitTest = True
+
+      # Check the options of the partial rendering
+      if self._shard is not None and self._range is not None:
+        print("-shard and -range can't be used together.")
+        quit()
+      if self._cooperate and self.IsPartial():
+        print("-cooperate can't be used with -shard or -range.")
+        quit()
+      if self._lazy and (self._cooperate or self.IsPartial()):
+        print("-lazy can't be used with -cooperate, -shard or -range.")
+        quit()
+
+      # Run the unit tests if requested
+      if flagUnitTest:
+        self._renderer.Check()
+        ret = self.RunUnitTest()
+        quit(ret)
+
+    except Exception as exc:
+      PrintExc(exc)
+  
+  def Run(self):
+    '''
+    Generate the dataSets according to the properties of the 
+    DataSetGenerator 'self'
+    '''
+    try:
+
+      # Reset the successful/failed/skipped dataSets lists
+      self._successDataSets = []
+      self._failedDataSets = []
+      self._skippedDataSets = []
+
+      # If we are in annotation mode, annotate the data sets already
+      # generated instead of generating them
+      if self._annotate:
+        self.Annotate()
+        return None
+
+      # If we are in export mode, export the data sets already generated
+      # instead of generating them
+      if self._export:
+        self.Export()
+        return None
+
+      # If we are in merge mode, combine the partial description files
+      # of the data sets already generated instead of generating them
+      if self._merge:
+        self.Merge()
+        return None
+
+      # If we are in statistics mode, calculate the statistics of the 
+      # data sets already generated instead of generating them
+      if self._stats:
+        self.Stats()
+        return None
+
+      # If we are in transcoding mode, encode again the images and masks
+      # of the data sets already generated instead of generating them
+      if self._transcode is not None:
+        self.Transcode()
+        return None
+
+      # Get the list of POV files path
+      # If the -in argument was a pov file, consider only this file,
+      # else consider the pov files in the folder
+      if self._povFolder[-4:] == ".pov":
+        pattern = re.compile(
+          "dataset-[0-9][0-9][0-9]-[0-9][0-9][0-9].pov")
+        if pattern.match(os.path.basename(self._povFolder)):
+          povFilePaths = [self._povFolder]
+        else:
+          print("\nThe pov file \n  " + self._povFolder + \
+            "\ndoesn't match " + \
+            "dataset-[0-9][0-9][0-9]-[0-9][0-9][0-9].pov\n")
+          return None
+      else:
+        povFilePaths = glob.glob(os.path.join(self._povFolder, \
+          "dataset-[0-9][0-9][0-9]-[0-9][0-9][0-9].pov"))
+
+      # Sort the list of POV files path
+      povFilePaths.sort()
+      
+      # If there are no Pov files in the input folder, inform the user
+      # and stop
+      if len(povFilePaths) == 0:
+        print("\nNo Pov files in\n  " + self._povFolder + \
+          "\nmatching dataset-[0-9][0-9][0-9]-[0-9][0-9][0-9].pov\n")
+        return None
+
+      # If we are in draft mode, render a preview of the data sets in
+      # the draft folder instead of generating them
+      if self._draft is not None:
+        self.Draft(povFilePaths)
+        return None
+
+      # Load the catalog of the data sets of the output folder
+      self._catalog = Catalog(self._dataSetFolder)
+      
+      # Open the render cache if requested
+      if self._cacheFolder is not None and not self._simul and \
+        not self._list:
+        self._cache = RenderCache(self._cacheFolder, \
+          int(self._cacheSize * 1048576))
+
+      # Create the profiler if requested
+      if self._profile and not self._simul and not self._list:
+        self._profiler = Profiler()
+
+      # Check and start the renderer
+      if not self._simul and not self._list:
+        self._renderer.Check()
+        self._renderer.Start(self._nbJobs)
+
+      # Init the list of data sets rendered together
+      scheduledDataSets = []
+
+      # Loop on the POV file pathes
+      for povFilePath in povFilePaths:
+        
+        # Get the filename of the pov file
+        povFileName = os.path.basename(povFilePath)
+        
+        # Get the path to the input folder
+        inFolder = os.path.dirname(povFilePath)
+        
+        # Get the path to the template of the description file
+        templateFilePath = povFilePath[0:-4] + ".json"
+        
+        # Get the dataSet group number from the file name
+        groupNum = povFileName[8:11]
+      
+        # Get the dataSet subgroup number from the file name
+        subGroupNum = povFileName[12:15]
+
+        # Get the name of the corresponding output folder
+        outFolder = os.path.join(self._dataSetFolder, \
+          groupNum, subGroupNum)
+        
+        # Get the path to the description file for this data set
+        descFilePath = os.path.join(outFolder, self._descFileName)
+        
+        # Check if the data set must be generated
+        entry = self.CheckDataSet(povFilePath, templateFilePath, \
+          outFolder, descFilePath)
+        isGenNecessary = (entry["generate"] == "1")
+        
+        # Init the list of samples resumed from an interrupted generation
+        resumedSamples = []
+
+        # If we are in listing mode
+        if self._list:
+          
+          # Print a mark to show if the set has been generated
+          if isGenNecessary:
+            prefix = "[ ]  "
+          else:
+            prefix = "[*]  "
+
+          # Print the set name and descrition, and why it is stale if
+          # it has been generated previously
+          if entry["staleReason"] == "":
+            print(prefix + entry["name"] + ": " + entry["desc"])
+          else:
+            print(prefix + entry["name"] + ": " + entry["desc"] + \
+              " (" + entry["staleReason"] + ")")
+
+          
+        # Else we are not in listing mode
+        else:
+          
+          # If the generation is necessary or forced for this data set
+          if isGenNecessary or self._force:
+            
+            # If we are not in simulation or listing mode
+            if not self._simul and not self._list:
+              
+              # Ensure the output folder exists, it may be created at the
+              # same time by the generators rendering the data set in
+              # cooperation or rendering its other parts
+              os.makedirs(outFolder, exist_ok = True)
+              
+              # Get the samples already rendered by an interrupted 
+              # generation, unless the generation is forced or rendered
+              # in cooperation (the chunks already rendered are then
+              # recorded by the other generators)
+              if not self._force and not self._cooperate and \
+                not self.IsPartial() and os.path.exists(templateFilePath):
+                resumedSamples = DataSet(templateFilePath).LoadJournal( \
+                  outFolder, self.GetGenerationKey(povFilePath, \
+                  templateFilePath))
+              keptFileNames = set()
+              for sample in resumedSamples:
+                keptFileNames.add(sample["img"])
+                keptFileNames.update(sample["mask"])
+              
+              # Ensure the output folder is empty of the description file 
+              # and images, except the ones of the resumed samples, and of
+              # the temporary files of an interrupted generation. In
+              # cooperation or when only a part of the samples are 
+              # rendered, the files may be the ones rendered by the other
+              # generators and are overwritten instead.
+              if not self._cooperate and not self.IsPartial():
+                profile = self.StartProfile()
+                try:
+                  os.remove(os.path.join(outFolder, self._descFileName))
+                except:
+                  pass
+                for pattern in ["img*.*", "mask*.*", "label*.*", \
+                  "frame*.*", "pov*.ini", "images.npy*", "tensors.json", \
+                  "profile.json", "lazy.jsonl", "index.npz"]:
+                  for f in glob.glob(os.path.join(outFolder, pattern)):
+                    if not os.path.basename(f) in keptFileNames:
+                      try:
+                        os.remove(f)
+                      except:
+                        pass
+                self.StopProfile(profile, outFolder, "cleanup")
+            
+            # If we are not in listing mode
+            if not self._list:
+
+              # If the data set is rendered in cooperation with other
+              # generators, render the chunks claimed by this one
+              if self._cooperate and not self._simul:
+                self.GenerateCooperative(povFilePath, outFolder, \
+                  descFilePath, templateFilePath, inFolder, \
+                  entry["fingerprint"])
+
+              # If only a part of the samples are rendered, render them
+              # and record them in a partial description file
+              elif self.IsPartial() and not self._simul:
+                self.GeneratePart(povFilePath, outFolder, \
+                  templateFilePath, inFolder)
+
+              # If the samples are rendered in parallel without the
+              # pipeline, queue this data set to render it together with
+              # the other ones (except in capture mode, where the files
+              # of a sample must be rendered together to not keep many
+              # of them in memory)
+              elif self._nbJobs > 1 and self._queueSize == 0 and \
+                not self._simul and not self._lazy and not self._capture:
+                scheduledDataSets.append((povFilePath, povFileName, \
+                  groupNum, subGroupNum, outFolder, descFilePath, \
+                  templateFilePath, inFolder, resumedSamples))
+
+              # Else, generate this data set
+              else:
+                self.Generate(povFilePath, povFileName, groupNum, \
+                  subGroupNum, outFolder, descFilePath, \
+                  templateFilePath, inFolder, resumedSamples)
+          
+          # Else, the generation of this data set is skipped
+          else:
+            
+            # If we are not in listing mode
+            if not self._list:
+
+              # Append this data set to the list of skipped data sets
+              self._skipDataSets.append(povFilePath)
+
+      # Generate the data sets rendered together
+      if len(scheduledDataSets) > 0:
+        self.GenerateScheduled(scheduledDataSets)
+
+      # Save the catalog updated by the checks and the generations
+      self._catalog.Save()
+
+      # If we are not in listing mode
+      if not self._list:
+
+        # If some generation were successful
+        if len(self._successDataSets) > 0:
+          
+          # Inform the user
+          print("\nThe following data sets were " + \
+            "generated successfully:")
+          for d in self._successDataSets:
+            print("  " + d)
+            
+        # If some generation failed
+        if len(self._failedDataSets) > 0:
+          
+          # Inform the user
+          print("\nThe following data sets couldn't be " + \
+            "generated successfully:")
+          for d in self._failedDataSets:
+            print("  " + d)
+            
+        # If some generation were skipped
+        if len(self._skipDataSets) > 0:
+          
+          # Inform the user
+          print("\nThe following data sets were skipped:")
+          for d in self._skipDataSets:
+            print("  " + d)
+
+        # Skip a line
+        print("")
+
+        # Save and display the statistics of the render cache
+        if self._cache is not None:
+          self._cache.SaveStats()
+
+        # Display the summary of the profile, the totals per data set
+        # overlapping if they are rendered together, and including the 
+        # wait for the other generators in cooperation
+        if self._profiler is not None:
+          remarks = []
+          if len(scheduledDataSets) > 1:
+            remarks.append("overlapping, the data sets being rendered " + \
+              "together")
+          if self._cooperate:
+            remarks.append("including the wait for the other generators")
+          self._profiler.PrintSummary(", ".join(remarks))
+    
+    except Exception as exc:
+      PrintExc(exc)
+
+    finally:
+
+      # Stop the renderer, even if the generation has been interrupted
+      self._renderer.Stop()
+  
+  def Draft(self, povFilePaths):
+    '''
+    Render a preview of the data sets to check their scene: a random 
+    subset of their samples, at a reduced resolution and quality, tiled
+    into a contact sheet. The previews are rendered in the draft folder,
+    the output folder and the state of the data sets are not used.
+    Inputs:
+      'povFilePaths': the list of full paths of the pov files
+    '''
+    try:
+
+      # Check and start the renderer
+      self._renderer.Check()
+      self._renderer.Start(self._nbJobs)
+
+      # Loop on the POV file pathes
+      for povFilePath in povFilePaths:
+        
+        # Get the paths to the input folder, the template and the draft
+        # folder of this data set
+        povFileName = os.path.basename(povFilePath)
+        inFolder = os.path.dirname(povFilePath)
+        templateFilePath = povFilePath[0:-4] + ".json"
+        draftFolder = os.path.join(self._draftFolder, povFileName[8:11], \
+          povFileName[12:15])
+        print("\n === Draft of\n  " + povFilePath + "\nto\n  " + \
+          draftFolder)
+        print("")
+        if not os.path.exists(templateFilePath):
+          print("The template file\n  " + templateFilePath + \
+            "\ndoesn't exist. Give up.")
+          self._failedDataSets.append(povFilePath)
+          continue
+
+        # Empty the draft folder of the previous preview
+        if os.path.exists(draftFolder):
+          shutil.rmtree(draftFolder)
+        os.makedirs(draftFolder)
+
+        # Load the template and reduce the resolution and quality of the
+        # images
+        dataSet = DataSet(templateFilePath)
+        dataSet.SetRenderer(self._renderer)
+        dataSet.SetCapture(self._capture)
+        dataSet._dim = {"_dim":"2", "_val":[str(max(1, \
+          int(round(float(v) * self._draftScale)))) \
+          for v in dataSet._dim["_val"]]}
+        dataSet._imageOptions = self._draftOptions
+
+        # Choose the samples at random
+        nbSample = int(dataSet._nbSample)
+        indices = sorted(numpy.random.choice(nbSample, \
+          min(self._draft, nbSample), replace = False).tolist())
+
+        # Render the samples in parallel, the messages of each sample 
+        # being printed in their order
+        logs = [[] for iRender in indices]
+        with concurrent.futures.ThreadPoolExecutor( \
+          max_workers = max(1, self._nbJobs)) as executor:
+          futures = [executor.submit(dataSet.RenderSample, inFolder, \
+            draftFolder, indices[i], logs[i]) for i in range(len(indices))]
+          samples = [future.result() for future in futures]
+        for log in logs:
+          for msg in log:
+            print(msg)
+        if any(sample is None for sample in samples):
+          print("The rendering of \n  " + povFilePath + \
+            "\nhas failed. Give up.")
+          self._failedDataSets.append(povFilePath)
+          continue
+
+        # Create the contact sheet
+        sheetFilePath = os.path.join(draftFolder, \
+          self._contactSheetFileName)
+        sheet = self.MakeContactSheet(dataSet, draftFolder, indices, \
+          samples)
+        if WriteImage(sheetFilePath, sheet):
+          self._successDataSets.append(sheetFilePath)
+        else:
+          self._failedDataSets.append(povFilePath)
+
+      # Inform the user
+      if len(self._successDataSets) > 0:
+        print("\nThe contact sheets of the following drafts were " + \
+          "created successfully:")
+        for d in self._successDataSets:
+          print("  " + d)
+      if len(self._failedDataSets) > 0:
+        print("\nThe drafts of the following data sets couldn't be " + \
+          "created successfully:")
+        for d in self._failedDataSets:
+          print("  " + d)
+      print("")
+
+    except Exception as exc:
+      PrintExc(exc)
+
+    finally:
+
+      # Stop the renderer, even if the drafts have been interrupted
+      self._renderer.Stop()
+
+  def MakeContactSheet(self, dataSet, draftFolder, indices, samples):
+    '''
+    Tile the images of the samples rendered in draft mode into one 
+    image, each one below its index and with the bounding boxes of its
+    masks
+    Inputs:
+      'dataSet': the DataSet of the draft
+      'draftFolder': the folder where the samples have been rendered
+      'indices': the list of indices of the samples
+      'samples': the list of descriptions of the samples
+    Output:
+      Return the contact sheet as a numpy array (BGR order)
+    '''
+    
+    # Get the layout of the contact sheet, the tiles being wide enough
+    # to display the index of their sample
+    width = int(dataSet._dim["_val"][0])
+    height = int(dataSet._dim["_val"][1])
+    nbCol = int(numpy.ceil(numpy.sqrt(len(samples))))
+    nbRow = (len(samples) + nbCol - 1) // nbCol
+    tileWidth = max(width, self._contactSheetLabel[0]) + 2
+    tileHeight = height + self._contactSheetLabel[1] + 2
+    sheet = numpy.full((nbRow * tileHeight, nbCol * tileWidth, 3), 255, \
+      dtype = numpy.uint8)
+    
+    # Loop on the samples
+    for iTile in range(len(samples)):
+
+      # Load the image, a missing one being left blank
+      sample = samples[iTile]
+      img = ReadImage(os.path.join(draftFolder, sample["img"]))
+      if img is None:
+        img = numpy.full((height, width, 3), 255, dtype = numpy.uint8)
+
+      # Draw the bounding box of each mask, from its yolo format
+      for iMask in range(len(sample["bounding"])):
+        if len(sample["bounding"][iMask]) == 4:
+          xCenter, yCenter, boxWidth, boxHeight = \
+            [float(v) for v in sample["bounding"][iMask]]
+          x0 = int(round(xCenter * width - 0.5 * (boxWidth * width - 1)))
+          y0 = int(round(yCenter * height - 0.5 * (boxHeight * height - 1)))
+          x1 = x0 + int(round(boxWidth * width)) - 1
+          y1 = y0 + int(round(boxHeight * height)) - 1
+          color = self._contactSheetColors[iMask % \
+            len(self._contactSheetColors)]
+          cv2.rectangle(img, (x0, y0), (x1, y1), color, 1)
+
+      # Copy the image and its index into its tile
+      x = (iTile % nbCol) * tileWidth + 1
+      y = (iTile // nbCol) * tileHeight + 1
+      cv2.putText(sheet, str(indices[iTile]).zfill(3), \
+        (x + 1, y + self._contactSheetLabel[1] - 3), \
+        cv2.FONT_HERSHEY_SIMPLEX, 0.35, (0, 0, 0), 1)
+      y += self._contactSheetLabel[1]
+      sheet[y:y + height, x:x + width] = img
+    
+    # Return the contact sheet
+    return sheet
+
+  def ForEachGenerated(self, action, verb, progress = None, \
+    subject = "The following data sets"):
+    '''
+    Apply an action to the data sets already generated in the output
+    folder, skipping the lazy ones, and inform the user of the result
+    Inputs:
+      'action': the function called with the loaded data set and its
+        output folder, returning True if it succeeded, False else
+      'verb': the past participle describing the action to the user
+      'progress': the message printed before the output folder of each
+        data set, or None to print nothing
+      'subject': the subject of the final report to the user
+    '''
+    try:
+
+      # Get the list of description files in the output folder
+      descFilePaths = glob.glob(os.path.join(self._dataSetFolder, \
+        "[0-9][0-9][0-9]", "[0-9][0-9][0-9]", self._descFileName))
+      descFilePaths.sort()
+      
+      # Loop on the description files
+      for descFilePath in descFilePaths:
         
-        # Force generation of all data sets even if their
-        # description file is younger than their pov file
-        if args[iArg] == "-force":
-          self._force = True
+        # Load the data set, skipping the lazy ones
+        outFolder = os.path.dirname(descFilePath)
+        dataSet = DataSet(descFilePath)
+        if dataSet._lazy is not None:
+          continue
+        if progress is not None:
+          print(progress + " " + outFolder + " ...")
+        if not dataSet.LoadDescFile(descFilePath):
+          self._failedDataSets.append(outFolder)
+          continue
+
+        # Apply the action to the data set
+        if action(dataSet, outFolder):
+          self._successDataSets.append(outFolder)
+        else:
+          self._failedDataSets.append(outFolder)
+      
+      # Inform the user
+      self.ReportGenerated(verb, subject)
+
+    except Exception as exc:
+      PrintExc(exc)
+
+  def ReportGenerated(self, verb, subject = "The following data sets"):
+    '''
+    Print the lists of data sets processed successfully or not
+    Inputs:
+      'verb': the past participle describing the processing
+      'subject': the subject of the report
+    '''
+    if len(self._successDataSets) > 0:
+      print("\n" + subject + " were " + verb + " successfully:")
+      for d in self._successDataSets:
+        print("  " + d)
+    if len(self._failedDataSets) > 0:
+      print("\n" + subject + " couldn't be " + verb + " successfully:")
+      for d in self._failedDataSets:
+        print("  " + d)
+    print("")
+
+  def Annotate(self):
+    '''
+    Calculate again the annotations of the data sets already generated
+    in the output folder, from their masks and without rendering them
+    '''
+    self.ForEachGenerated(self.AnnotateGenerated, "annotated", "Annotate")
+
+  def AnnotateGenerated(self, dataSet, outFolder):
+    '''
+    Calculate again the annotations of a data set already generated
+    Inputs:
+      'dataSet': the data set loaded from its description file
+      'outFolder': the output folder of the data set
+    Output:
+      Return True
+    '''
+
+    # Annotate the samples and update the manifest or the description
+    # file
+    dataSet.Annotate(outFolder, self._nbJobs)
+    if not dataSet._legacyDesc:
+      dataSet.SaveManifest(outFolder)
+    dataSet._stats = dataSet.GetStats(outFolder)
+    with open(os.path.join(outFolder, self._descFileName), "w") as fp:
+      fp.write(dataSet.GetDescFileContent())
+    dataSet.SaveIndex(outFolder)
+    return True
+
+  def Export(self):
+    '''
+    Pack the images and masks of the data sets already generated in the
+    output folder into memory mappable arrays, without rendering them
+    '''
+    self.ForEachGenerated(lambda dataSet, outFolder: \
+      dataSet.Export(outFolder, self._nbJobs), "exported", "Export")
+
+  def Stats(self):
+    '''
+    Calculate the statistics of the pixels of the data sets already 
+    generated in the output folder by a version without them, without
+    rendering them
+    '''
+    self.ForEachGenerated(self.StatsGenerated, "calculated", \
+      "Calculate the statistics of", \
+      "The statistics of the following data sets")
+
+  def StatsGenerated(self, dataSet, outFolder):
+    '''
+    Calculate the statistics of the pixels of a data set already
+    generated
+    Inputs:
+      'dataSet': the data set loaded from its description file
+      'outFolder': the output folder of the data set
+    Output:
+      Return True
+    '''
+
+    # Calculate the statistics and update the description file
+    dataSet.ComputeStats(outFolder, self._nbJobs)
+    with open(os.path.join(outFolder, self._descFileName), "w") as fp:
+      fp.write(dataSet.GetDescFileContent())
+    dataSet.SaveIndex(outFolder)
+    return True
+
+  def Transcode(self):
+    '''
+    Encode again the images and masks of the data sets already 
+    generated in the output folder, without rendering them
+    '''
+    self.ForEachGenerated(self.TranscodeUpdate, "transcoded")
+
+  def TranscodeUpdate(self, dataSet, outFolder):
+    '''
+    Encode again the images and masks of a data set already generated,
+    and update its description file and index
+    Inputs:
+      'dataSet': the data set loaded from its description file
+      'outFolder': the output folder of the data set
+    Output:
+      Return True if all the samples have been transcoded, False else
+    '''
+
+    # Transcode the samples and update the description file and the
+    # index
+    ret = self.TranscodeGenerated(dataSet, outFolder, *self._transcode)
+    with open(os.path.join(outFolder, self._descFileName), "w") as fp:
+      fp.write(dataSet.GetDescFileContent())
+    dataSet.SaveIndex(outFolder)
+    return ret
+
+  def Merge(self):
+    '''
+    Combine the partial description files of the data sets in the 
+    output folder, rendered with -shard or -range, into their 
+    description file, without rendering
+    '''
+    try:
+
+      # Get the list of output folders with partial description files
+      partFilePaths = glob.glob(os.path.join(self._dataSetFolder, \
+        "[0-9][0-9][0-9]", "[0-9][0-9][0-9]", "part-[0-9]*-[0-9]*.json"))
+      outFolders = sorted(set(os.path.dirname(partFilePath) \
+        for partFilePath in partFilePaths))
+      
+      # Loop on the output folders
+      for outFolder in outFolders:
         
-        # Listing mode
-        if args[iArg] == "-list":
-          self._list = True
+        # Merge the partial description files of the data set
+        print("Merge " + outFolder + " ...")
+        if self.MergeParts(outFolder, sorted(partFilePath for \
+          partFilePath in partFilePaths \
+          if os.path.dirname(partFilePath) == outFolder)):
+          self._successDataSets.append(outFolder)
+        else:
+          self._failedDataSets.append(outFolder)
+      
+      # Inform the user
+      self.ReportGenerated("merged")
+
+    except Exception as exc:
+      PrintExc(exc)
+
+  def MergeParts(self, outFolder, partFilePaths):
+    '''
+    Combine the partial description files of a data set into its
+    description file, and remove them
+    Inputs:
+      'outFolder': the output folder where the data set is generated
+      'partFilePaths': the full paths to the partial description files
+    Output:
+      Return True if the partial description files cover all the
+      samples once and have been merged, False else
+    '''
+    try:
+
+      # Load the partial description files
+      parts = []
+      for partFilePath in partFilePaths:
+        with open(partFilePath, "r") as fp:
+          parts.append(json.load(fp))
+
+      # Check that the parts have been rendered from the same version of
+      # the pov file and template
+      if len(set(part["key"] for part in parts)) > 1:
+        print("The partial description files have been rendered " + \
+          "from different versions of the pov file or template.")
+        return False
+      
+      # Get the samples by index, checking that each one is in exactly
+      # one part
+      nbSample = int(parts[0]["nbSample"])
+      samples = [None] * nbSample
+      duplicates = []
+      for part in parts:
+        iFirst = int(part["sampleRange"][0])
+        for iSample in range(len(part["samples"])):
+          if iFirst + iSample >= nbSample or \
+            samples[iFirst + iSample] is not None:
+            duplicates.append(iFirst + iSample)
+          else:
+            samples[iFirst + iSample] = part["samples"][iSample]
+      missing = [iSample for iSample in range(nbSample) \
+        if samples[iSample] is None]
+      if len(duplicates) > 0 or len(missing) > 0:
+        if len(duplicates) > 0:
+          print("Duplicate samples: " + self.FormatIndices(duplicates))
+        if len(missing) > 0:
+          print("Missing samples: " + self.FormatIndices(missing))
+        return False
+
+      # Create the description file and the fingerprint
+      dataSet = DataSet(partFilePaths[0])
+      dataSet._name = parts[0]["dataSet"]
+      dataSet._legacyDesc = self._legacyDesc
+      dataSet.SetCapture(self._capture, self._autoTranscode)
+      dataSet._images = samples
+      dataSet.SaveManifest(outFolder, parts[0]["key"])
+      dataSet._stats = dataSet.GetStats(outFolder)
+      with open(os.path.join(outFolder, self._descFileName), "w") as fp:
+        fp.write(dataSet.GetDescFileContent())
+      with open(os.path.join(outFolder, self._fingerprintFileName), \
+        "w") as fp:
+        json.dump({"fingerprint":parts[0]["key"], \
+          "components":parts[0]["components"]}, fp, sort_keys = True, \
+          indent = 2)
+
+      # Create the index of the annotations
+      dataSet.SaveIndex(outFolder)
+
+      # Export the data set if requested
+      self.ExportGenerated(dataSet, outFolder)
+
+      # Remove the partial description files
+      for partFilePath in partFilePaths:
+        os.remove(partFilePath)
+      return True
+
+    except Exception as exc:
+      PrintExc(exc)
+      return False
+
+  @staticmethod
+  def FormatIndices(indices):
+    '''
+    Format a list of sample indices as ranges of consecutive ones
+    Inputs:
+      'indices': the sorted list of indices
+    Output:
+      Return the ranges as a string
+    '''
+    ranges = []
+    for index in indices:
+      if len(ranges) > 0 and ranges[-1][1] == index - 1:
+        ranges[-1][1] = index
+      else:
+        ranges.append([index, index])
+    return ", ".join(str(first).zfill(3) if first == last else \
+      str(first).zfill(3) + "-" + str(last).zfill(3) \
+      for (first, last) in ranges)
+
+  def StartProfile(self):
+    '''
+    Start to measure a phase of the generation if it is profiled
+    Output:
+      Return the start of the measure, or None if the generation is 
+      not profiled
+    '''
+    if self._profiler is None:
+      return None
+    return self._profiler.Start()
+
+  def StopProfile(self, start, outFolder, phase):
+    '''
+    Record a phase of the generation of a data set if it is profiled
+    Inputs:
+      'start': the value returned by StartProfile()
+      'outFolder': the output folder of the data set
+      'phase': the name of the phase
+    '''
+    if start is not None:
+      self._profiler.Stop(start, outFolder, phase)
+
+  def CompleteDataSet(self, dataSet, outFolder, descFilePath, \
+    povFilePath, templateFilePath, profile, fingerprint, components):
+    '''
+    Create the description file, the fingerprint, and if requested the
+    export and profile of a data set once all its samples are rendered
+    Inputs:
+      'dataSet': the generated DataSet
+      'outFolder': the output folder where the data set is generated
+      'descFilePath': the full path to the output description file
+      'povFilePath': the full path of the pov file
+      'templateFilePath': the full path to the template of the 
+        description file
+      'profile': the start of the measure of the generation of the data
+        set, returned by StartProfile()
+      'fingerprint', 'components': the fingerprint of the data set and
+        its components, returned by GetFingerprint() before rendering
+        the data set
+    '''
+    
+    # Load the samples recorded in the manifest if they are needed in
+    # the description file or for the export
+    if (dataSet._legacyDesc or self._autoExport or \
+      self._autoTranscode is not None) and dataSet._lazy is None and \
+      len(dataSet._images) < int(dataSet._nbSample):
+      dataSet.LoadManifest(outFolder)
+
+    # Transcode the images and masks if requested, and if the samples
+    # have been rendered and not already written in this format from 
+    # memory
+    if self._autoTranscode is not None and dataSet._lazy is None and \
+      not self._capture:
+      start = self.StartProfile()
+      self.TranscodeGenerated(dataSet, outFolder, *self._autoTranscode)
+      self.StopProfile(start, outFolder, "transcode")
+
+    # Get the statistics of the pixels, if the samples are rendered
+    if dataSet._lazy is None:
+      start = self.StartProfile()
+      dataSet._stats = dataSet.GetStats(outFolder)
+      self.StopProfile(start, outFolder, "stats")
+
+    # Create the description file
+    start = self.StartProfile()
+    with open(descFilePath, "w") as fp:
+      fp.write(dataSet.GetDescFileContent())
+    self.StopProfile(start, outFolder, "describe")
+
+    # Create the index of the annotations, if the samples are rendered
+    if dataSet._lazy is None:
+      start = self.StartProfile()
+      dataSet.SaveIndex(outFolder)
+      self.StopProfile(start, outFolder, "index")
+    
+    # Save the fingerprint of the data set, the one of the files it has
+    # been rendered from
+    start = self.StartProfile()
+    self.SaveFingerprint(outFolder, fingerprint, components)
+    self.StopProfile(start, outFolder, "fingerprint")
+
+    # Export the data set if requested, and if its samples have been
+    # rendered
+    if self._autoExport and dataSet._lazy is None:
+      start = self.StartProfile()
+      self.ExportGenerated(dataSet, outFolder)
+      self.StopProfile(start, outFolder, "export")
+    
+    # Update the entry of the data set in the catalog, which is stale if
+    # the files have been modified since they have been fingerprinted
+    if self._catalog is not None:
+      start = self.StartProfile()
+      self.CheckDataSet(povFilePath, templateFilePath, outFolder, \
+        descFilePath, False)
+      self.StopProfile(start, outFolder, "catalog")
+    
+    # Save the profile of the data set
+    self.StopProfile(profile, outFolder, "dataSet")
+    if self._profiler is not None:
+      self._profiler.Save(outFolder, outFolder)
+
+  def TranscodeGenerated(self, dataSet, outFolder, fileFormat, level):
+    '''
+    Encode again the images and masks of a data set already rendered,
+    and update its manifest
+    Inputs:
+      'dataSet': the DataSet, with its samples loaded
+      'outFolder': the output folder of the data set
+      'fileFormat': the format of the images and masks
+      'level': the compression level of the png format
+    Output:
+      Return True if all the files have been transcoded, False else
+    '''
+    DataSet.Log(None, "Transcode " + outFolder + " into " + \
+      fileFormat + " ...")
+    ret = dataSet.Transcode(outFolder, fileFormat, level, self._nbJobs)
+    if not ret:
+      DataSet.Log(None, "The transcoding of\n  " + outFolder + \
+        "\nhas failed for some files, kept in their previous format.")
+    if not dataSet._legacyDesc:
+      dataSet.SaveManifest(outFolder)
+    return ret
+
+  def ExportGenerated(self, dataSet, outFolder):
+    '''
+    Pack the images and masks of a data set just generated into memory
+    mappable arrays, if requested
+    Inputs:
+      'dataSet': the generated DataSet
+      'outFolder': the output folder where the data set is generated
+    '''
+    if self._autoExport:
+      DataSet.Log(None, "Export " + outFolder + " ...")
+      if not dataSet.Export(outFolder, self._nbJobs):
+        DataSet.Log(None, "The export of\n  " + outFolder + \
+          "\nhas failed.")
+
+  def Generate(self, povFilePath, povFileName, groupNum, \
+    subGroupNum, outFolder, descFilePath, templateFilePath, inFolder, \
+    resumedSamples = None):
+    '''
+    Generate one dataSet
+    Inputs:
+      'povFilePath': the full path of the pov file
+      'povFileName': the filename of the pov file
+      'groupNum': the dataSet group number from the file name
+      'subGroupNum': the dataSet subgroup number from the file name
+      'outFolder': the output folder where the data set is generated
+      'descFilePath': the full path to the output description file
+      'templateFilePath': the full path to the template of the 
+        description file
+      'inFolder': the input folder where the pov and template files are
+      'resumedSamples': the samples already rendered by an interrupted
+        generation, or None if there are none
+    '''
+    if resumedSamples is None:
+      resumedSamples = []
+    try:
+      
+      # Inform the user
+      print("\n === Generate data set for\n  " + povFilePath + \
+        "\nto\n  " + outFolder)
+
+      # Skip a line
+      print("")
+      
+      # If the template doesn't exist, add this dataSet to the failed 
+      # data sets, inform the user and give up
+      if not os.path.exists(templateFilePath):
+        print("The template file\n  " + templateFilePath + \
+          "\ndoesn't exist. Give up.")
+        self._failedDataSets.append(povFilePath)
+        return None
+
+      # In simulation mode, the data set is neither loaded nor rendered
+      if self._simul:
+        self._successDataSets.append(povFilePath)
+        print("\nGeneration of \n  " + outFolder + \
+          "\ncompleted.")
+        return None
+      
+      # Load the template file into a DataSet object
+      profile = self.StartProfile()
+      dataSet = DataSet(templateFilePath)
+      dataSet.SetProfiler(self._profiler, outFolder)
+      dataSet.SetRenderer(self._renderer)
+      dataSet._legacyDesc = self._legacyDesc
+      dataSet.SetCapture(self._capture, self._autoTranscode)
+
+      # Get the fingerprint of the files the data set is rendered from
+      fingerprint, components = \
+        self.GetFingerprint(povFilePath, templateFilePath)
+      
+      # If the samples are rendered when they are accessed, only record
+      # how to render them
+      if self._lazy and not self._simul:
+        dataSet._lazy = {"povFolder":inFolder, \
+          "renderer":self.GetRendererName()}
+        dataSet._images = []
+        self.CompleteDataSet(dataSet, outFolder, descFilePath, \
+          povFilePath, templateFilePath, profile, fingerprint, components)
+
+      # Else, if we are not in simulation mode
+      elif not self._simul:
+
+        # Inform the user if the generation is resumed
+        if len(resumedSamples) > 0:
+          print("Resume from sample " + str(len(resumedSamples)).zfill(3))
 
-        # Unit tests
-        if args[iArg] == "-unitTest":
-          flagUnitTest = True
+        # Generate the images and masks, recording them in the journal
+        dataSet.SetCache(self._cache, fingerprint)
+        dataSet.OpenJournal(outFolder, fingerprint, resumedSamples)
+        flagRender = dataSet.Render(inFolder, outFolder, self._nbJobs, \
+          self._nbBatch, len(resumedSamples), self._queueSize)
+        dataSet.CloseJournal()
+        
+        # Memorize the render times for the next generations
+        dataSet.SaveRenderTimes(outFolder)
+        
+        if not flagRender:
+          
+          # If the rendering of the data set has failed, inform the user 
+          # and give up
+          print("The rendering of \n  " + povFilePath + \
+            "\nhas failed. Give up.")
+          self._failedDataSets.append(povFilePath)
+          return None
+          
+        # Create the description file, fingerprint, export and profile
+        self.CompleteDataSet(dataSet, outFolder, descFilePath, \
+          povFilePath, templateFilePath, profile, fingerprint, components)
+      
+      # Append this data set to the list of successfull data sets
+      self._successDataSets.append(povFilePath)
 
-      # Run the unit tests if requested
-      if flagUnitTest:
-        ret = self.RunUnitTest()
-        quit(ret)
+      # Inform the user
+      print("\nGeneration of \n  " + outFolder + \
+        "\ncompleted.")
 
     except Exception as exc:
       PrintExc(exc)
   
-  def Run(self):
+  def GenerateCooperative(self, povFilePath, outFolder, descFilePath, \
+    templateFilePath, inFolder, checkedFingerprint):
     '''
-    Generate the dataSets according to the properties of the 
-    DataSetGenerator 'self'
+    Generate one dataSet in cooperation with the other generators 
+    sharing its output folder: claim and render chunks of samples until
+    all of them are rendered, and assemble the data set if this 
+    generator is the last one to finish
+    Inputs:
+      'povFilePath': the full path of the pov file
+      'outFolder': the output folder where the data set is generated
+      'descFilePath': the full path to the output description file
+      'templateFilePath': the full path to the template of the 
+        description file
+      'inFolder': the input folder where the pov and template files are
+      'checkedFingerprint': the fingerprint saved by the last generation
+        of the data set when it has been checked, "" if there was none
     '''
     try:
+      
+      # Inform the user
+      print("\n === Generate data set for\n  " + povFilePath + \
+        "\nto\n  " + outFolder + "\nin cooperation")
 
-      # Reset the successful/failed/skipped dataSets lists
-      self._successDataSets = []
-      self._failedDataSets = []
-      self._skippedDataSets = []
+      # Skip a line
+      print("")
+      
+      # If the template doesn't exist, add this dataSet to the failed 
+      # data sets, inform the user and give up
+      if not os.path.exists(templateFilePath):
+        print("The template file\n  " + templateFilePath + \
+          "\ndoesn't exist. Give up.")
+        self._failedDataSets.append(povFilePath)
+        return None
+      
+      # Load the template file into a DataSet object
+      profile = self.StartProfile()
+      dataSet = DataSet(templateFilePath)
+      dataSet.SetProfiler(self._profiler, outFolder)
+      dataSet.SetRenderer(self._renderer)
+      dataSet._legacyDesc = self._legacyDesc
+      dataSet.SetCapture(self._capture, self._autoTranscode)
+      fingerprint, components = \
+        self.GetFingerprint(povFilePath, templateFilePath)
+      dataSet.SetCache(self._cache, fingerprint)
+      coordinator = Coordinator(outFolder, fingerprint, \
+        int(dataSet._nbSample), self._claimSize, self._leaseTime)
 
-      # Get the list of POV files path
-      # If the -in argument was a pov file, consider only this file,
-      # else consider the pov files in the folder
-      if self._povFolder[-4:] == ".pov":
-        pattern = re.compile(
-          "dataset-[0-9][0-9][0-9]-[0-9][0-9][0-9].pov")
-        if pattern.match(os.path.basename(self._povFolder)):
-          povFilePaths = [self._povFolder]
-        else:
-          print("\nThe pov file \n  " + self._povFolder + \
-            "\ndoesn't match " + \
-            "dataset-[0-9][0-9][0-9]-[0-9][0-9][0-9].pov\n")
+      # If the data set has been assembled by another generator since it
+      # has been checked, the leases and records removed by that 
+      # generator have been created again: remove them, there is 
+      # nothing left to do. The fingerprint being saved before the 
+      # leases and records are removed, a generator creating them again
+      # after their removal always sees it.
+      if fingerprint != checkedFingerprint and \
+        self.LoadFingerprint(outFolder)[0] == fingerprint:
+        coordinator.Remove()
+        print("Data set \n  " + outFolder + \
+          "\nassembled by another generator.")
+        self._successDataSets.append(povFilePath)
+        return None
+      
+      # Loop until all the chunks are rendered
+      flagWait = False
+      while not coordinator.IsComplete():
+
+        # If the data set has been assembled by another generator, 
+        # there is nothing left to do
+        if coordinator.IsAssembled():
+          print("\nData set \n  " + outFolder + \
+            "\nassembled by another generator.")
+          self._successDataSets.append(povFilePath)
           return None
-      else:
-        povFilePaths = glob.glob(os.path.join(self._povFolder, \
-          "dataset-[0-9][0-9][0-9]-[0-9][0-9][0-9].pov"))
 
-      # Sort the list of POV files path
-      povFilePaths.sort()
+        # Claim a chunk, or wait for the chunks claimed by the other
+        # generators to be rendered or their lease to expire
+        chunk = coordinator.Claim()
+        if chunk is None:
+          if not flagWait:
+            print("Wait for the samples claimed by other generators")
+            flagWait = True
+          time.sleep(min(5.0, self._leaseTime / 10.0))
+          continue
+        flagWait = False
+
+        # Render the samples of the chunk
+        print("Claim samples " + str(chunk[0]).zfill(3) + " to " + \
+          str(chunk[1] - 1).zfill(3))
+        dataSet._images = []
+        flagRender = dataSet.Render(inFolder, outFolder, self._nbJobs, \
+          self._nbBatch, chunk[0], self._queueSize, chunk[1])
+        
+        # If the rendering has failed, release the chunk for the other
+        # generators, inform the user and give up
+        if not flagRender:
+          coordinator.Release()
+          print("The rendering of \n  " + povFilePath + \
+            "\nhas failed. Give up.")
+          self._failedDataSets.append(povFilePath)
+          return None
+
+        # Record the samples of the chunk, unless its lease has expired
+        # and another generator has claimed it
+        if not coordinator.Complete(dataSet._images):
+          print("The lease of samples " + str(chunk[0]).zfill(3) + \
+            " to " + str(chunk[1] - 1).zfill(3) + " has expired, " + \
+            "they are rendered by another generator.")
+
+      # If another generator is assembling the data set, there is 
+      # nothing left to do
+      if not coordinator.LockAssembly():
+        print("\nData set \n  " + outFolder + \
+          "\nassembled by another generator.")
+        self._successDataSets.append(povFilePath)
+        return None
+
+      # Create the description file, fingerprint, export and profile
+      # from the samples recorded by all the generators, and remove 
+      # the leases and records
+      dataSet._images = coordinator.LoadSamples()
+      dataSet.SaveManifest(outFolder, fingerprint)
+      self.CompleteDataSet(dataSet, outFolder, descFilePath, \
+        povFilePath, templateFilePath, profile, fingerprint, components)
+      coordinator.Remove()
       
-      # If there are no Pov files in the input folder, inform the user
-      # and stop
-      if len(povFilePaths) == 0:
-        print("\nNo Pov files in\n  " + self._povFolder + \
-          "\nmatching dataset-[0-9][0-9][0-9]-[0-9][0-9][0-9].pov\n")
+      # Append this data set to the list of successfull data sets
+      self._successDataSets.append(povFilePath)
+
+      # Inform the user
+      print("\nGeneration of \n  " + outFolder + \
+        "\ncompleted.")
+
+    except Exception as exc:
+      PrintExc(exc)
+  
+  def IsPartial(self):
+    '''
+    Check if only a part of the samples of the data sets are rendered
+    Output:
+      Return True if -shard or -range has been given, False else
+    '''
+    return self._shard is not None or self._range is not None
+
+  def GetSampleRange(self, nbSample):
+    '''
+    Get the range of the samples of a data set rendered according to
+    -shard or -range
+    Inputs:
+      'nbSample': the number of samples of the data set
+    Output:
+      Return the (first, last + 1) indices of the samples
+    '''
+    if self._shard is not None:
+      (iShard, nbShard) = self._shard
+      return (iShard * nbSample // nbShard, \
+        (iShard + 1) * nbSample // nbShard)
+    if self._range is not None:
+      (first, last) = self._range
+      if last is None:
+        last = nbSample
+      return (min(first, nbSample), min(last, nbSample))
+    return (0, nbSample)
+
+  def GeneratePart(self, povFilePath, outFolder, templateFilePath, \
+    inFolder):
+    '''
+    Generate the samples of one dataSet selected by -shard or -range, 
+    and record them in a partial description file, to be merged with
+    the other parts by -merge
+    Inputs:
+      'povFilePath': the full path of the pov file
+      'outFolder': the output folder where the data set is generated
+      'templateFilePath': the full path to the template of the 
+        description file
+      'inFolder': the input folder where the pov and template files are
+    '''
+    try:
+      
+      # If the template doesn't exist, add this dataSet to the failed 
+      # data sets, inform the user and give up
+      if not os.path.exists(templateFilePath):
+        print("The template file\n  " + templateFilePath + \
+          "\ndoesn't exist. Give up.")
+        self._failedDataSets.append(povFilePath)
         return None
       
-      # Loop on the POV file pathes
-      for povFilePath in povFilePaths:
-        
-        # Get the filename of the pov file
-        povFileName = os.path.basename(povFilePath)
+      # Load the template file into a DataSet object
+      profile = self.StartProfile()
+      dataSet = DataSet(templateFilePath)
+      dataSet.SetProfiler(self._profiler, outFolder)
+      dataSet.SetRenderer(self._renderer)
+      (iStart, iEnd) = self.GetSampleRange(int(dataSet._nbSample))
+
+      # Inform the user
+      print("\n === Generate samples " + str(iStart).zfill(3) + " to " + \
+        str(iEnd - 1).zfill(3) + " of data set for\n  " + povFilePath + \
+        "\nto\n  " + outFolder)
+
+      # Skip a line
+      print("")
+
+      # If there is no sample in the range, skip this data set
+      if iStart >= iEnd:
+        print("No sample in the range. Skip.")
+        self._skipDataSets.append(povFilePath)
+        return None
+      
+      # If this part has already been rendered from the same version of
+      # the pov file and template, skip it unless the generation is 
+      # forced
+      fingerprint, components = \
+        self.GetFingerprint(povFilePath, templateFilePath)
+      partFilePath = os.path.join(outFolder, "part-" + \
+        str(iStart).zfill(6) + "-" + str(iEnd).zfill(6) + ".json")
+      if not self._force and os.path.exists(partFilePath):
+        try:
+          with open(partFilePath, "r") as fp:
+            key = json.load(fp)["key"]
+        except:
+          key = None
+        if key == fingerprint:
+          print("The samples have already been rendered. Skip.")
+          self._skipDataSets.append(povFilePath)
+          return None
+
+      # Generate the images and masks
+      dataSet.SetCache(self._cache, fingerprint)
+      dataSet._images = []
+      flagRender = dataSet.Render(inFolder, outFolder, self._nbJobs, \
+        self._nbBatch, iStart, self._queueSize, iEnd)
+      if not flagRender:
         
-        # Get the path to the input folder
-        inFolder = os.path.dirname(povFilePath)
+        # If the rendering of the data set has failed, inform the user 
+        # and give up
+        print("The rendering of \n  " + povFilePath + \
+          "\nhas failed. Give up.")
+        self._failedDataSets.append(povFilePath)
+        return None
+
+      # Create the partial description file, with its samples, under a
+      # temporary name first to avoid merging a partial one
+      start = self.StartProfile()
+      dataSet._legacyDesc = True
+      tmpFilePath = partFilePath + "." + str(os.getpid()) + ".tmp"
+      with open(tmpFilePath, "w") as fp:
+        fp.write(dataSet.GetDescFileContent({"key":fingerprint, \
+          "components":components, \
+          "sampleRange":[str(iStart), str(iEnd)]}))
+      os.replace(tmpFilePath, partFilePath)
+      self.StopProfile(start, outFolder, "describe")
+      self.StopProfile(profile, outFolder, "dataSet")
+      
+      # Append this data set to the list of successfull data sets
+      self._successDataSets.append(povFilePath)
+
+      # Inform the user
+      print("\nGeneration of samples " + str(iStart).zfill(3) + " to " + \
+        str(iEnd - 1).zfill(3) + " of \n  " + outFolder + \
+        "\ncompleted.")
+
+    except Exception as exc:
+      PrintExc(exc)
+  
+  def GetCatalogEnvironment(self):
+    '''
+    Get the stamp of the renderer and its options, which invalidates the
+    entries of the catalog when it changes
+    Output:
+      Return the stamp as a string
+    '''
+    if self._catalogEnvironment is None:
+      self._catalogEnvironment = self.GetRendererName() + " " + \
+        self._renderer.GetVersionStamp() + " " + self.GetFlags()
+    return self._catalogEnvironment
+
+  def CheckDataSet(self, povFilePath, templateFilePath, outFolder, \
+    descFilePath, useCatalog = True):
+    '''
+    Check if a data set must be generated, and update its entry in the
+    catalog
+    Inputs:
+      'povFilePath': the full path of the pov file
+      'templateFilePath': the full path to the template of the 
+        description file
+      'outFolder': the output folder where the data set is generated
+      'descFilePath': the full path to the output description file
+      'useCatalog': if True the entry of the data set in the catalog is
+        returned if it's still valid, else the data set is checked again
+    Output:
+      Return the entry of the data set in the catalog, with its 'name',
+      'desc', 'nbSample', 'size' on disk in bytes, the 'fingerprint' of
+      its last generation ("" if there is none), 'generate' ("1" if it
+      must be generated, "0" else), 'staleReason' (why a data set 
+      generated previously is stale, "" else), and the 'stamps' of the
+      files and 'environment' these values are deduced from
+    '''
+    
+    # Get the entry of the catalog if it's still valid
+    key = os.path.basename(os.path.dirname(outFolder)) + "/" + \
+      os.path.basename(outFolder)
+    environment = self.GetCatalogEnvironment()
+    if useCatalog:
+      entry = self._catalog.Get(key, environment, \
+        [povFilePath, templateFilePath])
+      if entry is not None:
+        return entry
+
+    # Init a flag to memorize if this data set must be generated,
+    # the reason why a data set generated previously is stale, and
+    # the files included by its pov file if they are checked
+    isGenNecessary = False
+    staleReason = None
+    savedFingerprint = ""
+    includePaths = []
+    fingerprintFilePath = os.path.join(outFolder, \
+      self._fingerprintFileName)
+
+    # Record the stamps of the files the entry is deduced from before
+    # reading them, so that a file modified while it's checked 
+    # invalidates the entry
+    stamps = {}
+    for filePath in [povFilePath, templateFilePath, descFilePath, \
+      fingerprintFilePath]:
+      stamps[filePath] = Catalog.GetStamp(filePath)
+    
+    # If the output folder doesn't exist, the generation is necessary
+    if not os.path.exists(outFolder):
+      isGenNecessary = True
+    
+    # Else, the output folder exists
+    else:
+      
+      # If the description file exists
+      if os.path.exists(descFilePath):
         
-        # Get the path to the template of the description file
-        templateFilePath = povFilePath[0:-4] + ".json"
+        # Get the fingerprint saved by the last generation
+        savedFingerprint, savedComponents = self.LoadFingerprint(outFolder)
         
-        # Get the dataSet group number from the file name
-        groupNum = povFileName[8:11]
+        # If there is a saved fingerprint, the generation is
+        # necessary if any of its components has changed
+        if savedComponents is not None:
+          fingerprint, components = self.GetFingerprint(povFilePath, \
+            templateFilePath, includePaths)
+          changes = [self._fingerprintLabels[c] \
+            for c in sorted(components) \
+            if savedComponents.get(c) != components[c]]
+          if len(changes) > 0:
+            isGenNecessary = True
+            staleReason = ", ".join(changes) + " changed"
+
+        # Else, the data set has been generated by a version without
+        # fingerprint, use the last modification times
+        else:
+
+          # Get the last modification time of the description file
+          dateLastModifDesc = os.path.getmtime(descFilePath)
+          
+          # Get the last modification time of the pov file
+          dateLastModifPov = os.path.getmtime(povFilePath)
+          
+          # Get the last modification time of the template for
+          # the description file
+          dateLastModifTemplate = os.path.getmtime(templateFilePath)
+          
+          # If the Pov or template file as been modified more 
+          # recently than the description file, the generation is 
+          # necessary
+          if dateLastModifPov > dateLastModifDesc or \
+            dateLastModifTemplate > dateLastModifDesc:
+            isGenNecessary = True
+            staleReason = "modified after the last generation"
+
+      # Else, the description file doesn't exist, the generation is 
+      # necessary
+      else:
+        isGenNecessary = True
+
+    # Create the entry of the data set from its template, and record the
+    # stamps of the included files, known once they have been checked
+    dataSet = DataSet(templateFilePath)
+    for filePath in includePaths:
+      stamps[filePath] = Catalog.GetStamp(filePath)
+    entry = {"name":dataSet._name, "desc":dataSet._desc, \
+      "nbSample":dataSet._nbSample, \
+      "size":str(Catalog.GetFolderSize(outFolder)), \
+      "fingerprint":savedFingerprint, \
+      "generate":"1" if isGenNecessary else "0", \
+      "staleReason":staleReason if staleReason is not None else "", \
+      "stamps":stamps, "environment":environment}
+    self._catalog.Set(key, entry)
+    return entry
+
+  def GetRendererName(self):
+    '''
+    Get the name of the renderer used to render the data sets
+    Output:
+      Return the name of the renderer, as given to -renderer
+    '''
+    for name in self._renderers:
+      if type(self._renderer) is self._renderers[name]:
+        return name
+    return "povray"
+
+  def GetGenerationKey(self, povFilePath, templateFilePath):
+    '''
+    Get the key identifying the version of the pov file and template 
+    used to generate a data set
+    Inputs:
+      'povFilePath': the full path of the pov file
+      'templateFilePath': the full path to the template of the 
+        description file
+    Output:
+      Return the key as a string
+    '''
+    return self.GetFingerprint(povFilePath, templateFilePath)[0]
+
+  def GetFlags(self):
+    '''
+    Get the render options of the data sets, part of their fingerprint
+    Output:
+      Return the options as a string
+    '''
+    flags = " ".join(DataSet._imageOptions) + "/" + \
+      " ".join(DataSet._maskOptions) + "/" + \
+      " ".join(DataSet._labelOptions)
+    if self._lazy:
+      flags += "/lazy"
+    return flags
+
+  def GetFingerprint(self, povFilePath, templateFilePath, \
+    includePaths = None):
+    '''
+    Get the fingerprint of a data set, covering the content of its pov
+    file, the fields of its template, the content of the files included
+    by the pov file, the options of POV-Ray and the version of the
+    renderer
+    Inputs:
+      'povFilePath': the full path of the pov file
+      'templateFilePath': the full path to the template of the 
+        description file
+      'includePaths': if not None, the list to which the paths where 
+        the included files have been searched are appended
+    Output:
+      Return the fingerprint and the dictionary of the fingerprint of
+      each of its components
+    '''
+    components = {}
+    components["pov"] = self.HashFile(povFilePath)
+    try:
+      with open(templateFilePath, "r") as fp:
+        template = json.load(fp)
+      components["template"] = hashlib.sha256(json.dumps(template, \
+        sort_keys = True).encode("utf-8")).hexdigest()
+    except:
+      components["template"] = "missing"
+    components["includes"] = self.HashIncludes(povFilePath, includePaths)
+    components["flags"] = self.GetFlags()
+    components["povray"] = self._renderer.GetVersion()
+    fingerprint = hashlib.sha256(json.dumps(components, \
+      sort_keys = True).encode("utf-8")).hexdigest()
+    return fingerprint, components
+
+  def HashFile(self, filePath):
+    '''
+    Get the hash of the content of a file
+    Inputs:
+      'filePath': the full path of the file
+    Output:
+      Return the hash as a string, "missing" if the file can't be read
+    '''
+    try:
+      stat = os.stat(filePath)
+      cacheKey = (filePath, stat.st_mtime, stat.st_size)
+      if not cacheKey in self._hashCache:
+        with open(filePath, "rb") as fp:
+          self._hashCache[cacheKey] = hashlib.sha256(fp.read()).hexdigest()
+      return self._hashCache[cacheKey]
+    except:
+      return "missing"
+
+  def HashIncludes(self, povFilePath, includePaths = None):
+    '''
+    Get the hash of the files included, directly or not, by a pov file.
+    Included files are searched in the folder of the including file,
+    the folder of the pov file and the folders of the standard include
+    files of POV-Ray.
+    Inputs:
+      'povFilePath': the full path of the pov file
+      'includePaths': if not None, the list to which the paths where 
+        the included files have been searched are appended
+    Output:
+      Return a dictionary of hash per included file name
+    '''
+    hashes = {}
+    pending = [povFilePath]
+    while len(pending) > 0:
+      filePath = pending.pop()
+      try:
+        with open(filePath, "r", errors = "replace") as fp:
+          content = fp.read()
+      except:
+        continue
+      for name in re.findall(r'#include\s+"([^"]+)"', content):
+        if name in hashes:
+          continue
+        hashes[name] = "missing"
+        for folder in [os.path.dirname(filePath), \
+          os.path.dirname(povFilePath)] + POVRAY_INCLUDE_DIRS:
+          includePath = os.path.join(folder, name)
+          if includePaths is not None:
+            includePaths.append(includePath)
+          if os.path.isfile(includePath):
+            hashes[name] = self.HashFile(includePath)
+            pending.append(includePath)
+            break
+    return hashes
+
+  def SaveFingerprint(self, outFolder, fingerprint, components):
+    '''
+    Save the fingerprint of a generated data set in its output folder
+    Inputs:
+      'outFolder': the output folder where the data set is generated
+      'fingerprint', 'components': the fingerprint of the data set and
+        its components, returned by GetFingerprint() before rendering
+        the data set
+    '''
+    with open(os.path.join(outFolder, self._fingerprintFileName), \
+      "w") as fp:
+      json.dump({"fingerprint":fingerprint, "components":components}, \
+        fp, sort_keys = True, indent = 2)
+
+  def LoadFingerprint(self, outFolder):
+    '''
+    Load the fingerprint saved by the last generation of a data set
+    Inputs:
+      'outFolder': the output folder where the data set is generated
+    Output:
+      Return the fingerprint and the dictionary of the fingerprint of
+      each of its components, ("", None) if none has been saved
+    '''
+    try:
+      with open(os.path.join(outFolder, self._fingerprintFileName), \
+        "r") as fp:
+        saved = json.load(fp)
+      return saved["fingerprint"], saved["components"]
+    except:
+      return "", None
+
+  def GenerateScheduled(self, dataSets):
+    '''
+    Generate several dataSets at once. The images and masks of all the
+    data sets are rendered by one pool of workers, by batches of 
+    consecutive samples for each mask, starting with the ones expected
+    to take the longest according to the render times recorded by the
+    previous generations. The description file of each 
+    data set is created as soon as all its samples are rendered.
+    Inputs:
+      'dataSets': the list of data sets, each one given as the tuple of 
+        arguments of Generate()
+    '''
+    try:
+
+      # Init the state of each data set and the list of render jobs
+      states = []
+      jobs = []
       
-        # Get the dataSet subgroup number from the file name
-        subGroupNum = povFileName[12:15]
+      # Init the total render time and number of pixels recorded by
+      # the previous generations, used to estimate the render time of
+      # the data sets without records
+      recordedTime = 0.0
+      recordedPixel = 0.0
 
-        # Get the name of the corresponding output folder
-        outFolder = os.path.join(self._dataSetFolder, \
-          groupNum, subGroupNum)
+      # Loop on the data sets
+      for (povFilePath, povFileName, groupNum, subGroupNum, outFolder, \
+        descFilePath, templateFilePath, inFolder, resumedSamples) in \
+        dataSets:
+        
+        # Init the state of the data set
+        state = {"povFilePath":povFilePath, "outFolder":outFolder, \
+          "templateFilePath":templateFilePath, \
+          "descFilePath":descFilePath, "inFolder":inFolder, \
+          "futures":[], "failed":False}
+        states.append(state)
+      
+        # Inform the user
+        print("\n === Generate data set for\n  " + povFilePath + \
+          "\nto\n  " + outFolder)
+        print("")
         
-        # Get the path to the description file for this data set
-        descFilePath = os.path.join(outFolder, self._descFileName)
+        # If the template doesn't exist, this data set has failed
+        if not os.path.exists(templateFilePath):
+          print("The template file\n  " + templateFilePath + \
+            "\ndoesn't exist. Give up.")
+          state["failed"] = True
+          continue
+
+        # Load the template file into a DataSet object
+        state["profile"] = self.StartProfile()
+        dataSet = DataSet(templateFilePath)
+        dataSet.SetProfiler(self._profiler, outFolder)
+        dataSet.SetRenderer(self._renderer)
+        dataSet._legacyDesc = self._legacyDesc
+        dataSet.SetCapture(self._capture, self._autoTranscode)
+        nbSample = int(dataSet._nbSample)
+        iFirst = len(resumedSamples)
+        maskPasses = dataSet.GetMaskPasses()
+        state["dataSet"] = dataSet
+        state["samples"] = resumedSamples + [None] * (nbSample - iFirst)
+        state["nbPendingFile"] = {}
+        state["nbPendingSample"] = nbSample - iFirst
         
-        # Init a flag to memorize if this data set must be generated
-        isGenNecessary = False
+        # Open the journal of the data set, the samples being recorded
+        # in their order as soon as all the previous ones are rendered
+        if iFirst > 0:
+          print("Resume from sample " + str(iFirst).zfill(3))
+        fingerprint, components = \
+          self.GetFingerprint(povFilePath, templateFilePath)
+        state["fingerprint"] = (fingerprint, components)
+        dataSet.SetCache(self._cache, fingerprint)
+        dataSet.OpenJournal(outFolder, fingerprint, resumedSamples)
         
-        # If the output folder doesn't exist, the generation is necessary
-        if not os.path.exists(outFolder):
-          isGenNecessary = True
+        # Load the render times recorded by the previous generations
+        state["renderTimes"] = dataSet.LoadRenderTimes(outFolder)
+        nbPixel = float(dataSet._dim["_val"][0]) * \
+          float(dataSet._dim["_val"][1])
+        recordedTime += sum(state["renderTimes"].values())
+        recordedPixel += nbPixel * len(state["renderTimes"])
         
-        # Else, the output folder exists
-        else:
-          
-          # If the description file exists
-          if os.path.exists(descFilePath):
+        # Add the render jobs of this data set, one per batch of 
+        # consecutive samples and per mask
+        for iStart in range(iFirst, nbSample, self._nbBatch):
+          iEnd = min(iStart + self._nbBatch, nbSample)
+          state["nbPendingFile"][iStart] = len(maskPasses)
+          for iMask in maskPasses:
+            jobs.append((state, iStart, iEnd, iMask))
+      
+      # Get the estimated time per pixel for data sets without records
+      if recordedPixel > 0.0:
+        timePerPixel = recordedTime / recordedPixel
+      else:
+        timePerPixel = 1.0
+      
+      # Sort the jobs by decreasing estimated render time
+      jobs.sort(key = lambda job: -sum(self.EstimateRenderTime(job[0], \
+        iRender, job[3], timePerPixel) \
+        for iRender in range(job[1], job[2])))
 
-            # Get the last modification time of the description file
-            dateLastModifDesc = os.path.getmtime(descFilePath)
-            
-            # Get the last modification time of the pov file
-            dateLastModifPov = os.path.getmtime(povFilePath)
-            
-            # Get the last modification time of the template for
-            # the description file
-            dateLastModifTemplate = os.path.getmtime(templateFilePath)
-            
-            # If the Pov or template file as been modified more 
-            # recently than the description file, the generation is 
-            # necessary
-            if dateLastModifPov > dateLastModifDesc or \
-              dateLastModifTemplate > dateLastModifDesc:
-              isGenNecessary = True
-
-          # Else, the description file doesn't exist, the generation is 
-          # necessary
-          else:
-            isGenNecessary = True
-        
-        # If we are in listing mode
-        if self._list:
-          
-          # Print a mark to show if the set has been generated
-          if isGenNecessary:
-            prefix = "[ ]  "
-          else:
-            prefix = "[*]  "
+      # Complete the data sets without samples
+      for state in states:
+        if not state["failed"] and state["nbPendingSample"] == 0:
+          self.CompleteScheduled(state)
 
-          # Load the data set info
-          dataSet = DataSet(templateFilePath)
+      # Render all the jobs with one pool of workers
+      with concurrent.futures.ThreadPoolExecutor( \
+        max_workers = self._nbJobs) as executor:
+        futureJobs = {}
+        for (state, iStart, iEnd, iMask) in jobs:
+          future = executor.submit(state["dataSet"].RenderFiles, \
+            state["inFolder"], state["outFolder"], iStart, iEnd, iMask)
+          futureJobs[future] = (state, iStart, iEnd)
+          state["futures"].append(future)
+        
+        # Loop on the jobs as they complete
+        for future in concurrent.futures.as_completed(futureJobs):
+          state, iStart, iEnd = futureJobs[future]
           
-          # Print the set name and descrition
-          print(prefix + dataSet._name + ": " + dataSet._desc)
-
+          # Skip the jobs of data sets which have already failed
+          if state["failed"]:
+            continue
           
-        # Else we are not in listing mode
-        else:
+          # If the file couldn't be rendered, cancel the pending jobs of
+          # this data set and give up on it
+          if not future.result():
+            state["failed"] = True
+            for f in state["futures"]:
+              f.cancel()
+            DataSet.Log(None, "The rendering of \n  " + \
+              state["povFilePath"] + "\nhas failed. Give up.")
+            continue
           
-          # If the generation is necessary or forced for this data set
-          if isGenNecessary or self._force:
-            
-            # If we are not in simulation or listing mode
-            if not self._simul and not self._list:
-              
-              # Ensure the output folder exists
-              if not os.path.exists(outFolder):
-                os.makedirs(outFolder)
-              
-              # Ensure the output folder is empty of the description file 
-              # and images
-              try:
-                os.remove(os.path.join(outFolder, self._descFileName))
-              except:
-                pass
-              for f in glob.glob(os.path.join(outFolder, "img*.*")):
-                try:
-                  os.remove(f)
-                except:
-                  pass
-              for f in glob.glob(os.path.join(outFolder, "mask*.*")):
-                try:
-                  os.remove(f)
-                except:
-                  pass
+          # If all the files of the batch are rendered, create the
+          # description of its samples
+          state["nbPendingFile"][iStart] -= 1
+          if state["nbPendingFile"][iStart] == 0:
+            for iRender in range(iStart, iEnd):
+              state["samples"][iRender] = \
+                state["dataSet"].MakeSample(state["outFolder"], iRender)
+            state["nbPendingSample"] -= iEnd - iStart
             
-            # If we are not in listing mode
-            if not self._list:
-
-              # Generate this data set
-              self.Generate(povFilePath, povFileName, groupNum, \
-                subGroupNum, outFolder, descFilePath, templateFilePath, \
-                inFolder)
-          
-          # Else, the generation of this data set is skipped
-          else:
+            # Record in the journal the samples following the ones 
+            # already recorded
+            dataSet = state["dataSet"]
+            while dataSet.GetNbSampleAdded() < len(state["samples"]) and \
+              state["samples"][dataSet.GetNbSampleAdded()] is not None:
+              dataSet.AddSample( \
+                state["samples"][dataSet.GetNbSampleAdded()])
             
-            # If we are not in listing mode
-            if not self._list:
-
-              # Append this data set to the list of skipped data sets
-              self._skipDataSets.append(povFilePath)
-
-      # If we are not in listing mode
-      if not self._list:
+            # If all the samples of the data set are rendered, complete
+            # the data set
+            if state["nbPendingSample"] == 0:
+              self.CompleteScheduled(state)
 
-        # If some generation were successful
-        if len(self._successDataSets) > 0:
-          
-          # Inform the user
-          print("\nThe following data sets were " + \
-            "generated successfully:")
-          for d in self._successDataSets:
-            print("  " + d)
-            
-        # If some generation failed
-        if len(self._failedDataSets) > 0:
-          
-          # Inform the user
-          print("\nThe following data sets couldn't be " + \
-            "generated successfully:")
-          for d in self._failedDataSets:
-            print("  " + d)
-            
-        # If some generation were skipped
-        if len(self._skipDataSets) > 0:
-          
-          # Inform the user
-          print("\nThe following data sets were skipped:")
-          for d in self._skipDataSets:
-            print("  " + d)
+      # Update the lists of successful and failed data sets in the 
+      # order of the data sets, and memorize the render times for the
+      # next generations
+      for state in states:
+        if state["failed"]:
+          self._failedDataSets.append(state["povFilePath"])
+        else:
+          self._successDataSets.append(state["povFilePath"])
+        if "dataSet" in state:
+          state["dataSet"].CloseJournal()
+          state["dataSet"].SaveRenderTimes(state["outFolder"])
 
-        # Skip a line
-        print("")
-    
     except Exception as exc:
       PrintExc(exc)
+
+  def EstimateRenderTime(self, state, iRender, iMask, timePerPixel):
+    '''
+    Estimate the render time of one file of a data set
+    Inputs:
+      'state': the state of the data set in GenerateScheduled()
+      'iRender': the index of the sample
+      'iMask': 0 for the image, i + 1 for the i-th mask, -1 for the 
+        label map
+      'timePerPixel': the estimated render time per pixel of an image
+    Output:
+      Return the estimated render time
+    '''
+    
+    # If the render time of this file has been recorded, use it
+    dataSet = state["dataSet"]
+    renderTimes = state["renderTimes"]
+    fileName = dataSet.GetFileName(iRender, iMask)
+    if fileName in renderTimes:
+      return renderTimes[fileName]
+    
+    # Else, if the render time of other files of the same kind have 
+    # been recorded, use their average
+    if not "averageTimes" in state:
+      state["averageTimes"] = {}
+      for kind in ["img", "mask", "label"]:
+        times = [t for (name, t) in renderTimes.items() \
+          if name.startswith(kind)]
+        if len(times) > 0:
+          state["averageTimes"][kind] = sum(times) / len(times)
+    kind = ["label", "img", "mask"][min(iMask + 1, 2)]
+    if kind in state["averageTimes"]:
+      return state["averageTimes"][kind]
+    
+    # Else, estimate from the number of pixels, masks being rendered at 
+    # the lowest quality
+    nbPixel = float(dataSet._dim["_val"][0]) * \
+      float(dataSet._dim["_val"][1])
+    if iMask == 0:
+      return nbPixel * timePerPixel
+    else:
+      return 0.1 * nbPixel * timePerPixel
+
+  def CompleteScheduled(self, state):
+    '''
+    Create the description file of a data set generated by 
+    GenerateScheduled() once all its samples have been rendered
+    Inputs:
+      'state': the state of the data set in GenerateScheduled()
+    '''
+    state["dataSet"].CloseJournal()
+    self.CompleteDataSet(state["dataSet"], state["outFolder"], \
+      state["descFilePath"], state["povFilePath"], \
+      state["templateFilePath"], state["profile"], *state["fingerprint"])
+    DataSet.Log(None, "\nGeneration of \n  " + \
+      state["outFolder"] + "\ncompleted.")
   
-  def Generate(self, povFilePath, povFileName, groupNum, \
-    subGroupNum, outFolder, descFilePath, templateFilePath, inFolder):
+  def RunUnitTestCommand(self, args, outFolder):
     '''
-    Generate one dataSet
+    Run the generator with the numpy renderer on the data sets of the 
+    unit tests
     Inputs:
-      'povFilePath': the full path of the pov file
-      'povFileName': the filename of the pov file
-      'groupNum': the dataSet group number from the file name
-      'subGroupNum': the dataSet subgroup number from the file name
-      'outFolder': the output folder where the data set is generated
-      'descFilePath': the full path to the output description file
-      'templateFilePath': the full path to the template of the 
-        description file
-      'inFolder': the input folder where the pov and template files are
+      'args': the list of options of the generator
+      'outFolder': the output folder, created if it doesn't exist
+    Output:
+      Return the list of lines displayed by the generator
+    '''
+    if not os.path.exists(outFolder):
+      os.makedirs(outFolder)
+    cmd = ["python3", "generateDataSet.py", "-in", "UnitTestIn", \
+      "-out", outFolder, "-renderer", "numpy"] + args
+    with open("out.txt", "w") as fp:
+      subprocess.call(cmd, stdout = fp)
+    with open("out.txt", "r") as fp:
+      return fp.readlines()
+
+  def CompareUnitTestOut(self, refFolder, outFolder):
+    '''
+    Compare the data sets generated during the unit tests in an output
+    folder with the ones of a reference output folder
+    Inputs:
+      'refFolder': the reference output folder
+      'outFolder': the output folder to check
+    Output:
+      Return True if the output folder contains the same data sets as 
+      the reference one, with the same annotations, images and masks 
+      (whatever their format), False else
     '''
     try:
-      
-      # Inform the user
-      print("\n === Generate data set for\n  " + povFilePath + \
-        "\nto\n  " + outFolder)
 
-      # Skip a line
-      print("")
-      
-      # If the template doesn't exist, add this dataSet to the failed 
-      # data sets, inform the user and give up
-      if not os.path.exists(templateFilePath):
-        print("The template file\n  " + templateFilePath + \
-          "\ndoesn't exist. Give up.")
-        self._failedDataSets.append(povFilePath)
-        return None
-      
-      # Load the template file into a DataSet object
-      dataSet = DataSet(templateFilePath)
-      
-      # If we are not in simulation mode
-      if not self._simul:
+      # Loop on the data sets of the reference output folder
+      refDescFilePaths = glob.glob(os.path.join(refFolder, \
+        "[0-9][0-9][0-9]", "[0-9][0-9][0-9]", self._descFileName))
+      if len(refDescFilePaths) == 0:
+        return False
+      for refDescFilePath in sorted(refDescFilePaths):
 
-        # Generate the images and masks
-        if not dataSet.Render(inFolder, outFolder):
-          
-          # If the rendering of the data set has failed, inform the user 
-          # and give up
-          print("The rendering of \n  " + povFilePath + \
-            "\nhas failed. Give up.")
-          self._failedDataSets.append(povFilePath)
-          return None
-          
-        # Create the description file
-        with open(descFilePath, "w") as fp:
-          fp.write(dataSet.GetDescFileContent())
-      
-      # Append this data set to the list of successfull data sets
-      self._successDataSets.append(povFilePath)
+        # Load the samples of both data sets
+        refDataFolder = os.path.dirname(refDescFilePath)
+        dataFolder = os.path.join(outFolder, \
+          os.path.relpath(refDataFolder, refFolder))
+        descFilePath = os.path.join(dataFolder, self._descFileName)
+        if not os.path.exists(descFilePath):
+          return False
+        refDataSet = DataSet(refDescFilePath)
+        dataSet = DataSet(descFilePath)
+        if not refDataSet.LoadDescFile(refDescFilePath) or \
+          not dataSet.LoadDescFile(descFilePath) or \
+          len(refDataSet._images) != len(dataSet._images):
+          return False
 
-      # Inform the user
-      print("\nGeneration of \n  " + outFolder + \
-        "\ncompleted.")
+        # Compare the annotations, images and masks of the samples
+        for (refSample, sample) in zip(refDataSet._images, \
+          dataSet._images):
+          for key in ["bounding", "area", "centroid", "instances"]:
+            if refSample.get(key) != sample.get(key):
+              return False
+          refImg = ReadImage(os.path.join(refDataFolder, refSample["img"]))
+          img = ReadImage(os.path.join(dataFolder, sample["img"]))
+          if refImg is None or img is None or \
+            not numpy.array_equal(refImg, img):
+            return False
+          if len(refSample["mask"]) != len(sample["mask"]):
+            return False
+          for (refMaskFileName, maskFileName) in zip(refSample["mask"], \
+            sample["mask"]):
+            refMask = ReadMask(os.path.join(refDataFolder, refMaskFileName))
+            mask = ReadMask(os.path.join(dataFolder, maskFileName))
+            if refMask is None or mask is None or \
+              not numpy.array_equal(refMask, mask):
+              return False
+      return True
 
     except Exception as exc:
       PrintExc(exc)
-  
+      return False
+
   def RunUnitTest(self):
     '''
     Run the unit tests
@@ -625,6 +5671,10 @@ class DataSetGenerator:
         shutil.rmtree("UnitTestOut")
       except:
         pass
+      try:
+        shutil.rmtree("UnitTestNumPy")
+      except:
+        pass
       os.mkdir("UnitTestIn")
       os.mkdir("UnitTestOut")
 
@@ -1046,8 +6096,740 @@ class DataSetGenerator:
         else:
           print("[-force] OK")
       
-      # Delete the temporary file
+      # Test the fingerprints: touching the input files doesn't make the
+      # data sets stale, modifying their content does
+      dateTest = time.time() + 100.0
+      for filePath in glob.glob(os.path.join("UnitTestIn", "*")):
+        os.utime(filePath, (dateTest, dateTest))
+      with open(os.path.join("UnitTestIn", "dataset-001-002.pov"), \
+        "a") as fp:
+        fp.write("// Modified\n")
+      cmd = ["python3", "generateDataSet.py", "-in", "UnitTestIn", \
+        "-out", "UnitTestOut", "-list"]
+      with open("out.txt", "w") as fp:
+        subprocess.call(cmd, stdout = fp)
+      shutil.copy("dataset.pov", 
+        os.path.join("UnitTestIn", "dataset-001-002.pov"))
+      check = ["[*]  dataset-001-001: unitTest\n",
+        "[ ]  dataset-001-002: unitTest (pov file changed)\n",
+        "[*]  dataset-002-001: unitTest\n"]
+      with open ("out.txt", "r") as fp:
+        data = fp.readlines()
+        if not data == check:
+          flagSuccess = False
+          print("[fingerprint] NOK")
+        else:
+          print("[fingerprint] OK")
+
+      # Generate the reference data sets of the tests of the options with
+      # the numpy renderer
+      os.mkdir("UnitTestNumPy")
+      refFolder = os.path.join("UnitTestNumPy", "Ref")
+      refData = self.RunUnitTestCommand([], refFolder)
+      checkGenerated = [
+        '\n', 
+        'The following data sets were generated successfully:\n', 
+        '  ' + os.path.join(BASE_DIR, "UnitTestIn", \
+          "dataset-001-001.pov") + '\n', 
+        '  ' + os.path.join(BASE_DIR, "UnitTestIn", \
+          "dataset-001-002.pov") + '\n', 
+        '  ' + os.path.join(BASE_DIR, "UnitTestIn", \
+          "dataset-002-001.pov") + '\n', 
+        '\n']
+      if refData[-len(checkGenerated):] != checkGenerated:
+        flagSuccess = False
+        print("[-renderer numpy] NOK")
+      else:
+        print("[-renderer numpy] OK")
+
+      # Test [-cooperate] with several generators rendering the data sets
+      # at the same time, each sample being rendered once (a generator 
+      # starting after the completion of a data set skips it)
+      outFolder = os.path.join("UnitTestNumPy", "Cooperate")
+      os.makedirs(outFolder)
+      cmd = ["python3", "generateDataSet.py", "-in", "UnitTestIn", \
+        "-out", outFolder, "-renderer", "numpy", "-cooperate", \
+        "-claimSize", "1", "-leaseTime", "10"]
+      processes = []
+      for iProcess in range(3):
+        fp = open("out" + str(iProcess) + ".txt", "w")
+        processes.append((subprocess.Popen(cmd, stdout = fp), fp))
+      flagCooperate = True
+      nbClaim = 0
+      for iProcess, (process, fp) in enumerate(processes):
+        process.wait()
+        fp.close()
+        with open("out" + str(iProcess) + ".txt", "r") as fp:
+          data = fp.readlines()
+        os.remove("out" + str(iProcess) + ".txt")
+        if any("couldn't be generated" in l for l in data) or \
+          data[-1:] != ["\n"]:
+          flagCooperate = False
+        nbClaim += len([l for l in data if l.startswith("Claim samples")])
+      if nbClaim != 9 or \
+        len(glob.glob(os.path.join(outFolder, "*", "*", "coop-*"))) > 0 or \
+        not self.CompareUnitTestOut(refFolder, outFolder):
+        flagCooperate = False
+      
+      # Test a late cooperating generator, which has checked a data set
+      # before another generator completed it, and must not render it 
+      # again
+      generator = DataSetGenerator(["generateDataSet.py", "-in", \
+        "UnitTestIn", "-out", outFolder, "-renderer", "numpy", \
+        "-cooperate"])
+      dataFolder = os.path.join(BASE_DIR, outFolder, "001", "001")
+      with open("out.txt", "w") as fp:
+        with contextlib.redirect_stdout(fp):
+          generator.GenerateCooperative(os.path.join(BASE_DIR, \
+            "UnitTestIn", "dataset-001-001.pov"), dataFolder, \
+            os.path.join(dataFolder, "dataset.json"), \
+            os.path.join(BASE_DIR, "UnitTestIn", "dataset-001-001.json"), \
+            os.path.join(BASE_DIR, "UnitTestIn"), "")
+      with open("out.txt", "r") as fp:
+        data = fp.readlines()
+      if not "assembled by another generator.\n" in data or \
+        any(l.startswith("Claim samples") for l in data) or \
+        len(glob.glob(os.path.join(dataFolder, "coop-*"))) > 0:
+        flagCooperate = False
+      if not flagCooperate:
+        flagSuccess = False
+        print("[-cooperate] NOK")
+      else:
+        print("[-cooperate] OK")
+
+      # Test [-lazy], the samples being rendered when they are accessed,
+      # the lazy data sets being skipped by [-annotate] and [-export],
+      # and the refusal to open a lazy data set whose pov file has been
+      # modified since its generation
+      inFolder = os.path.join("UnitTestNumPy", "InLazy")
+      shutil.copytree("UnitTestIn", inFolder)
+      outFolder = os.path.join("UnitTestNumPy", "Lazy")
+      self.RunUnitTestCommand(["-in", inFolder, "-lazy"], outFolder)
+      dataFolder = os.path.join(outFolder, "002", "001")
+      flagLazy = True
+      try:
+        lazyDataSet = LazyDataSet(dataFolder, 2, 2)
+        try:
+          lazyDataSet.Prefetch(range(3))
+          for iSample in range(lazyDataSet.GetNbSample()):
+            sample = lazyDataSet.GetSample(iSample)
+            for fileName in [sample["img"]] + sample["mask"]:
+              if not numpy.array_equal(ReadImage(os.path.join( \
+                dataFolder, fileName)), ReadImage(os.path.join(refFolder, \
+                "002", "001", fileName))):
+                flagLazy = False
+        finally:
+          lazyDataSet.Close()
+        with open(os.path.join(dataFolder, "dataset.json"), "r") as fp:
+          desc = fp.read()
+        for args in [["-annotate"], ["-export"]]:
+          if self.RunUnitTestCommand(["-in", inFolder] + args, \
+            outFolder) != ["\n"]:
+            flagLazy = False
+        with open(os.path.join(dataFolder, "dataset.json"), "r") as fp:
+          if fp.read() != desc or \
+            os.path.exists(os.path.join(dataFolder, "images.npy")):
+            flagLazy = False
+        with open(os.path.join(inFolder, "dataset-002-001.pov"), "a") as fp:
+          fp.write("// Modified\n")
+        try:
+          LazyDataSet(dataFolder).Close()
+          flagLazy = False
+        except ValueError:
+          pass
+      except Exception as exc:
+        PrintExc(exc)
+        flagLazy = False
+      if not flagLazy:
+        flagSuccess = False
+        print("[-lazy] NOK")
+      else:
+        print("[-lazy] OK")
+
+      # Test [-draft], the tga images of the data set 002-001 being
+      # annotated in place on the contact sheet
+      draftFolder = os.path.join("UnitTestNumPy", "Drafts")
+      res = self.RunUnitTestCommand(["-draft", "3", "-draftOut", \
+        draftFolder], os.path.join("UnitTestNumPy", "Draft"))
+      checkDraft = ["The contact sheets of the following drafts were " + \
+        "created successfully:\n"] + \
+        ["  " + os.path.abspath(os.path.join(draftFolder, group, \
+        subgroup, self._contactSheetFileName)) + "\n" \
+        for (group, subgroup) in \
+        [("001", "001"), ("001", "002"), ("002", "001")]] + ["\n"]
+      flagDraft = (res[-len(checkDraft):] == checkDraft)
+      for line in checkDraft[1:-1]:
+        if cv2.imread(line.strip()) is None:
+          flagDraft = False
+      img = ReadImage(os.path.join(refFolder, "002", "001", "img000.tga"))
+      if img is None or not img.flags.writeable:
+        flagDraft = False
+      if not flagDraft:
+        flagSuccess = False
+        print("[-draft] NOK")
+      else:
+        print("[-draft] OK")
+
+      # Test the catalog of the output folder, its entries being used
+      # only for the files of the input folder they were deduced from,
+      # and only as long as the files included by the pov files are
+      # unchanged
+      outFolder = os.path.join("UnitTestNumPy", "Catalog")
+      shutil.copytree(refFolder, outFolder)
+      check = ["[*]  dataset-001-001: unitTest\n",
+        "[*]  dataset-001-002: unitTest\n",
+        "[*]  dataset-002-001: unitTest\n"]
+      flagCatalog = True
+      for i in range(2):
+        if self.RunUnitTestCommand(["-list"], outFolder) != check:
+          flagCatalog = False
+      with open(os.path.join(outFolder, Catalog._fileName), "r") as fp:
+        if sorted(json.load(fp)["dataSets"]) != \
+          ["001/001", "001/002", "002/001"]:
+          flagCatalog = False
+      inFolder = os.path.join("UnitTestNumPy", "InCatalog")
+      shutil.copytree("UnitTestIn", inFolder)
+      with open(os.path.join(inFolder, "dataset-001-001.pov"), "a") as fp:
+        fp.write("// Modified\n")
+      check[0] = "[ ]  dataset-001-001: unitTest (pov file changed)\n"
+      if self.RunUnitTestCommand(["-in", inFolder, "-list"], outFolder) != \
+        check:
+        flagCatalog = False
+      inFolder = os.path.join("UnitTestNumPy", "InInclude")
+      shutil.copytree("UnitTestIn", inFolder)
+      with open(os.path.join(inFolder, "unitTest.inc"), "w") as fp:
+        fp.write("// Include\n")
+      with open(os.path.join(inFolder, "dataset-002-001.pov"), "a") as fp:
+        fp.write("#include \"unitTest.inc\"\n")
+      outFolder = os.path.join("UnitTestNumPy", "Include")
+      self.RunUnitTestCommand(["-in", inFolder], outFolder)
+      check = ["[*]  dataset-001-001: unitTest\n",
+        "[*]  dataset-001-002: unitTest\n",
+        "[*]  dataset-002-001: unitTest\n"]
+      if self.RunUnitTestCommand(["-in", inFolder, "-list"], outFolder) != \
+        check:
+        flagCatalog = False
+      with open(os.path.join(inFolder, "unitTest.inc"), "a") as fp:
+        fp.write("// Modified\n")
+      check[2] = "[ ]  dataset-002-001: unitTest (included files changed)\n"
+      if self.RunUnitTestCommand(["-in", inFolder, "-list"], outFolder) != \
+        check:
+        flagCatalog = False
+      if not flagCatalog:
+        flagSuccess = False
+        print("[catalog] NOK")
+      else:
+        print("[catalog] OK")
+
+      # Test [-jobs]
+      outFolder = os.path.join("UnitTestNumPy", "Jobs")
+      data = self.RunUnitTestCommand(["-jobs", "2"], outFolder)
+      if data[-len(checkGenerated):] != checkGenerated or \
+        not self.CompareUnitTestOut(refFolder, outFolder):
+        flagSuccess = False
+        print("[-jobs] NOK")
+      else:
+        print("[-jobs] OK")
+
+      # Test the scheduling of the stale data sets only
+      outFolder = os.path.join("UnitTestNumPy", "Scheduled")
+      os.makedirs(os.path.join(outFolder, "001"))
+      shutil.copytree(os.path.join(refFolder, "001", "002"), \
+        os.path.join(outFolder, "001", "002"))
+      data = self.RunUnitTestCommand(["-jobs", "3"], outFolder)
+      check = [
+        '\n', 
+        'The following data sets were generated successfully:\n', 
+        '  ' + os.path.join(BASE_DIR, "UnitTestIn", \
+          "dataset-001-001.pov") + '\n', 
+        '  ' + os.path.join(BASE_DIR, "UnitTestIn", \
+          "dataset-002-001.pov") + '\n', 
+        '\n', 
+        'The following data sets were skipped:\n', 
+        '  ' + os.path.join(BASE_DIR, "UnitTestIn", \
+          "dataset-001-002.pov") + '\n', 
+        '\n']
+      if data[-len(check):] != check or \
+        not self.CompareUnitTestOut(refFolder, outFolder):
+        flagSuccess = False
+        print("[-jobs scheduling] NOK")
+      else:
+        print("[-jobs scheduling] OK")
+
+      # Test [-batch]
+      outFolder = os.path.join("UnitTestNumPy", "Batch")
+      data = self.RunUnitTestCommand(["-batch", "2"], outFolder)
+      if data[-len(checkGenerated):] != checkGenerated or \
+        not self.CompareUnitTestOut(refFolder, outFolder):
+        flagSuccess = False
+        print("[-batch] NOK")
+      else:
+        print("[-batch] OK")
+
+      # Test the masks split from a label map
+      inFolder = os.path.join("UnitTestNumPy", "InLabelMap")
+      shutil.copytree("UnitTestIn", inFolder)
+      for templateFilePath in glob.glob(os.path.join(inFolder, "*.json")):
+        with open(templateFilePath, "r") as fp:
+          template = json.load(fp)
+        template["labelMap"] = "1"
+        with open(templateFilePath, "w") as fp:
+          json.dump(template, fp)
+      outFolder = os.path.join("UnitTestNumPy", "LabelMap")
+      data = self.RunUnitTestCommand(["-in", inFolder], outFolder)
+      if data[-len(checkGenerated):] != [l.replace(os.path.join( \
+        BASE_DIR, "UnitTestIn"), os.path.join(BASE_DIR, inFolder)) \
+        for l in checkGenerated] or \
+        not any("Rendering label map" in l for l in data) or \
+        len(glob.glob(os.path.join(outFolder, "*", "*", "label*"))) > 0 or \
+        not self.CompareUnitTestOut(refFolder, outFolder):
+        flagSuccess = False
+        print("[labelMap] NOK")
+      else:
+        print("[labelMap] OK")
+
+      # Test [-annotate], on a copy of the reference data sets whose
+      # annotations have been erased
+      outFolder = os.path.join("UnitTestNumPy", "Annotate")
+      shutil.copytree(refFolder, outFolder)
+      for manifestFilePath in glob.glob(os.path.join(outFolder, "*", "*", \
+        "samples.jsonl")):
+        with open(manifestFilePath, "r") as fp:
+          lines = fp.readlines()
+        with open(manifestFilePath, "w") as fp:
+          fp.write(lines[0])
+          for line in lines[1:]:
+            sample = json.loads(line)
+            for key in ["bounding", "area", "centroid", "instances"]:
+              sample[key] = []
+            fp.write(json.dumps(sample) + "\n")
+      data = self.RunUnitTestCommand(["-annotate"], outFolder)
+      check = [
+        '\n', 
+        'The following data sets were annotated successfully:\n', 
+        '  ' + os.path.join(BASE_DIR, outFolder, "001", "001") + '\n', 
+        '  ' + os.path.join(BASE_DIR, outFolder, "001", "002") + '\n', 
+        '  ' + os.path.join(BASE_DIR, outFolder, "002", "001") + '\n', 
+        '\n']
+      if data[-len(check):] != check or \
+        not self.CompareUnitTestOut(refFolder, outFolder):
+        flagSuccess = False
+        print("[-annotate] NOK")
+      else:
+        print("[-annotate] OK")
+
+      # Test the resumption of an interrupted generation, on a copy of a
+      # reference data set whose generation has been interrupted after 
+      # its first sample
+      outFolder = os.path.join("UnitTestNumPy", "Resume")
+      dataFolder = os.path.join(outFolder, "002", "001")
+      shutil.copytree(os.path.join(refFolder, "002", "001"), dataFolder)
+      os.remove(os.path.join(dataFolder, "dataset.json"))
+      for pattern in ["img00[12].*", "mask00[12]-*.*"]:
+        for f in glob.glob(os.path.join(dataFolder, pattern)):
+          os.remove(f)
+      with open(os.path.join(dataFolder, "samples.jsonl"), "r") as fp:
+        lines = fp.readlines()
+      with open(os.path.join(dataFolder, "samples.jsonl"), "w") as fp:
+        fp.writelines(lines[0:2])
+      data = self.RunUnitTestCommand([], outFolder)
+      check = [
+        'Resume from sample 001\n', 
+        '001/003 Rendering image ' + os.path.join(BASE_DIR, dataFolder, \
+          "") + 'img001.tga ...\n', 
+        '        Rendering mask ' + os.path.join(BASE_DIR, dataFolder, \
+          "") + 'mask001-000.tga ...\n', 
+        '        Rendering mask ' + os.path.join(BASE_DIR, dataFolder, \
+          "") + 'mask001-001.tga ...\n', 
+        '002/003 Rendering image ' + os.path.join(BASE_DIR, dataFolder, \
+          "") + 'img002.tga ...\n', 
+        '        Rendering mask ' + os.path.join(BASE_DIR, dataFolder, \
+          "") + 'mask002-000.tga ...\n', 
+        '        Rendering mask ' + os.path.join(BASE_DIR, dataFolder, \
+          "") + 'mask002-001.tga ...\n']
+      if not "".join(check) in "".join(data) or \
+        data[-len(checkGenerated):] != checkGenerated or \
+        not self.CompareUnitTestOut(refFolder, outFolder):
+        flagSuccess = False
+        print("[resume] NOK")
+      else:
+        print("[resume] OK")
+
+      # Test [-cache], the files rendered for a first output folder being
+      # used for a second one
+      cacheFolder = os.path.join("UnitTestNumPy", "Cache")
+      self.RunUnitTestCommand(["-cache", cacheFolder], \
+        os.path.join("UnitTestNumPy", "CacheA"))
+      outFolder = os.path.join("UnitTestNumPy", "CacheB")
+      data = self.RunUnitTestCommand(["-cache", cacheFolder], outFolder)
+      check = "Render cache: 21 hits, 0 misses (100.0% hit rate), " + \
+        "0 evictions"
+      if not any(l.startswith(check) for l in data) or \
+        not self.CompareUnitTestOut(refFolder, outFolder):
+        flagSuccess = False
+        print("[-cache] NOK")
+      else:
+        print("[-cache] OK")
+
+      # Test [-export] on a copy of the reference data sets, and 
+      # [-autoExport]
+      outFolder = os.path.join("UnitTestNumPy", "Export")
+      shutil.copytree(refFolder, outFolder)
+      data = self.RunUnitTestCommand(["-export"], outFolder)
+      check = [
+        '\n', 
+        'The following data sets were exported successfully:\n', 
+        '  ' + os.path.join(BASE_DIR, outFolder, "001", "001") + '\n', 
+        '  ' + os.path.join(BASE_DIR, outFolder, "001", "002") + '\n', 
+        '  ' + os.path.join(BASE_DIR, outFolder, "002", "001") + '\n', 
+        '\n']
+      flagExport = (data[-len(check):] == check)
+      autoExportFolder = os.path.join("UnitTestNumPy", "AutoExport")
+      self.RunUnitTestCommand(["-autoExport"], autoExportFolder)
+      for dataFolder in [os.path.join(outFolder, "002", "001"), \
+        os.path.join(autoExportFolder, "002", "001")]:
+        try:
+          images = numpy.load(os.path.join(dataFolder, "images.npy"), \
+            mmap_mode = "r")
+          masks = numpy.load(os.path.join(dataFolder, "masks.npy"), \
+            mmap_mode = "r")
+          for iSample in range(3):
+            refImg = ReadImage(os.path.join(refFolder, "002", "001", \
+              "img" + str(iSample).zfill(3) + ".tga"))
+            if not numpy.array_equal(images[iSample], refImg[:, :, ::-1]):
+              flagExport = False
+            for iMask in range(2):
+              refMask = ReadMask(os.path.join(refFolder, "002", "001", \
+                "mask" + str(iSample).zfill(3) + "-" + \
+                str(iMask).zfill(3) + ".tga"))
+              if not numpy.array_equal(masks[iSample, iMask] != 255, \
+                refMask):
+                flagExport = False
+          del images, masks
+        except Exception as exc:
+          PrintExc(exc)
+          flagExport = False
+      if not flagExport:
+        flagSuccess = False
+        print("[-export] NOK")
+      else:
+        print("[-export] OK")
+
+      # Test the DataSetReader of dataSetReader.py, on the files of a 
+      # reference data set and on its exported arrays
+      flagReader = True
+      try:
+        from dataSetReader import DataSetReader
+        for dataFolder in [os.path.join(refFolder, "002", "001"), \
+          os.path.join("UnitTestNumPy", "Export", "002", "001")]:
+          reader = DataSetReader(dataFolder, batch_size = 2, \
+            nb_workers = 2, prefetch = 2)
+          batches = list(reader)
+          reader.close()
+          images = numpy.concatenate([batch[0] for batch in batches])
+          masks = numpy.concatenate([batch[1] for batch in batches])
+          bboxes = numpy.concatenate([batch[2] for batch in batches])
+          if [len(batch[0]) for batch in batches] != [2, 1]:
+            flagReader = False
+          refDataSet = DataSet(os.path.join(dataFolder, "dataset.json"))
+          refDataSet.LoadDescFile(os.path.join(dataFolder, "dataset.json"))
+          for iSample, sample in enumerate(refDataSet._images):
+            refImg = ReadImage(os.path.join(dataFolder, sample["img"]))
+            if not numpy.array_equal(images[iSample], refImg[:, :, ::-1]):
+              flagReader = False
+            for iMask, maskFileName in enumerate(sample["mask"]):
+              refMask = ReadMask(os.path.join(dataFolder, maskFileName))
+              if not numpy.array_equal(masks[iSample, iMask] != 255, \
+                refMask) or not numpy.allclose(bboxes[iSample, iMask], \
+                [float(v) for v in sample["bounding"][iMask]]):
+                flagReader = False
+      except Exception as exc:
+        PrintExc(exc)
+        flagReader = False
+      if not flagReader:
+        flagSuccess = False
+        print("[DataSetReader] NOK")
+      else:
+        print("[DataSetReader] OK")
+
+      # Test the packed formats of the masks
+      inFolder = os.path.join("UnitTestNumPy", "InMaskFormat")
+      shutil.copytree("UnitTestIn", inFolder)
+      for templateFilePath in glob.glob(os.path.join(inFolder, "*.json")):
+        with open(templateFilePath, "r") as fp:
+          template = json.load(fp)
+        if template["format"] == "png":
+          template["maskFormat"] = "bits"
+        else:
+          template["maskFormat"] = "rle"
+        with open(templateFilePath, "w") as fp:
+          json.dump(template, fp)
+      outFolder = os.path.join("UnitTestNumPy", "MaskFormat")
+      self.RunUnitTestCommand(["-in", inFolder], outFolder)
+      if len(glob.glob(os.path.join(outFolder, "001", "*", \
+        "mask*.bits"))) != 6 or len(glob.glob(os.path.join(outFolder, \
+        "002", "001", "mask*.rle"))) != 6 or \
+        len(glob.glob(os.path.join(outFolder, "*", "*", "mask*.png"))) + \
+        len(glob.glob(os.path.join(outFolder, "*", "*", "mask*.tga"))) > 0 or \
+        not self.CompareUnitTestOut(refFolder, outFolder):
+        flagSuccess = False
+        print("[maskFormat] NOK")
+      else:
+        print("[maskFormat] OK")
+
+      # Test [-pipeline]
+      outFolder = os.path.join("UnitTestNumPy", "Pipeline")
+      data = self.RunUnitTestCommand(["-pipeline", "2", "-jobs", "2"], \
+        outFolder)
+      if data[-len(checkGenerated):] != checkGenerated or \
+        not self.CompareUnitTestOut(refFolder, outFolder):
+        flagSuccess = False
+        print("[-pipeline] NOK")
+      else:
+        print("[-pipeline] OK")
+
+      # Test [-profile], the totals per data set being exact if the data
+      # sets are generated one after the other, and overlapping if they
+      # are rendered together
+      flagProfile = True
+      for (args, remark) in [([], ""), (["-jobs", "2"], " (overlapping, " + \
+        "the data sets being rendered together)")]:
+        outFolder = os.path.join("UnitTestNumPy", "Profile" + str(len(args)))
+        data = self.RunUnitTestCommand(["-profile"] + args, outFolder)
+        if not "Profile (times in seconds, percentiles per record):\n" in \
+          data or not "  Total per data set" + remark + ":\n" in data:
+          flagProfile = False
+        for dataFolder in glob.glob(os.path.join(outFolder, "*", "*")):
+          try:
+            with open(os.path.join(dataFolder, "profile.json"), "r") as fp:
+              phases = json.load(fp)["phases"]
+            if phases["render"]["count"] != \
+              len(glob.glob(os.path.join(dataFolder, "img*"))) + \
+              len(glob.glob(os.path.join(dataFolder, "mask*"))) or \
+              phases["dataSet"]["count"] != 1:
+              flagProfile = False
+          except Exception as exc:
+            PrintExc(exc)
+            flagProfile = False
+      if not flagProfile:
+        flagSuccess = False
+        print("[-profile] NOK")
+      else:
+        print("[-profile] OK")
+
+      # Test [-renderer], with an unknown renderer and the interface of
+      # the renderers, whose default rendering fails
+      data = self.RunUnitTestCommand(["-renderer", "unknown"], \
+        os.path.join("UnitTestNumPy", "Renderer"))
+      check = ["The renderer must be one of " + \
+        ", ".join(self._renderers) + ".\n"]
+      if data != check or Renderer().Render(os.path.join("UnitTestIn", \
+        "dataset-001-001.pov"), "UnitTestNumPy", 0, 1, 0, ["10", "20"], \
+        [], "png", ["img000.png"]) is not None:
+        flagSuccess = False
+        print("[-renderer] NOK")
+      else:
+        print("[-renderer] OK")
+
+      # Test [-shard] and [-range], each part being rendered by its own
+      # generator, and [-merge]
+      outFolder = os.path.join("UnitTestNumPy", "Shard")
+      self.RunUnitTestCommand(["-shard", "0/2"], outFolder)
+      self.RunUnitTestCommand(["-range", "1:"], outFolder)
+      data = self.RunUnitTestCommand(["-merge"], outFolder)
+      check = [
+        '\n', 
+        'The following data sets were merged successfully:\n', 
+        '  ' + os.path.join(BASE_DIR, outFolder, "001", "001") + '\n', 
+        '  ' + os.path.join(BASE_DIR, outFolder, "001", "002") + '\n', 
+        '  ' + os.path.join(BASE_DIR, outFolder, "002", "001") + '\n', 
+        '\n']
+      if data[-len(check):] != check or \
+        len(glob.glob(os.path.join(outFolder, "*", "*", "part-*"))) > 0 or \
+        not self.CompareUnitTestOut(refFolder, outFolder):
+        flagSuccess = False
+        print("[-shard/-range/-merge] NOK")
+      else:
+        print("[-shard/-range/-merge] OK")
+
+      # Test the manifest of the samples, and [-legacyDesc] writing them
+      # in the description file instead
+      outFolder = os.path.join("UnitTestNumPy", "LegacyDesc")
+      self.RunUnitTestCommand(["-legacyDesc"], outFolder)
+      flagManifest = True
+      for dataFolder in glob.glob(os.path.join(refFolder, "*", "*")):
+        with open(os.path.join(dataFolder, "dataset.json"), "r") as fp:
+          desc = json.load(fp)
+        with open(os.path.join(outFolder, os.path.relpath(dataFolder, \
+          refFolder), "dataset.json"), "r") as fp:
+          legacyDesc = json.load(fp)
+        if desc.get("manifest") != "samples.jsonl" or "samples" in desc or \
+          "manifest" in legacyDesc or \
+          ReadManifest(os.path.join(dataFolder, "samples.jsonl")) != \
+          legacyDesc.get("samples"):
+          flagManifest = False
+      if not flagManifest or \
+        not self.CompareUnitTestOut(refFolder, outFolder):
+        flagSuccess = False
+        print("[manifest/-legacyDesc] NOK")
+      else:
+        print("[manifest/-legacyDesc] OK")
+
+      # Test the index of the annotations and the SampleIndex of
+      # dataSetReader.py, loaded from the index of a reference data set
+      # and built from the description file of a [-legacyDesc] one
+      flagIndex = True
+      try:
+        from dataSetReader import SampleIndex
+        os.remove(os.path.join(outFolder, "002", "001", "index.npz"))
+        samples = \
+          ReadManifest(os.path.join(refFolder, "002", "001", "samples.jsonl"))
+        for dataFolder in [os.path.join(refFolder, "002", "001"), \
+          os.path.join(outFolder, "002", "001")]:
+          index = SampleIndex(dataFolder)
+          area = numpy.array([[int(v) for v in sample["area"]] \
+            for sample in samples])
+          bounding = numpy.array([[[float(v) for v in box] \
+            for box in sample["bounding"]] for sample in samples])
+          if len(index) != len(samples) or \
+            not numpy.array_equal(index.area, area) or \
+            not numpy.allclose(index.bounding, bounding, equal_nan = True) or \
+            not numpy.array_equal(index.nb_target, \
+              numpy.count_nonzero(area, axis = 1)):
+            flagIndex = False
+          x = bounding[:, 0, 0]
+          if list(index.select(mask = 0, x = (0.2, None))) != \
+            list(numpy.flatnonzero((area[:, 0] > 0) & (x >= 0.2))) or \
+            list(index.select(mask = 0, has_target = False)) != \
+            list(numpy.flatnonzero(area[:, 0] == 0)):
+            flagIndex = False
+          order = index.order_by("x", mask = 0)
+          if list(x[order[:numpy.count_nonzero(area[:, 0])]]) != \
+            sorted(x[area[:, 0] > 0]):
+            flagIndex = False
+          strata = index.stratify("x", [0.0, 0.25, 1.0], mask = 0)
+          if sum(len(stratum) for stratum in strata) != \
+            numpy.count_nonzero(area[:, 0]) or \
+            any(x[i] >= 0.25 for i in strata[0]):
+            flagIndex = False
+        index = SampleIndex(os.path.join(refFolder, "002", "001"))
+        for iSample, sample in enumerate(samples):
+          if index.read_record(iSample) != sample:
+            flagIndex = False
+      except Exception as exc:
+        PrintExc(exc)
+        flagIndex = False
+      if not flagIndex:
+        flagSuccess = False
+        print("[index/SampleIndex] NOK")
+      else:
+        print("[index/SampleIndex] OK")
+
+      # Test [-stats] on a copy of the reference data sets without their
+      # statistics
+      outFolder = os.path.join("UnitTestNumPy", "Stats")
+      shutil.copytree(refFolder, outFolder)
+      for descFilePath in glob.glob(os.path.join(outFolder, "*", "*", \
+        "dataset.json")):
+        with open(descFilePath, "r") as fp:
+          desc = json.load(fp)
+        del desc["stats"]
+        with open(descFilePath, "w") as fp:
+          json.dump(desc, fp)
+        manifestFilePath = \
+          os.path.join(os.path.dirname(descFilePath), "samples.jsonl")
+        with open(manifestFilePath, "r") as fp:
+          records = [json.loads(line) for line in fp]
+        with open(manifestFilePath, "w") as fp:
+          for record in records:
+            record.pop("pixelMean", None)
+            record.pop("pixelM2", None)
+            fp.write(json.dumps(record) + "\n")
+      res = self.RunUnitTestCommand(["-stats"], outFolder)
+      checkStats = ["The statistics of the following data sets were " + \
+        "calculated successfully:\n"] + \
+        ["  " + os.path.abspath(os.path.join(outFolder, group, subgroup)) + \
+        "\n" for (group, subgroup) in \
+        [("001", "001"), ("001", "002"), ("002", "001")]] + ["\n"]
+      flagStats = (res[-len(checkStats):] == checkStats)
+      for dataFolder in glob.glob(os.path.join(refFolder, "*", "*")):
+        outDataFolder = \
+          os.path.join(outFolder, os.path.relpath(dataFolder, refFolder))
+        with open(os.path.join(dataFolder, "dataset.json"), "r") as fp:
+          refStats = json.load(fp)["stats"]
+        with open(os.path.join(outDataFolder, "dataset.json"), "r") as fp:
+          stats = json.load(fp).get("stats")
+        if stats != refStats or \
+          ReadManifest(os.path.join(dataFolder, "samples.jsonl")) != \
+          ReadManifest(os.path.join(outDataFolder, "samples.jsonl")):
+          flagStats = False
+      if not flagStats:
+        flagSuccess = False
+        print("[-stats] NOK")
+      else:
+        print("[-stats] OK")
+
+      # Test [-transcode] on a copy of the reference data sets, into each
+      # format in turn, and [-autoTranscode] during the generation
+      outFolder = os.path.join("UnitTestNumPy", "Transcode")
+      shutil.copytree(refFolder, outFolder)
+      flagTranscode = True
+      for fileFormat in DataSet._transcodeFormats[::-1]:
+        res = self.RunUnitTestCommand(["-transcode", fileFormat], outFolder)
+        fileNames = [os.path.basename(filePath) for filePath in \
+          glob.glob(os.path.join(outFolder, "*", "*", "*")) \
+          if re.match(r"^(img|mask)\d", os.path.basename(filePath))]
+        if res[-5:] != ["The following data sets were transcoded " + \
+          "successfully:\n"] + ["  " + os.path.abspath(os.path.join( \
+          outFolder, group, subgroup)) + "\n" for (group, subgroup) in \
+          [("001", "001"), ("001", "002"), ("002", "001")]] + ["\n"] or \
+          len(fileNames) == 0 or \
+          any(not fileName.endswith("." + fileFormat) \
+          for fileName in fileNames) or \
+          not self.CompareUnitTestOut(refFolder, outFolder):
+          flagTranscode = False
+      outFolder = os.path.join("UnitTestNumPy", "AutoTranscode")
+      self.RunUnitTestCommand(["-autoTranscode", "npy"], outFolder)
+      if len(glob.glob(os.path.join(outFolder, "*", "*", "img*.npy"))) != \
+        9 or not self.CompareUnitTestOut(refFolder, outFolder):
+        flagTranscode = False
+      if not flagTranscode:
+        flagSuccess = False
+        print("[-transcode/-autoTranscode] NOK")
+      else:
+        print("[-transcode/-autoTranscode] OK")
+
+      # Test [-capture], alone and writing the captured files directly
+      # in another format, against the reference data sets including the
+      # statistics of their pixels
+      flagCapture = True
+      for (subFolder, args) in [("Capture", ["-capture"]), \
+        ("CaptureWebp", ["-capture", "-autoTranscode", "webp"])]:
+        outFolder = os.path.join("UnitTestNumPy", subFolder)
+        res = self.RunUnitTestCommand(args, outFolder)
+        if res[-len(checkGenerated):] != checkGenerated or \
+          not self.CompareUnitTestOut(refFolder, outFolder):
+          flagCapture = False
+        for dataFolder in glob.glob(os.path.join(refFolder, "*", "*")):
+          outDataFolder = \
+            os.path.join(outFolder, os.path.relpath(dataFolder, refFolder))
+          with open(os.path.join(dataFolder, "dataset.json"), "r") as fp:
+            refStats = json.load(fp)["stats"]
+          with open(os.path.join(outDataFolder, "dataset.json"), "r") as fp:
+            stats = json.load(fp).get("stats")
+          if stats != refStats:
+            flagCapture = False
+      if len(glob.glob(os.path.join(outFolder, "*", "*", "*.webp"))) == 0:
+        flagCapture = False
+      if not flagCapture:
+        flagSuccess = False
+        print("[-capture] NOK")
+      else:
+        print("[-capture] OK")
+
+      # Delete the temporary file and folder
       os.remove("out.txt")
+      shutil.rmtree("UnitTestNumPy")
 
       # Inform the user
       if flagSuccess: